@@ -0,0 +1,100 @@
+"""
+Benchmark the single-pass heading scanner against the per-pattern loop.
+
+Usage:
+    python benchmarks/bench_pattern_scanner.py [--pages N] [--repeat N]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.patterns import COMPILED_PATTERNS
+from src.parsers.pattern_scanner import PatternScanner, HEADING_FAMILIES
+
+FILLER = (
+    "The Company's revenue increased compared to the prior year primarily due to\n"
+    "higher volumes and favorable pricing. Operating expenses were consistent with\n"
+    "management's expectations, and liquidity remained adequate for operations.\n"
+)
+
+HEADINGS = [
+    "PART I",
+    "ITEM 1. BUSINESS",
+    "ITEM 2. PROPERTIES",
+    "ITEM 3. LEGAL PROCEEDINGS",
+    "ITEM 4. MINE SAFETY DISCLOSURES",
+    "PART II",
+    "ITEM 7. MANAGEMENT'S DISCUSSION AND ANALYSIS OF FINANCIAL CONDITION AND RESULTS OF OPERATIONS",
+    "ITEM 7A. QUANTITATIVE AND QUALITATIVE DISCLOSURES ABOUT MARKET RISK",
+    "ITEM 8. FINANCIAL STATEMENTS AND SUPPLEMENTARY DATA",
+]
+
+
+def build_document(pages: int) -> str:
+    """Build a synthetic filing with headings spread across the given number of pages."""
+    parts = []
+    for page in range(pages):
+        parts.append(f"\n  {HEADINGS[page % len(HEADINGS)]}\n\n")
+        parts.append(FILLER * 20)
+    return "".join(parts)
+
+
+def legacy_scan(text: str) -> dict:
+    """Per-pattern finditer over every family, as SectionParser did before."""
+    results = {}
+    for family in HEADING_FAMILIES:
+        matches = [
+            (i, match)
+            for i, pattern in enumerate(COMPILED_PATTERNS[family])
+            for match in pattern.finditer(text)
+        ]
+        matches.sort(key=lambda item: (item[1].start(), item[0]))
+        results[family] = matches
+    return results
+
+
+def as_spans(results: dict) -> dict:
+    return {
+        family: [(i, m.start(), m.end()) for i, m in matches]
+        for family, matches in results.items()
+    }
+
+
+def time_call(func, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages", type=int, default=400, help="Synthetic pages (default: 400)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions (default: 3)")
+    args = parser.parse_args()
+
+    text = build_document(args.pages)
+    scanner = PatternScanner()
+
+    if as_spans(legacy_scan(text)) != as_spans(scanner.scan(text)):
+        print("ERROR: scanner results differ from per-pattern finditer")
+        sys.exit(1)
+
+    legacy = time_call(legacy_scan, text, args.repeat)
+    single = time_call(scanner.scan, text, args.repeat)
+    patterns = sum(len(COMPILED_PATTERNS[f]) for f in HEADING_FAMILIES)
+
+    print(f"Document: {len(text) / 1024 / 1024:.1f} MB, {patterns} patterns in {len(HEADING_FAMILIES)} families")
+    print(f"Per-pattern finditer: {legacy * 1000:.1f} ms")
+    print(f"Single-pass scanner:  {single * 1000:.1f} ms")
+    print(f"Speedup: {legacy / single:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Benchmark peak memory of slice-based vs positional searching per filing.
+
+Each mode runs in a fresh subprocess and reports the peak resident set
+size and the tracemalloc peak while locating the MD&A section of one
+large synthetic 10-K.
+
+Usage:
+    python benchmarks/bench_search_memory.py [--mb N]
+"""
+
+import argparse
+import json
+import re
+import os
+import resource
+import subprocess
+import sys
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from config.patterns import COMPILED_PATTERNS
+from src.parsers.section_parser import SectionParser
+
+FILLER = (
+    "Revenue increased compared to the prior year primarily due to higher volumes\n"
+    "and favorable pricing, while results of operations reflected lower costs.\n"
+)
+
+END_PATTERNS = [
+    re.compile(r'(?:^|\n)\s*ITEM\s*7A[\.\:\-\s]', re.IGNORECASE | re.MULTILINE),
+    re.compile(r'(?:^|\n)\s*ITEM\s*8[\.\:\-\s]', re.IGNORECASE | re.MULTILINE),
+    re.compile(r'(?:^|\n)\s*SIGNATURES\s*(?:\n|$)', re.IGNORECASE | re.MULTILINE),
+]
+
+
+def build_document(megabytes: int) -> str:
+    """Synthetic 10-K whose MD&A starts early, so remainder slices are near full size."""
+    body = FILLER * (megabytes * 1024 * 1024 // len(FILLER))
+    return (
+        "PART II\n\n"
+        "ITEM 7. MANAGEMENT'S DISCUSSION AND ANALYSIS OF FINANCIAL CONDITION\n\n"
+        + body
+        + "\nITEM 7A. QUANTITATIVE AND QUALITATIVE DISCLOSURES ABOUT MARKET RISK\n"
+        + "\nITEM 8. FINANCIAL STATEMENTS AND SUPPLEMENTARY DATA\n"
+    )
+
+
+def sliced(text: str, start: int) -> int:
+    """The searches as previously written: each one copies the remainder first."""
+    candidates = []
+    for _ in range(3):  # 10-K end search, validated-start end search, fallback end
+        search_text = text[start:]
+        for pattern in END_PATTERNS:
+            match = pattern.search(search_text)
+            if match:
+                candidates.append(start + match.start())
+    section_text = text[start:min(candidates)]
+    check_text = section_text[:2000]
+    for pattern in COMPILED_PATTERNS["incorporation_by_reference"]:
+        pattern.search(check_text)
+    return min(candidates)
+
+
+def positional(text: str, start: int) -> int:
+    """The same searches run in place with pattern.search(text, pos, endpos)."""
+    candidates = []
+    for _ in range(3):
+        for pattern in END_PATTERNS:
+            match = pattern.search(text, start)
+            if match:
+                candidates.append(match.start())
+    end = min(candidates)
+    for pattern in COMPILED_PATTERNS["incorporation_by_reference"]:
+        pattern.search(text, start, min(end, start + 2000))
+    return end
+
+
+def section_parser(text: str, start: int) -> int:
+    """The current SectionParser path for the whole filing."""
+    parser = SectionParser()
+    bounds = parser.find_mdna_section(text, "10-K")
+    parser.check_incorporation_by_reference(text, *bounds)
+    return bounds[1]
+
+
+MODES = {"sliced": sliced, "positional": positional, "section_parser": section_parser}
+
+
+def reset_peak_rss() -> bool:
+    """Reset the kernel's peak-RSS counter (Linux only); returns whether it worked."""
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except OSError:
+        return False
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process in MB."""
+    if os.path.exists("/proc/self/status"):
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+
+def run_mode(mode: str, megabytes: int) -> dict:
+    text = build_document(megabytes)
+    start = text.index("ITEM 7.")
+    reset = reset_peak_rss()
+    current_rss = peak_rss_mb()
+
+    tracemalloc.start()
+    end = MODES[mode](text, start)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "end": end,
+        "traced_peak_mb": peak / 1024 / 1024,
+        # Growth of peak RSS over the process holding just the document
+        "rss_growth_mb": peak_rss_mb() - current_rss if reset else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mb", type=int, default=50, help="Synthetic filing size in MB (default: 50)")
+    parser.add_argument("--mode", choices=sorted(MODES), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        print(json.dumps(run_mode(args.mode, args.mb)))
+        return
+
+    print(f"Synthetic filing: {args.mb} MB")
+    results = {}
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--mb", str(args.mb)],
+            capture_output=True, text=True, check=True
+        ).stdout
+        results[mode] = json.loads(output.strip().splitlines()[-1])
+        rss = results[mode]["rss_growth_mb"]
+        rss_text = f"{rss:8.1f} MB" if rss is not None else "     n/a"
+        print(f"{mode:>15}: traced peak {results[mode]['traced_peak_mb']:8.1f} MB, peak RSS growth {rss_text}")
+
+    if results["sliced"]["end"] != results["positional"]["end"]:
+        print("ERROR: sliced and positional searches disagree on the section end")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
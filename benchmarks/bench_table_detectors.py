@@ -0,0 +1,97 @@
+"""
+Compare the line-by-line and feature-matrix table detectors.
+
+Times both detectors on the same normalized MD&A text and prints how
+their tables agree, with the line-by-line detector as the reference.
+Without paths, a synthetic MD&A is used.
+
+Usage:
+    python benchmarks/bench_table_detectors.py [--tables N] [--repeat N] [PATH ...]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from src.parsers.table_features import compare_tables
+from src.parsers.table_parser import TableParser, TABLE_DETECTORS
+from src.utils.text_normalizer import TextNormalizer
+
+PROSE = (
+    "Net sales increased compared to the prior year primarily due to higher volumes\n"
+    "and favorable pricing, partially offset by unfavorable foreign currency.\n\n"
+)
+
+TABLES = [
+    (
+        "                              Year Ended December 31,\n"
+        "                          2023          2022         Change\n"
+        "Net sales             $ 12,345      $ 11,020          12.0%\n"
+        "Cost of sales            8,120         7,600           6.8%\n"
+        "Gross margin             4,225         3,420          23.5%\n\n"
+    ),
+    (
+        "Segment results\n\n"
+        "Segment            Sales      Operating income\n"
+        "----------------------------------------------\n"
+        "Americas           6,210                 1,020\n"
+        "International      6,135                   870\n\n"
+    ),
+    (
+        "| Quarter | Revenue | Margin |\n"
+        "| Q1      | 3,010   | 34%    |\n"
+        "| Q2      | 3,120   | 35%    |\n\n"
+    ),
+]
+
+
+def build_document(tables: int) -> str:
+    """Synthetic MD&A alternating prose paragraphs and tables."""
+    return "".join(PROSE * 3 + TABLES[i % len(TABLES)] for i in range(tables))
+
+
+def time_call(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", type=Path, help="MD&A text files to compare (default: synthetic)")
+    parser.add_argument("--tables", type=int, default=300, help="Tables in the synthetic MD&A (default: 300)")
+    parser.add_argument("--repeat", type=int, default=3, help="Timing repetitions (default: 3)")
+    args = parser.parse_args()
+
+    if args.paths:
+        sources = [(str(path), path.read_text(encoding="utf-8", errors="ignore")) for path in args.paths]
+    else:
+        sources = [(f"synthetic ({args.tables} tables)", build_document(args.tables))]
+
+    for name, raw in sources:
+        text, line_flags = TextNormalizer().normalize_with_line_flags(raw)
+        spans = {}
+        print(f"{name}: {len(line_flags)} lines")
+        for detector in TABLE_DETECTORS:
+            table_parser = TableParser(detector)
+            tables = table_parser.identify_tables(text, line_flags=line_flags)
+            spans[detector] = [(table.start_line, table.end_line) for table in tables]
+            elapsed = time_call(lambda: table_parser.identify_tables(text, line_flags=line_flags), args.repeat)
+            print(f"  {detector:<6} {len(tables):5d} tables  {elapsed * 1000:8.1f} ms")
+
+        agreement = compare_tables(spans["rules"], spans["vector"])
+        print(f"  Same line range:     {agreement.exact_matches}")
+        print(f"  Overlapping only:    {agreement.overlapping}")
+        print(f"  Only rules:          {agreement.reference_only}")
+        print(f"  Only vector:         {agreement.candidate_only}")
+        print(f"  Table-line agreement: {agreement.line_agreement:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 """Regex patterns for MD&A section detection and parsing."""
 
 import re
+import regex
 
 # Section boundary patterns (case-insensitive)
 ITEM_7_START_PATTERNS = [
@@ -121,6 +122,14 @@ ITEM_2_START_PATTERNS = [
     r"(?:^|\n)\s*MANAGEMENT['’`]?[S]?\s*DISCUSSION\s+AND\s+ANALYSIS\s+OF\s+FINANCIAL\s+CONDITION\s+AND\s+RESULTS\s+OF\s+OPERATIONS",
 ]
 
+# 10-Q Part I Item 2 heading (regex package syntax). The match starts at the Item 2
+# heading line however far below the PART I heading it is. Only the first newline of a
+# whitespace run can start a match, checked only once a newline is consumed, and
+# whitespace is consumed possessively, so matching stays linear in the text length.
+PART_I_ITEM_2_PATTERNS = [
+    r"(?:\A|\n(?<!\n[^\S\n]*\n))\s*+ITEM\s*2[\.\:\-\s]*MANAGEMENT['’]?S?\s*DISCUSSION",
+]
+
 
 ITEM_3_START_PATTERNS = [
     r"^\s*ITEM\s*3[\.\:\-\s]*QUANTITATIVE\s+AND\s+QUALITATIVE\s+DISCLOSURES\s+ABOUT\s+MARKET\s+RISK",
@@ -177,8 +186,9 @@ CROSS_REFERENCE_PATTERNS = [
     r"Exhibit\s+(\d+(?:\.\d+)?)[\s\)]*(?:to|of)?\s*(?:this\s+Form\s+10-K|this\s+filing)?",
 
     # --- Section references (titled/quoted) ---
-    r"(?:see|refer\s*to|discussed\s*in)?\s*(?:the\s*)?section\s*(?:entitled|captioned)?\s*['\"]([^'\"]+)['\"]",  # 'Liquidity and Capital Resources'
-    r"(?:see|refer\s*to)?\s*(?:discussion\s*under\s*)?['\"]([^'\"]+)[\"']",  # "Results of Operations"
+    # Without the lead-in these start only at the beginning of a whitespace run
+    r"(?:see|refer\s*to|discussed\s*in|(?<!\s))\s*+(?:the\s*)?section\s*(?:entitled|captioned)?\s*['\"]([^'\"]+)['\"]",  # 'Liquidity and Capital Resources'
+    r"(?:see|refer\s*to|(?<!\s))\s*+(?:discussion\s*under\s*)?['\"]([^'\"]+)[\"']",  # "Results of Operations"
     r"(?:see|refer\s*to)\s*(?:the\s*)?(?:discussion\s*under\s*)?section\s*(?:called|titled)?\s*['\"]([^'\"]+)['\"]",
 
     # --- Generic backward/forward references ---
@@ -241,16 +251,17 @@ INCORPORATION_BY_REFERENCE_PATTERNS = [
     r"MD&A.*?incorporated\s+by\s+reference",
 
     # Reference to proxy statements
-    r"incorporated\s+by\s+reference.*?(?:from|to).*?(?:Proxy\s+Statement|DEF\s*14A)",
-    r"(?:see|refer\s+to).*?Proxy\s+Statement.*?(?:pages?\s+[\d\-A-Z]+|Appendix)",
+    # Atomic groups: if the rest fails after the first anchor phrase, it fails after later ones too
+    r"incorporated\s+by\s+reference(?>.*?(?:from|to)).*?(?:Proxy\s+Statement|DEF\s*14A)",
+    r"(?:see|refer\s+to)(?>.*?Proxy\s+Statement).*?(?:pages?\s+[\d\-A-Z]+|Appendix)",
 
     # Reference to exhibits
     r"incorporated\s+by\s+reference.*?Exhibit\s*(?:13|99|[\d\.]+)",
-    r"(?:see|refer\s+to).*?Exhibit\s*(?:13|99|[\d\.]+).*?(?:Annual\s+Report|10-K)",
+    r"(?:see|refer\s+to)(?>.*?Exhibit\s*(?:13|99|[\d\.]+)).*?(?:Annual\s+Report|10-K)",
 
     # Reference to appendices
     r"(?:see|refer\s+to).*?Appendix\s*[A-Z]?.*?(?:pages?\s+[\d\-A-Z]+)?",
-    r"incorporated.*?from.*?Appendix",
+    r"incorporated(?>.*?from).*?Appendix",
 
     # Caption references
     r"under\s+(?:the\s+)?caption\s+[\"']([^\"']+)[\"']",
@@ -260,7 +271,7 @@ INCORPORATION_BY_REFERENCE_PATTERNS = [
     r"(?:on\s+)?pages?\s+([\d\-A-Z]+(?:\s+through\s+[\d\-A-Z]+)?)",
 
     # General incorporation phrases
-    r"information.*?set\s+forth.*?incorporated\s+by\s+reference",
+    r"information(?>.*?set\s+forth).*?incorporated\s+by\s+reference",
     r"hereby\s+incorporated\s+by\s+reference",
 ]
 
@@ -276,11 +287,14 @@ def compile_patterns():
         "item_4_start": [re.compile(p, re.IGNORECASE | re.MULTILINE) for p in ITEM_4_START_PATTERNS],
         "part_ii_start": [re.compile(p, re.IGNORECASE | re.MULTILINE) for p in PART_II_START_PATTERNS],
         "form_type": [re.compile(p, re.IGNORECASE | re.MULTILINE) for p in FORM_TYPE_PATTERNS],
-        "cross_reference": [re.compile(p, re.IGNORECASE) for p in CROSS_REFERENCE_PATTERNS],
+        # Patterns run over free text use the regex package for its per-search timeouts
+        # (see src/utils/safe_regex.py) and atomic/possessive syntax
+        "part_i_item_2": [regex.compile(p, regex.IGNORECASE | regex.MULTILINE | regex.DOTALL) for p in PART_I_ITEM_2_PATTERNS],
+        "cross_reference": [regex.compile(p, regex.IGNORECASE) for p in CROSS_REFERENCE_PATTERNS],
         "table_delimiter": [re.compile(p, re.MULTILINE) for p in TABLE_DELIMITER_PATTERNS],
         "table_header": [re.compile(p, re.IGNORECASE | re.MULTILINE) for p in TABLE_HEADER_PATTERNS],
         "sec_markers": [re.compile(p, re.MULTILINE) for p in SEC_MARKERS],
-        "incorporation_by_reference": [re.compile(p, re.IGNORECASE | re.MULTILINE) for p in INCORPORATION_BY_REFERENCE_PATTERNS],
+        "incorporation_by_reference": [regex.compile(p, regex.IGNORECASE | regex.MULTILINE) for p in INCORPORATION_BY_REFERENCE_PATTERNS],
     }
     return compiled
 
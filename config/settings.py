@@ -23,11 +23,29 @@ ZIP_EXTENSIONS = {".zip", ".ZIP"}
 # Processing limits
 MAX_FILE_SIZE_MB = 100
 MAX_CROSS_REFERENCE_DEPTH = 3
+CROSS_REFERENCE_CACHE_KB = 512  # Budget for resolved cross-references cached within one filing
 TABLE_MIN_COLUMNS = 2
 TABLE_MIN_ROWS = 2
+TABLE_DETECTOR = "rules"  # 'rules' (line-by-line) or 'vector' (NumPy feature matrix; experimental)
+TABLE_MIN_DIGIT_DENSITY = 0.25  # Share of digits that makes a line of numbers a table row (vector detector)
+TABLE_MIN_GUTTER = 2  # Empty columns that separate two table columns (vector detector)
+TABLE_MAX_CONTINUATION_CHARS = 40  # Longest total/net line kept in a table without an amount under a column
+TABLE_EXPORT_DIRNAME = "tables"  # Subdirectory of the output directory for exported table datasets
+TABLE_DASH_AS_ZERO = True  # Export a cell of dashes as 0 rather than null
+
+# Table of contents detection
+TOC_MAX_LINE_LENGTH = 160  # Longer lines are never TOC entries
+TOC_MIN_ENTRIES = 3  # Entries needed to form a TOC region
+TOC_MAX_GAP_LINES = 3  # Non-entry, non-blank lines allowed between entries of one region
+TOC_BLOCK_SIZE = 1024 * 1024  # Characters per lazily scanned block of a document
+TOC_BLOCK_MARGIN = 32 * 1024  # Context scanned on each side of a block
+
+# Regex safety
+REGEX_TIMEOUT_SECONDS = 2.0  # Budget per search of a free-text pattern before it is skipped
 
 # Text normalization
-ENCODING_PREFERENCES = ["utf-8", "latin-1", "cp1252", "ascii"]
+ENCODING_PREFERENCES = ["utf-8", "cp1252", "latin-1"]  # Fallback order; latin-1 never fails
+ENCODING_SAMPLE_BYTES = 64 * 1024  # Bytes around the first UTF-8 error used for encoding detection
 CONTROL_CHAR_REPLACEMENT = " "
 MULTIPLE_WHITESPACE_PATTERN = r"\s+"
 
@@ -42,3 +60,18 @@ MAX_ERRORS_PER_FILE = 10
 
 # Performance
 CHUNK_SIZE = 2048 * 2048  # 4MB chunks for reading large files
+ZIP_MEMBER_SPILL_MB = 64  # ZIP members larger than this are spooled to scratch disk instead of memory
+SGML_HEADER_PREFIX_BYTES = 8192  # Header bytes read to identify filings with ambiguous names
+REFERENCE_CACHE_MB = 64  # Budget for decoded referenced documents (proxy statements, exhibits) kept between filings
+SGML_BINARY_TYPES = ["GRAPHIC", "ZIP", "PDF", "EXCEL"]  # <TYPE>s whose text is elided when reading a submission
+
+# Memory-mapped partial decoding of large files
+MMAP_MIN_FILE_MB = 16  # Files at least this large are located on a memory map and decoded only in part
+MMAP_HEADER_BYTES = 16 * 1024  # Leading bytes decoded for the filing header
+MMAP_WINDOW_MARGIN_BYTES = 32 * 1024  # Context decoded on each side of the located MD&A
+MMAP_REFERENCE_RANGE_BYTES = 64 * 1024  # Longest range decoded for one cross-reference target
+MMAP_UNBOUNDED_MDNA_BYTES = 150 * 1024  # Longest MD&A span after a bare MANAGEMENT heading with no end heading
+
+# Windowed streaming of files above MAX_FILE_SIZE_MB
+STREAM_WINDOW_BYTES = 8 * 1024 * 1024  # Bytes held in memory per scanning window
+STREAM_WINDOW_OVERLAP_BYTES = 4096  # Overlap between windows; longer than any heading line
@@ -0,0 +1,172 @@
+"""Accession-number index of the referenced documents in an input directory."""
+
+import re
+import zipfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from config.settings import VALID_EXTENSIONS, ZIP_EXTENSIONS
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Accession number with or without dashes: 0000950170-23-061793 / 000095017023061793
+ACCESSION_PATTERN = re.compile(r'(\d{10})-?(\d{2})-?(\d{6})')
+
+# Referenced document type -> filename markers after the accession number, in order of preference
+DOCUMENT_TYPE_MARKERS: Dict[str, Tuple[str, ...]] = {
+    "DEF 14A": ("def14a", "proxy"),
+    "Exhibit 13": ("ex13", "ex-13"),
+    "Exhibit 99": ("ex99", "ex-99"),
+}
+
+
+@dataclass(frozen=True)
+class DocumentLocation:
+    """Where an indexed document lives: a loose file, or a member of a ZIP archive."""
+    path: Path  # Loose file, or the ZIP archive
+    member: Optional[str] = None  # Member name when path is a ZIP archive
+
+    def cache_key(self) -> Tuple[str, Optional[str], int]:
+        """Identity of the document's current contents: path, member and modification time."""
+        return str(self.path), self.member, self.path.stat().st_mtime_ns
+
+    def read_text(self) -> str:
+        """Read the document as UTF-8, ignoring undecodable bytes."""
+        if self.member is None:
+            with open(self.path, 'r', encoding='utf-8', errors='ignore') as f:
+                return f.read()
+        with zipfile.ZipFile(self.path) as zf:
+            return zf.read(self.member).decode('utf-8', errors='ignore')
+
+
+def document_type_key(doc_type: Optional[str]) -> Optional[str]:
+    """
+    Normalize a referenced document type to a DOCUMENT_TYPE_MARKERS key.
+
+    Args:
+        doc_type: Document type found in the incorporation language, e.g. "Exhibit 13"
+
+    Returns:
+        Key of DOCUMENT_TYPE_MARKERS, or None if the type is not indexed
+    """
+    if not doc_type:
+        return None
+    for key in DOCUMENT_TYPE_MARKERS:
+        if key.lower() in doc_type.lower():
+            return key
+    return None
+
+
+def accession_from_name(name: str) -> Optional[Tuple[str, int]]:
+    """
+    Accession number in a file name.
+
+    Args:
+        name: File or member name
+
+    Returns:
+        Tuple of (dashed accession number, end of the number in name), or None
+    """
+    match = ACCESSION_PATTERN.search(name)
+    if not match:
+        return None
+    return f"{match.group(1)}-{match.group(2)}-{match.group(3)}", match.end()
+
+
+class AccessionIndex:
+    """
+    Accession number -> document type -> location, for loose files and ZIP members.
+
+    Built in one pass over the directory listing and the central directory
+    of each ZIP archive, so each lookup is a dictionary access instead of
+    a glob over the input tree.
+    """
+
+    def __init__(self):
+        # accession -> document type -> (marker preference, location)
+        self._entries: Dict[str, Dict[str, Tuple[int, DocumentLocation]]] = {}
+
+    @classmethod
+    def build(cls, directory: Path) -> "AccessionIndex":
+        """
+        Index the text files and ZIP members directly inside a directory.
+
+        Args:
+            directory: Input directory
+
+        Returns:
+            Populated index
+        """
+        index = cls()
+        if not directory.exists():
+            logger.warning(f"Cannot index missing directory: {directory}")
+            return index
+
+        for path in sorted(directory.iterdir()):
+            if not path.is_file():
+                continue
+            if path.suffix in VALID_EXTENSIONS:
+                index.add(path.name, DocumentLocation(path))
+            elif path.suffix in ZIP_EXTENSIONS:
+                try:
+                    with zipfile.ZipFile(path) as zf:
+                        members = [info.filename for info in zf.infolist() if not info.is_dir()]
+                except (zipfile.BadZipFile, OSError) as e:
+                    logger.warning(f"Cannot index {path}: {e}")
+                    continue
+                for member in members:
+                    if Path(member).suffix in VALID_EXTENSIONS:
+                        index.add(Path(member).name, DocumentLocation(path, member))
+
+        logger.info(f"Indexed {index.document_count} referenced documents under {len(index)} accession numbers")
+        return index
+
+    def add(self, name: str, location: DocumentLocation) -> bool:
+        """
+        Index a file if its name carries an accession number and a document type marker.
+
+        Args:
+            name: File or member name
+            location: Where the file lives
+
+        Returns:
+            Whether the file was indexed
+        """
+        found = accession_from_name(name)
+        if not found:
+            return False
+        accession, accession_end = found
+        rest = name[accession_end:].lower()
+
+        for doc_type, markers in DOCUMENT_TYPE_MARKERS.items():
+            preference = next((i for i, marker in enumerate(markers) if marker in rest), None)
+            if preference is None:
+                continue
+            by_type = self._entries.setdefault(accession, {})
+            current = by_type.get(doc_type)
+            if current is None or preference < current[0]:
+                by_type[doc_type] = (preference, location)
+            return True
+        return False
+
+    def lookup(self, accession: str, doc_type: str) -> Optional[DocumentLocation]:
+        """
+        Location of a referenced document.
+
+        Args:
+            accession: Dashed accession number
+            doc_type: Key of DOCUMENT_TYPE_MARKERS
+
+        Returns:
+            Location, or None if no such document was indexed
+        """
+        entry = self._entries.get(accession, {}).get(doc_type)
+        return entry[1] if entry else None
+
+    @property
+    def document_count(self) -> int:
+        return sum(len(by_type) for by_type in self._entries.values())
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -1,18 +1,24 @@
 """Main MD&A extractor orchestrator."""
 
 import re
+import time
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from datetime import datetime
 from config.patterns import compile_patterns
-from src.core.file_handler import FileHandler
+from src.core.file_handler import FileHandler, DecodeInfo
+from src.core.mapped_filing import MappedFiling, StreamedFiling
+from src.parsers.document_map import DocumentMap
+from src.parsers.submission_index import SubmissionIndex
 from src.parsers.section_parser import SectionParser
 from src.parsers.table_parser import TableParser
 from src.parsers.cross_reference_parser import CrossReferenceParser
+from src.core.table_exporter import TableExporter
 from src.utils.text_normalizer import TextNormalizer
 from src.utils.logger import get_logger, log_error
+from src.utils import pattern_profiler
 from src.models.filing import Filing, ExtractionResult
-from config.settings import MAX_ERRORS_PER_FILE
+from config.settings import MAX_ERRORS_PER_FILE, MAX_FILE_SIZE_MB, MMAP_MIN_FILE_MB
 
 logger = get_logger(__name__)
 
@@ -20,7 +26,13 @@ logger = get_logger(__name__)
 class MDNAExtractor:
     """Main class for extracting MD&A sections from SEC filings."""
 
-    def __init__(self, output_dir: Path):
+    def __init__(self, output_dir: Path, table_export_format: Optional[str] = None):
+        """
+        Args:
+            output_dir: Directory the MD&A text files are written to
+            table_export_format: 'parquet' or 'feather' to also export each
+                filing's tables as a typed dataset file; None to skip
+        """
         self.output_dir = Path(output_dir)
         self.file_handler = FileHandler()
         self.section_parser = SectionParser()
@@ -28,37 +40,150 @@ class MDNAExtractor:
         self.cross_ref_parser = CrossReferenceParser()
         self.normalizer = TextNormalizer()
         self.patterns = compile_patterns()
+        if pattern_profiler.is_enabled():
+            pattern_profiler.instrument(self.patterns)
+        self.table_exporter = TableExporter(output_dir, table_export_format) if table_export_format else None
         self.error_count = 0
 
-    def extract_from_file(self, file_path: Path, reference_resolver=None) -> Optional[ExtractionResult]:
+    def extract_from_file(
+            self,
+            file_path: Path,
+            reference_resolver=None,
+            source: Optional[str] = None
+    ) -> Optional[ExtractionResult]:
         """
         Extract MD&A from a single filing file.
 
         Args:
             file_path: Path to the filing file
             reference_resolver: Optional ReferenceResolver instance
+            source: Archive the file was extracted from, for encoding caching
 
         Returns:
             ExtractionResult or None if extraction failed
         """
         logger.info(f"Processing file: {file_path}")
+
+        size_mb = file_path.stat().st_size / (1024 * 1024) if file_path.exists() else 0
+
+        # Too large to hold: scan in windows and decode only around the MD&A
+        if size_mb > MAX_FILE_SIZE_MB:
+            with self.file_handler.open_windowed(file_path) as data:
+                decoded = self._decode_mapped(data, file_path, source, StreamedFiling)
+                if decoded:
+                    content, decode_info, streamed = decoded
+                    return self.extract_from_content(
+                        content, file_path, reference_resolver, decode_info,
+                        streamed.reference_document, streamed.submission_index
+                    )
+            log_error(f"MD&A not located in file too large to read whole ({size_mb:.1f} MB): {file_path}")
+            return None
+
+        # Large files: locate the MD&A on the raw bytes and decode only around it
+        if size_mb >= MMAP_MIN_FILE_MB:
+            with self.file_handler.map_file(file_path) as data:
+                decoded = self._decode_mapped(data, file_path, source)
+                if decoded:
+                    content, decode_info, mapped = decoded
+                    return self.extract_from_content(
+                        content, file_path, reference_resolver, decode_info,
+                        mapped.reference_document, mapped.submission_index
+                    )
+            logger.info(f"MD&A not located in raw bytes; decoding the whole file: {file_path}")
+
+        # Read file content
+        content = self.file_handler.read_file(file_path, source)
+        if not content:
+            log_error(f"Failed to read file: {file_path}")
+            return None
+
+        return self.extract_from_content(content, file_path, reference_resolver, self.file_handler.last_decode)
+
+    def _decode_mapped(
+            self,
+            data,
+            file_path: Path,
+            source: Optional[str] = None,
+            filing_class: type = MappedFiling
+    ) -> Optional[Tuple[str, DecodeInfo, MappedFiling]]:
+        """
+        Decode the header and a window around the MD&A of a mapped file.
+
+        Args:
+            data: Memory map (or FileBytes view) of the file
+            file_path: Path to the filing file
+            source: Archive the file was extracted from, for encoding caching
+            filing_class: MappedFiling, or StreamedFiling for windowed scanning
+
+        Returns:
+            Tuple of (decoded text, DecodeInfo, MappedFiling), or None if the
+            MD&A cannot be located on the bytes
+        """
+        started = time.perf_counter()
+
+        encoding, lossy = self.file_handler.detect_encoding(data, source)
+        if not MappedFiling.supports(encoding):
+            return None
+
+        mapped = filing_class(data, encoding, lossy)
+        filing = self._parse_filing_metadata(mapped.header(), file_path)
+        if not filing:
+            return None
+
+        content = mapped.mdna_document(filing.form_type)
+        if content is None:
+            return None
+
+        decode_info = DecodeInfo(
+            encoding=encoding,
+            decode_seconds=time.perf_counter() - started,
+            lossy=lossy,
+            window=mapped.window
+        )
+        window_start, window_end = mapped.window
+        logger.info(f"Decoded bytes {window_start:,}-{window_end:,} of {len(data):,} around the MD&A")
+        return content, decode_info, mapped
+
+    def extract_from_content(
+            self,
+            content: str,
+            file_path: Path,
+            reference_resolver=None,
+            decode_info: Optional[DecodeInfo] = None,
+            reference_document: Optional[Callable[[List], str]] = None,
+            submission_index: Optional[Callable[[], SubmissionIndex]] = None
+    ) -> Optional[ExtractionResult]:
+        """
+        Extract MD&A from already-decoded filing content.
+
+        Args:
+            content: Decoded filing text
+            file_path: Logical path of the filing (need not exist on disk,
+                e.g. ``archive.zip/member.txt``); used for metadata and logging
+            reference_resolver: Optional ReferenceResolver instance
+            decode_info: How content was decoded, recorded in the extraction metadata
+            reference_document: When content is only part of the filing, builds
+                the text that the found cross-references are resolved against
+            submission_index: When content is only part of the filing, builds the
+                index of its <DOCUMENT> blocks; otherwise content is indexed
+
+        Returns:
+            ExtractionResult or None if extraction failed
+        """
         self.error_count = 0
 
         try:
-            # Read file content
-            content = self.file_handler.read_file(file_path)
-            if not content:
-                log_error(f"Failed to read file: {file_path}")
-                return None
-
             # Parse filing metadata
             filing = self._parse_filing_metadata(content, file_path)
             if not filing:
                 log_error(f"Failed to parse metadata from: {file_path}")
                 return None
 
+            # Heading map shared by the section and cross-reference parsers
+            document_map = DocumentMap(content, self.section_parser.scanner)
+
             # Extract MD&A section
-            mdna_bounds = self.section_parser.find_mdna_section(content, filing.form_type)
+            mdna_bounds = self.section_parser.find_mdna_section(content, filing.form_type, document_map)
             if not mdna_bounds:
                 log_error(f"MD&A section not found in: {file_path}")
                 return None
@@ -80,9 +205,11 @@ class MDNAExtractor:
                 resolved_mdna = None
                 if reference_resolver:
                     try:
+                        documents = submission_index() if submission_index else SubmissionIndex.from_text(content)
                         resolved_mdna = reference_resolver.resolve_reference(
                             incorporation_ref,
-                            filing
+                            filing,
+                            documents
                         )
                     except Exception as e:
                         logger.error(f"Failed to resolve reference: {e}")
@@ -91,8 +218,8 @@ class MDNAExtractor:
                     logger.info(f"Successfully resolved MD&A from {incorporation_ref.document_type}")
 
                     # Process the resolved content
-                    normalized_text = self.normalizer.normalize_text(resolved_mdna, preserve_structure=True)
-                    tables = self.table_parser.identify_tables(normalized_text)
+                    normalized_text, line_flags = self.normalizer.normalize_with_line_flags(resolved_mdna)
+                    tables = self.table_parser.identify_tables(normalized_text, line_flags=line_flags)
                     final_text = self.table_parser.preserve_tables_in_text(normalized_text, tables)
 
                     # Create result with resolved content
@@ -113,7 +240,8 @@ class MDNAExtractor:
                                 "caption": incorporation_ref.caption,
                                 "page_reference": incorporation_ref.page_reference,
                                 "resolved": True
-                            }
+                            },
+                            **self._decode_metadata(decode_info)
                         }
                     )
 
@@ -127,10 +255,6 @@ class MDNAExtractor:
                     )
                     return None  # Don't save placeholder
 
-            # Continue with normal extraction...
-            mdna_text = content[start_pos:end_pos]
-            # ... rest of the method remains the same
-
             # Continue with normal extraction
             mdna_text = content[start_pos:end_pos]
 
@@ -142,11 +266,11 @@ class MDNAExtractor:
                 if self.error_count > MAX_ERRORS_PER_FILE:
                     return None
 
-            # Normalize text while preserving structure
-            normalized_text = self.normalizer.normalize_text(mdna_text, preserve_structure=True)
+            # Normalize text while preserving structure, keeping the line classification
+            normalized_text, line_flags = self.normalizer.normalize_with_line_flags(mdna_text)
 
             # Identify tables (but keep them in place)
-            tables = self.table_parser.identify_tables(normalized_text)
+            tables = self.table_parser.identify_tables(normalized_text, line_flags=line_flags)
             logger.info(f"Found {len(tables)} tables")
 
             # Preserve tables in their original positions
@@ -157,10 +281,15 @@ class MDNAExtractor:
 
             # Then, resolve them (using the full document for context)
             if cross_refs:
+                if reference_document is None:
+                    reference_text, reference_map = content, document_map
+                else:
+                    reference_text, reference_map = reference_document(cross_refs), None
                 cross_refs = self.cross_ref_parser.resolve_references(
                     cross_refs,
-                    content,
-                    self.normalizer
+                    reference_text,
+                    self.normalizer,
+                    document_map=reference_map
                 )
                 logger.info(f"Found {len(cross_refs)} cross-references")
             else:
@@ -178,7 +307,8 @@ class MDNAExtractor:
                     "word_count": validation["word_count"],
                     "table_count": len(tables),
                     "cross_ref_count": len(cross_refs),
-                    "warnings": validation["warnings"]
+                    "warnings": validation["warnings"],
+                    **self._decode_metadata(decode_info)
                 }
             )
 
@@ -191,6 +321,22 @@ class MDNAExtractor:
             log_error(f"Error processing {file_path}: {str(e)}")
             return None
 
+    @staticmethod
+    def _decode_metadata(decode_info: Optional[DecodeInfo]) -> Dict[str, any]:
+        """Encoding and decode time entries for the extraction metadata."""
+        if decode_info is None:
+            return {}
+        metadata = {
+            "encoding": decode_info.encoding,
+            "encoding_lossy": decode_info.lossy,
+            "decode_time_ms": round(decode_info.decode_seconds * 1000, 3)
+        }
+        if decode_info.window:
+            metadata["decoded_bytes"] = list(decode_info.window)
+        if decode_info.elided:
+            metadata["elided_bytes"] = sum(block.original_length for block in decode_info.elided)
+        return metadata
+
     def _parse_filing_metadata(self, content: str, file_path: Path) -> Optional[Filing]:
         """Parse filing metadata from document content."""
         try:
@@ -204,7 +350,7 @@ class MDNAExtractor:
 
             for pattern_str in cik_patterns:
                 pattern = re.compile(pattern_str, re.IGNORECASE | re.MULTILINE)
-                match = pattern.search(content[:10000])
+                match = pattern.search(content, 0, 10000)
                 if match:
                     cik = match.group(1).zfill(10)
                     break
@@ -229,7 +375,7 @@ class MDNAExtractor:
 
             for pattern_str in date_patterns:
                 pattern = re.compile(pattern_str, re.IGNORECASE | re.MULTILINE)
-                match = pattern.search(content[:10000])
+                match = pattern.search(content, 0, 10000)
                 if match:
                     date_str = match.group(1)
                     filing_date = self._parse_date(date_str)
@@ -243,15 +389,15 @@ class MDNAExtractor:
                     try:
                         filing_date = datetime.strptime(date_from_name.group(1), "%Y%m%d")
                     except:
-                        filing_date = datetime.fromtimestamp(file_path.stat().st_mtime)
+                        filing_date = self._file_timestamp(file_path)
                 else:
-                    filing_date = datetime.fromtimestamp(file_path.stat().st_mtime)
+                    filing_date = self._file_timestamp(file_path)
 
             # Extract form type - try multiple patterns
             form_type = "10-K"  # Default
 
             for pattern in self.patterns["form_type"]:
-                match = pattern.search(content[:10000])
+                match = pattern.search(content, 0, 10000)
                 if match:
                     form_type_raw = match.group(1).upper()
                     # Normalize form type
@@ -291,6 +437,12 @@ class MDNAExtractor:
             logger.error(f"Error parsing metadata: {e}")
             return None
 
+    def _file_timestamp(self, file_path: Path) -> datetime:
+        """Modification time of the filing, or now for logical (in-archive) paths."""
+        if file_path.exists():
+            return datetime.fromtimestamp(file_path.stat().st_mtime)
+        return datetime.now()
+
     def _parse_date(self, date_str: str) -> datetime:
         """Parse date string to datetime object."""
         # Try common date formats
@@ -324,8 +476,8 @@ class MDNAExtractor:
         form_type = result.filing.form_type.replace('/', '-')  # Replace / with - for filename
 
         # Build filename
-        filename = f"({cik})_({company_name})_({filing_date})_({form_type}).txt"
-        output_path = self.output_dir / filename
+        filename_stem = f"({cik})_({company_name})_({filing_date})_({form_type})"
+        output_path = self.output_dir / f"{filename_stem}.txt"
 
         # Prepare final content
         final_content = []
@@ -367,6 +519,13 @@ class MDNAExtractor:
         self.file_handler.write_file(output_path, output_text)
         logger.info(f"Saved MD&A to: {output_path}")
 
+        # The MD&A text is saved; a failed table export does not fail the filing
+        if self.table_exporter is not None:
+            try:
+                self.table_exporter.export(result, filename_stem)
+            except Exception as e:
+                log_error(f"Table export failed for {output_path.name}: {e}")
+
     def process_directory(self, input_dir: Path) -> Dict[str, any]:
         """
         Process all files in a directory.
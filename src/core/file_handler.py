@@ -1,27 +1,100 @@
 """File handling utilities for reading and writing files."""
 
+import codecs
+import mmap
+import os
+import time
 import chardet
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional, List
+from typing import BinaryIO, Dict, Iterator, Optional, List, Tuple
 from config.settings import (
     ENCODING_PREFERENCES,
+    ENCODING_SAMPLE_BYTES,
     MAX_FILE_SIZE_MB,
     CHUNK_SIZE
 )
+from src.core.sgml_reader import ElidedBlock, read_submission
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
 
 
+@dataclass
+class DecodeInfo:
+    """How a file's bytes were decoded."""
+    encoding: str
+    decode_seconds: float  # Time spent decoding, including any detection
+    lossy: bool = False  # Undecodable bytes were replaced with U+FFFD
+    window: Optional[Tuple[int, int]] = None  # Byte range decoded, when only part of the file was
+    elided: List[ElidedBlock] = field(default_factory=list)  # Binary payloads skipped before decoding
+
+
+class FileBytes:
+    """
+    Read-only bytes-like view of an open binary file.
+
+    Supports len(), indexing, slicing and bounded find/rfind, reading only
+    the bytes asked for, so a file of any size can stand in for an mmap
+    while only small ranges of it are in memory.
+    """
+
+    def __init__(self, file):
+        self._file = file
+        self._length = os.fstat(file.fileno()).st_size
+
+    def __len__(self) -> int:
+        return self._length
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._length)
+            if step != 1:
+                raise ValueError("FileBytes slices must be contiguous")
+            if stop <= start:
+                return b''
+            self._file.seek(start)
+            return self._file.read(stop - start)
+
+        if key < 0:
+            key += self._length
+        if not 0 <= key < self._length:
+            raise IndexError("FileBytes index out of range")
+        self._file.seek(key)
+        return self._file.read(1)[0]
+
+    def find(self, sub: bytes, start: int = 0, end: Optional[int] = None) -> int:
+        """Like bytes.find; reads the whole start:end range, so keep it short."""
+        start, end, _ = slice(start, end).indices(self._length)
+        found = self[start:end].find(sub)
+        return -1 if found == -1 else start + found
+
+    def rfind(self, sub: bytes, start: int = 0, end: Optional[int] = None) -> int:
+        """Like bytes.rfind; reads the whole start:end range, so keep it short."""
+        start, end, _ = slice(start, end).indices(self._length)
+        found = self[start:end].rfind(sub)
+        return -1 if found == -1 else start + found
+
+
 class FileHandler:
     """Handles file I/O operations with encoding detection."""
 
-    def read_file(self, file_path: Path) -> Optional[str]:
+    def __init__(self):
+        # Encoding detected for earlier files of the same source (e.g. ZIP archive)
+        self._source_encodings: Dict[str, str] = {}
+        self.last_decode: Optional[DecodeInfo] = None
+
+    def read_file(self, file_path: Path, source: Optional[str] = None) -> Optional[str]:
         """
         Read file content with automatic encoding detection.
 
+        The file is read once as bytes with read_stream.
+
         Args:
             file_path: Path to file
+            source: Key under which a detected encoding is cached (e.g. the ZIP
+                archive the file came from); None disables caching
 
         Returns:
             File content as string or None if failed
@@ -30,41 +103,189 @@ class FileHandler:
             logger.error(f"File not found: {file_path}")
             return None
 
-        # Check file size
+        # Check file size; larger files are only read in windows (see open_windowed)
         file_size_mb = file_path.stat().st_size / (1024 * 1024)
         if file_size_mb > MAX_FILE_SIZE_MB:
-            logger.error(f"File too large ({file_size_mb:.1f} MB): {file_path}")
+            logger.error(f"File too large to read whole ({file_size_mb:.1f} MB): {file_path}")
             return None
 
-        # Try preferred encodings first
-        for encoding in ENCODING_PREFERENCES:
-            try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    content = f.read()
-                logger.debug(f"Successfully read file with {encoding} encoding")
-                return content
-            except UnicodeDecodeError:
-                continue
-
-        # If preferred encodings fail, detect encoding
         try:
             with open(file_path, 'rb') as f:
-                raw_data = f.read()
-                result = chardet.detect(raw_data)
-                encoding = result['encoding']
-
-            if encoding:
-                logger.info(f"Detected encoding: {encoding}")
-                with open(file_path, 'r', encoding=encoding) as f:
-                    return f.read()
-            else:
-                logger.error(f"Could not detect encoding for: {file_path}")
-                return None
+                return self.read_stream(f, source)
+        except OSError as e:
+            logger.error(f"Error reading file {file_path}: {e}")
+            return None
 
+    def read_stream(self, stream: BinaryIO, source: Optional[str] = None) -> Optional[str]:
+        """
+        Read a submission from a binary stream and decode it.
+
+        Binary payloads (graphics, PDFs, ZIPs, spreadsheets and uuencoded
+        blocks) are skipped while reading and never decoded; the elided
+        blocks are kept in ``last_decode.elided`` to map offsets back to the
+        original file.
+
+        Args:
+            stream: Binary file object, e.g. an open file or ZIP member
+            source: Key under which a detected encoding is cached; None disables caching
+
+        Returns:
+            Decoded content or None if failed
+        """
+        raw_data, elided = read_submission(stream)
+        content = self.decode_bytes(raw_data, source)
+        if self.last_decode is not None:
+            self.last_decode.elided = elided
+        return content
+
+    def decode_bytes(self, raw_data: bytes, source: Optional[str] = None) -> Optional[str]:
+        """
+        Decode file content with automatic encoding detection.
+
+        UTF-8 is tried on the whole buffer first. Only if that fails is the
+        encoding detected, from a bounded sample around the first invalid
+        byte, and cached for later files of the same source. Text that is
+        UTF-8 apart from a few bad bytes stays UTF-8 with those bytes
+        replaced instead of being re-read as a single-byte encoding.
+        Line endings are translated as text-mode reads would. The encoding
+        and decode time are kept in ``last_decode``.
+
+        Args:
+            raw_data: Undecoded file content
+            source: Key under which a detected encoding is cached; None disables caching
+
+        Returns:
+            Decoded content or None if failed
+        """
+        started = time.perf_counter()
+        self.last_decode = None
+
+        try:
+            content, encoding, lossy = self._decode(raw_data, source)
         except Exception as e:
-            logger.error(f"Error reading file {file_path}: {e}")
+            logger.error(f"Error decoding content: {e}")
             return None
 
+        self.last_decode = DecodeInfo(
+            encoding=encoding,
+            decode_seconds=time.perf_counter() - started,
+            lossy=lossy
+        )
+        logger.debug(f"Decoded {len(raw_data):,} bytes as {encoding} in {self.last_decode.decode_seconds * 1000:.1f} ms")
+
+        # Match text-mode reads, which translate \r\n and \r to \n
+        return content.replace('\r\n', '\n').replace('\r', '\n')
+
+    @contextmanager
+    def map_file(self, file_path: Path) -> Iterator[mmap.mmap]:
+        """
+        Memory-map a file read-only.
+
+        Args:
+            file_path: Path to a non-empty file
+
+        Yields:
+            Read-only mmap of the file's bytes
+        """
+        with open(file_path, 'rb') as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+
+    @contextmanager
+    def open_windowed(self, file_path: Path) -> Iterator[FileBytes]:
+        """
+        Open a file for reading in bounded ranges.
+
+        Args:
+            file_path: Path to file
+
+        Yields:
+            FileBytes view of the file
+        """
+        with open(file_path, 'rb') as f:
+            yield FileBytes(f)
+
+    def detect_encoding(self, data, source: Optional[str] = None) -> Tuple[str, bool]:
+        """
+        Choose the encoding of a buffer without decoding all of it at once.
+
+        Applies the same rules as decode_bytes, validating CHUNK_SIZE bytes
+        at a time, so a memory-mapped file is never held as one string.
+
+        Args:
+            data: bytes, mmap or FileBytes of the file content
+            source: Key under which a detected encoding is cached; None disables caching
+
+        Returns:
+            Tuple of (encoding, lossy); lossy means invalid UTF-8 bytes must be replaced
+        """
+        error_pos = self._first_decode_error(data, 'utf-8')
+        if error_pos is None:
+            return 'utf-8', False
+        return self._fallback_encoding(data, error_pos, source)
+
+    def _decode(self, raw_data: bytes, source: Optional[str]) -> Tuple[str, str, bool]:
+        """Decode raw_data, returning (content, encoding, lossy)."""
+        try:
+            return raw_data.decode('utf-8'), 'utf-8', False
+        except UnicodeDecodeError as e:
+            encoding, lossy = self._fallback_encoding(raw_data, e.start, source)
+        return raw_data.decode(encoding, errors='replace' if lossy else 'strict'), encoding, lossy
+
+    def _fallback_encoding(self, data, error_pos: int, source: Optional[str]) -> Tuple[str, bool]:
+        """Encoding for data that is not valid UTF-8, given the first invalid byte."""
+        cached = self._source_encodings.get(source) if source else None
+        if cached and self._first_decode_error(data, cached) is None:
+            return cached, False
+
+        half = ENCODING_SAMPLE_BYTES // 2
+        sample = data[max(0, error_pos - half):error_pos + half]
+
+        if self._looks_like_utf8(sample):
+            logger.warning("Replacing invalid bytes in UTF-8 content")
+            return 'utf-8', True
+
+        candidates = [e for e in ENCODING_PREFERENCES if e != 'utf-8']
+        detected = chardet.detect(sample)['encoding']
+        if detected:
+            try:
+                detected = codecs.lookup(detected).name
+                candidates.insert(0, detected)
+            except LookupError:
+                logger.debug(f"Ignoring unknown detected encoding: {detected}")
+
+        for encoding in candidates:
+            if self._first_decode_error(data, encoding) is not None:
+                continue
+            logger.info(f"Detected encoding: {encoding}")
+            if source:
+                self._source_encodings[source] = encoding
+            return encoding, False
+
+        logger.warning("No candidate encoding fits; replacing invalid UTF-8 bytes")
+        return 'utf-8', True
+
+    @staticmethod
+    def _first_decode_error(data, encoding: str) -> Optional[int]:
+        """Offset of the first byte that does not decode, checking CHUNK_SIZE bytes at a time."""
+        decoder = codecs.getincrementaldecoder(encoding)()
+        for offset in range(0, len(data), CHUNK_SIZE):
+            chunk = data[offset:offset + CHUNK_SIZE]
+            try:
+                decoder.decode(chunk, final=offset + CHUNK_SIZE >= len(data))
+            except UnicodeDecodeError as e:
+                # e.object is the chunk plus any bytes held over from the previous one
+                return max(0, offset + e.start - (len(e.object) - len(chunk)))
+        return None
+
+    @staticmethod
+    def _looks_like_utf8(sample: bytes) -> bool:
+        """Whether valid multi-byte UTF-8 characters outnumber invalid bytes in sample."""
+        decoded = sample.decode('utf-8', errors='replace')
+        invalid = decoded.count('\ufffd')
+        multibyte = len(decoded) - len(decoded.encode('ascii', 'ignore')) - invalid
+        return multibyte > invalid
+
     def read_file_chunked(self, file_path: Path) -> Optional[str]:
         """
         Read large file in chunks.
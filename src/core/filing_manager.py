@@ -94,6 +94,34 @@ class FilingManager:
 
         return cik, year, form_type
 
+    def _parse_header_metadata(self, header: str) -> Tuple[Optional[str], Optional[int], Optional[str]]:
+        """
+        Parse CIK, year, and form type from an EDGAR SGML header.
+
+        Args:
+            header: Leading text of a full-submission file
+
+        Returns:
+            Tuple of (cik, year, form_type); unknown fields are None
+        """
+        cik_match = re.search(r'CENTRAL\s+INDEX\s+KEY:\s*(\d{1,10})', header, re.IGNORECASE)
+        cik = cik_match.group(1).zfill(10) if cik_match else None
+
+        date_match = re.search(r'FILED\s+AS\s+OF\s+DATE:\s*((?:199|20[0-2])\d)\d{4}', header, re.IGNORECASE)
+        year = int(date_match.group(1)) if date_match else None
+
+        form_type = None
+        type_match = re.search(r'CONFORMED\s+SUBMISSION\s+TYPE:\s*(\S+)', header, re.IGNORECASE)
+        if type_match:
+            submission_type = type_match.group(1).upper()
+            amended = submission_type.endswith('/A')
+            if submission_type.startswith('10-Q'):
+                form_type = "10-Q/A" if amended else "10-Q"
+            elif submission_type.startswith('10-K'):
+                form_type = "10-K/A" if amended else "10-K"
+
+        return cik, year, form_type
+
     def _select_filings_to_process(self) -> Dict[str, List[Path]]:
         """
         Select which filings to process based on prioritization rules.
@@ -0,0 +1,246 @@
+"""Memory-mapped filings that are decoded only where text is needed."""
+
+import re
+from typing import Iterator, List, Optional, Tuple
+from config.settings import (
+    MMAP_HEADER_BYTES,
+    MMAP_WINDOW_MARGIN_BYTES,
+    MMAP_REFERENCE_RANGE_BYTES,
+    MMAP_UNBOUNDED_MDNA_BYTES,
+    STREAM_WINDOW_BYTES,
+    STREAM_WINDOW_OVERLAP_BYTES
+)
+from src.parsers.byte_heading_locator import (
+    ByteHeading,
+    scan_byte_headings,
+    locate_mdna_bytes,
+    reference_byte_ranges
+)
+from src.parsers.submission_index import SGML_TAG_BYTES_PATTERN, SubmissionIndex, build_documents
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# Separator between decoded ranges; blank lines keep them separate paragraphs
+RANGE_SEPARATOR = "\n\n"
+
+# Section titles looked up per 'section' cross-reference
+MAX_TITLE_MATCHES = 3
+
+
+class MappedFiling:
+    """
+    A filing held as raw bytes (usually a memory map) and decoded piecemeal.
+
+    Headings are located with bytes regexes. Only the header, a window
+    around the MD&A and the ranges that cross-references point to are
+    decoded, so a large submission is never held as one string.
+    """
+
+    def __init__(self, data, encoding: str, lossy: bool = False):
+        """
+        Args:
+            data: bytes or mmap of the filing
+            encoding: ASCII-compatible encoding of data
+            lossy: Replace undecodable bytes instead of failing
+        """
+        self.data = data
+        self.encoding = encoding
+        self.errors = 'replace' if lossy else 'strict'
+        self._headings: Optional[List[ByteHeading]] = None
+        self._submission_index: Optional[SubmissionIndex] = None
+        self.window: Optional[Tuple[int, int]] = None
+
+    @staticmethod
+    def supports(encoding: str) -> bool:
+        """Whether headings can be located on bytes in this encoding."""
+        try:
+            return 'ITEM 7\n'.encode(encoding) == b'ITEM 7\n'
+        except (LookupError, UnicodeEncodeError):
+            return False
+
+    @property
+    def headings(self) -> List[ByteHeading]:
+        if self._headings is None:
+            self._headings = []
+            for window, pos, stop, offset in self._scan_windows():
+                self._headings.extend(scan_byte_headings(window, pos, stop, offset))
+        return self._headings
+
+    def submission_index(self) -> SubmissionIndex:
+        """Index of the submission's <DOCUMENT> blocks; their text is decoded on request."""
+        if self._submission_index is None:
+            tags = []
+            for window, pos, stop, offset in self._scan_windows():
+                for match in SGML_TAG_BYTES_PATTERN.finditer(window, pos):
+                    if stop is not None and match.start() >= stop:
+                        break
+                    tags.append((
+                        match.group('tag').decode('ascii'),
+                        match.group('value').decode('latin-1'),
+                        offset + match.start(),
+                        offset + match.end()
+                    ))
+            self._submission_index = SubmissionIndex(build_documents(tags, len(self.data)), self.decode)
+        return self._submission_index
+
+    def _scan_windows(self) -> Iterator[Tuple[bytes, int, Optional[int], int]]:
+        """
+        Buffers to run line-anchored bytes patterns over.
+
+        Yields:
+            (buffer, scan start, stop before, offset of buffer in the file);
+            a match belongs to the buffer if it starts before the stop
+        """
+        yield self.data, 0, None, 0
+
+    def decode(self, start: int, end: int) -> str:
+        """Decode a byte range, translating line endings as text-mode reads do."""
+        # A range cut inside a line may also cut a multi-byte character
+        errors = self.errors if self._is_line_boundary(end) else 'replace'
+        text = self.data[start:end].decode(self.encoding, errors)
+        return text.replace('\r\n', '\n').replace('\r', '\n')
+
+    def header(self) -> str:
+        """Decoded leading bytes, enough for the SEC header."""
+        return self.decode(0, self._snap_end(0, MMAP_HEADER_BYTES))
+
+    def mdna_document(self, form_type: str) -> Optional[str]:
+        """
+        Header plus a window around the MD&A, decoded.
+
+        The window runs from MMAP_WINDOW_MARGIN_BYTES before the located
+        MD&A heading to the same margin past its end heading, snapped to
+        line boundaries, so the text-level parser still sees the heading in
+        context. The decoded byte range is kept in ``window``.
+
+        Args:
+            form_type: Form type of the filing
+
+        Returns:
+            Decoded text, or None if no MD&A heading was found in the bytes
+        """
+        located = locate_mdna_bytes(self.headings, form_type, len(self.data), MMAP_UNBOUNDED_MDNA_BYTES)
+        if not located:
+            return None
+
+        # Margins shrink to the nearest line boundary, never growing into a long line
+        start = self._snap_start(located[0] - MMAP_WINDOW_MARGIN_BYTES, located[0])
+        end = self._snap_end(located[1], located[1] + MMAP_WINDOW_MARGIN_BYTES)
+        header_end = self._snap_end(0, MMAP_HEADER_BYTES)
+
+        if start <= header_end:
+            self.window = (0, end)
+            return self.decode(0, end)
+
+        self.window = (start, end)
+        return self.decode(0, header_end) + RANGE_SEPARATOR + self.decode(start, end)
+
+    def reference_document(self, references: List) -> str:
+        """
+        Decoded text for resolving cross-references.
+
+        Covers the MD&A window plus the Item, Note and exhibit index
+        sections and titled sections the references point to, each at most
+        MMAP_REFERENCE_RANGE_BYTES long, in document order.
+
+        Args:
+            references: CrossReference objects found in the MD&A
+
+        Returns:
+            Decoded ranges joined by blank lines
+        """
+        targets = {(ref.reference_type, ref.target_id) for ref in references}
+        ranges = reference_byte_ranges(self.headings, targets, len(self.data), MMAP_REFERENCE_RANGE_BYTES)
+        if self.window:
+            ranges.append(self.window)
+        for kind, title in targets:
+            if kind == 'section':
+                ranges.extend(self._title_ranges(title))
+
+        merged: List[List[int]] = []
+        for start, end in sorted(ranges):
+            if merged and start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], end)
+            else:
+                merged.append([start, end])
+
+        return RANGE_SEPARATOR.join(self.decode(start, end) for start, end in merged)
+
+    def _title_ranges(self, title: str) -> List[Tuple[int, int]]:
+        """Ranges after the first lines that start with a section title."""
+        encoded = title.encode(self.encoding, errors='ignore').strip()
+        if not encoded:
+            return []
+        pattern = re.compile(rb'^[^\S\n]*' + re.escape(encoded), re.IGNORECASE | re.MULTILINE)
+
+        ranges = []
+        for window, pos, stop, offset in self._scan_windows():
+            for match in pattern.finditer(window, pos):
+                if stop is not None and match.start() >= stop:
+                    break
+                start = offset + match.start()
+                ranges.append((start, min(len(self.data), start + MMAP_REFERENCE_RANGE_BYTES)))
+                if len(ranges) == MAX_TITLE_MATCHES:
+                    return ranges
+        return ranges
+
+    def _is_line_boundary(self, pos: int) -> bool:
+        return pos <= 0 or pos >= len(self.data) or self.data[pos - 1] == 0x0A
+
+    def _snap_start(self, pos: int, limit: int) -> int:
+        """First line start at or after pos, but no later than limit."""
+        if pos <= 0:
+            return 0
+        newline = self.data.find(b'\n', pos - 1, limit)
+        return limit if newline == -1 else newline + 1
+
+    def _snap_end(self, limit: int, pos: int) -> int:
+        """Last line start at or before pos, but no earlier than limit (pos itself if none)."""
+        if pos >= len(self.data):
+            return len(self.data)
+        newline = self.data.rfind(b'\n', limit, pos)
+        return pos if newline == -1 else newline + 1
+
+
+class StreamedFiling(MappedFiling):
+    """
+    A filing too large to map or read whole, scanned in overlapping windows.
+
+    ``data`` is a FileBytes view, so only one window of
+    STREAM_WINDOW_BYTES plus the decoded ranges are in memory at a time.
+    Each window overlaps the next by STREAM_WINDOW_OVERLAP_BYTES, which
+    is longer than any heading line, and a match is kept only by the
+    window it starts in.
+    """
+
+    def __init__(self, data, encoding: str, lossy: bool = False,
+                 window_bytes: int = STREAM_WINDOW_BYTES,
+                 overlap_bytes: int = STREAM_WINDOW_OVERLAP_BYTES):
+        """
+        Args:
+            data: FileBytes (or any sliceable bytes-like object) of the filing
+            encoding: ASCII-compatible encoding of data
+            lossy: Replace undecodable bytes instead of failing
+            window_bytes: Bytes read per scanning window
+            overlap_bytes: Bytes shared by consecutive windows
+        """
+        if not 0 < overlap_bytes < window_bytes:
+            raise ValueError("Window overlap must be positive and smaller than the window")
+        super().__init__(data, encoding, lossy)
+        self.window_bytes = window_bytes
+        self.overlap_bytes = overlap_bytes
+
+    def _scan_windows(self) -> Iterator[Tuple[bytes, int, Optional[int], int]]:
+        length = len(self.data)
+        step = self.window_bytes - self.overlap_bytes
+        for offset in range(0, max(length, 1), step):
+            # One byte of lookbehind so a line-anchored match at the window start
+            # requires a real newline before it
+            read_from = max(0, offset - 1)
+            window = self.data[read_from:offset + self.window_bytes]
+            pos = offset - read_from
+            last = offset + self.window_bytes >= length
+            yield window, pos, None if last else pos + step, read_from
+            if last:
+                return
@@ -1,55 +1,118 @@
 """Resolver for incorporation by reference documents."""
 
 import re
+import sys
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Optional, Dict, Tuple
+from config.settings import REFERENCE_CACHE_MB
+from src.core.accession_index import AccessionIndex, DocumentLocation, document_type_key
+from src.parsers.submission_index import SubmissionIndex
 from src.utils.logger import get_logger
+from src.utils.lru_cache import ByteBudgetLRU
 
 logger = get_logger(__name__)
 
+# Common section headers in proxy statements and exhibits
+MAJOR_SECTION_PATTERNS = [
+    re.compile(r'(?:^|\n)\s*[A-Z][A-Z\s]{10,}\s*(?:\n|$)', re.MULTILINE),  # All caps headers
+    re.compile(r'(?:^|\n)\s*(?:ITEM|PROPOSAL|ARTICLE)\s+\d+', re.MULTILINE),
+    re.compile(r'(?:^|\n)\s*(?:Appendix|Exhibit|Schedule)\s+[A-Z0-9]', re.MULTILINE),
+]
+
+# Referenced document type -> <TYPE> prefixes of the matching document in the same submission
+SUBMISSION_DOCUMENT_TYPES = {
+    "DEF 14A": ("DEF 14A",),
+    "Proxy Statement": ("DEF 14A",),
+    "Exhibit 13": ("EX-13",),
+    "Annual Report": ("EX-13",),
+    "Exhibit 99": ("EX-99",),
+}
+
+
+@dataclass
+class CachedDocument:
+    """A decoded referenced document and the section spans already located in it."""
+    text: str
+    # (caption, page reference) -> (start, end) of the section, or None if not found
+    spans: Dict[Tuple[Optional[str], Optional[str]], Optional[Tuple[int, int]]] = field(default_factory=dict)
+
 
 class ReferenceResolver:
     """Resolves MD&A content from referenced documents."""
 
-    def __init__(self, filing_directory: Path):
+    def __init__(
+            self,
+            filing_directory: Path,
+            accession_index: Optional[AccessionIndex] = None,
+            cache_mb: float = REFERENCE_CACHE_MB
+    ):
+        """
+        Args:
+            filing_directory: Directory holding the filings and their referenced documents
+            accession_index: Prebuilt index of filing_directory; built on first use if omitted
+            cache_mb: Budget for decoded referenced documents kept between filings
+        """
         self.filing_directory = filing_directory
-
-    def resolve_reference(self, incorporation_ref, original_filing) -> Optional[str]:
+        self._accession_index = accession_index
+        # Keyed by DocumentLocation.cache_key(), so a changed file is decoded again
+        self.document_cache = ByteBudgetLRU(int(cache_mb * 1024 * 1024))
+
+    @property
+    def accession_index(self) -> AccessionIndex:
+        """Accession-number index of filing_directory, including ZIP members."""
+        if self._accession_index is None:
+            self._accession_index = AccessionIndex.build(self.filing_directory)
+        return self._accession_index
+
+    def resolve_reference(
+            self,
+            incorporation_ref,
+            original_filing,
+            submission_index: Optional[SubmissionIndex] = None
+    ) -> Optional[str]:
         """
         Attempt to resolve MD&A content from referenced document.
 
+        The referenced document is looked up among the other documents of
+        the same submission first, then in the accession-number index of
+        the filing directory.
+
         Args:
             incorporation_ref: IncorporationByReference object
             original_filing: Original Filing object
+            submission_index: <DOCUMENT> index of the filing's own submission
 
         Returns:
             Extracted MD&A text or None
         """
+        if submission_index is not None:
+            document = self._find_in_submission(submission_index, incorporation_ref.document_type)
+            if document is not None:
+                logger.info(f"Found {document.doc_type} in the submission ({document.filename or 'no filename'})")
+                return self._extract_from_text(submission_index.text(document), incorporation_ref)
+
         # Extract accession number from original filing
         accession_number = self._extract_accession_number(original_filing.file_path)
         if not accession_number:
             logger.warning("Could not extract accession number from filing")
             return None
 
-        # Determine referenced document type and pattern
-        ref_doc_pattern = self._get_reference_document_pattern(
-            incorporation_ref.document_type,
-            accession_number
-        )
-
-        if not ref_doc_pattern:
+        # Determine referenced document type
+        doc_type = document_type_key(incorporation_ref.document_type)
+        if not doc_type:
             logger.warning(f"Unknown reference document type: {incorporation_ref.document_type}")
             return None
 
-        # Search for referenced document
-        referenced_file = self._find_referenced_document(ref_doc_pattern)
-        if not referenced_file:
-            logger.warning(f"Could not find referenced document matching: {ref_doc_pattern}")
+        # Look up referenced document
+        location = self.accession_index.lookup(accession_number, doc_type)
+        if not location:
+            logger.warning(f"Could not find {doc_type} for accession {accession_number}")
             return None
 
         # Extract content from referenced document
         extracted_content = self._extract_from_referenced_document(
-            referenced_file,
+            location,
             incorporation_ref
         )
 
@@ -72,78 +135,67 @@ class ReferenceResolver:
 
         return None
 
-    def _get_reference_document_pattern(self, doc_type: str, accession_number: str) -> Optional[List[str]]:
-        """Get search pattern for referenced document."""
+    @staticmethod
+    def _find_in_submission(submission_index: SubmissionIndex, doc_type: Optional[str]):
+        """Find the referenced document among the submission's own documents."""
         if not doc_type:
             return None
-
-        # Remove dashes from accession number for filename matching
-        acc_no_dashes = accession_number.replace('-', '')
-
-        patterns = {
-            "DEF 14A": [
-                f"*{acc_no_dashes}*def14a*.txt",
-                f"*{acc_no_dashes}*proxy*.txt",
-                f"*{accession_number}*def14a*.txt",
-            ],
-            "Exhibit 13": [
-                f"*{acc_no_dashes}*ex13*.txt",
-                f"*{acc_no_dashes}*ex-13*.txt",
-                f"*{accession_number}*ex13*.txt",
-            ],
-            "Exhibit 99": [
-                f"*{acc_no_dashes}*ex99*.txt",
-                f"*{acc_no_dashes}*ex-99*.txt",
-                f"*{accession_number}*ex99*.txt",
-            ],
-        }
-
-        # Check for specific exhibit patterns
-        for key, patterns_list in patterns.items():
+        for key, type_prefixes in SUBMISSION_DOCUMENT_TYPES.items():
             if key.lower() in doc_type.lower():
-                return patterns_list
-
-        return None
-
-    def _find_referenced_document(self, patterns: List[str]) -> Optional[Path]:
-        """Find referenced document in filing directory."""
-        for pattern in patterns:
-            matches = list(self.filing_directory.glob(pattern))
-            if matches:
-                return matches[0]  # Return first match
-
+                return submission_index.find(type_prefixes)
         return None
 
     def _extract_from_referenced_document(
             self,
-            file_path: Path,
+            location: DocumentLocation,
             incorporation_ref
     ) -> Optional[str]:
-        """Extract MD&A content from referenced document."""
-        try:
-            with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
+        """
+        Extract MD&A content from referenced document.
 
-            # If specific caption provided, search for it
-            if incorporation_ref.caption:
-                mdna_start = self._find_caption_in_text(content, incorporation_ref.caption)
-                if mdna_start is not None:
-                    # Extract reasonable chunk after caption
-                    mdna_end = self._find_next_major_section(content, mdna_start)
-                    return content[mdna_start:mdna_end]
+        The decoded document and the spans located in it are cached, so a
+        document referenced by several filings is read and searched once.
+        """
+        try:
+            key = location.cache_key()
+            document = self.document_cache.get(key)
+            if document is None:
+                document = CachedDocument(location.read_text())
+                self.document_cache.put(key, document, sys.getsizeof(document.text))
 
-            # If page reference provided, try to extract by page markers
-            if incorporation_ref.page_reference:
-                return self._extract_by_page_reference(content, incorporation_ref.page_reference)
+            span_key = (incorporation_ref.caption, incorporation_ref.page_reference)
+            if span_key not in document.spans:
+                document.spans[span_key] = self._section_span(document.text, incorporation_ref)
 
-            # Fallback: try to find MD&A section in referenced document
-            mdna_section = self._find_mdna_in_document(content)
-            return mdna_section
+            span = document.spans[span_key]
+            return document.text[span[0]:span[1]] if span else None
 
         except Exception as e:
-            logger.error(f"Error reading referenced document {file_path}: {e}")
+            logger.error(f"Error reading referenced document {location.path} {location.member or ''}: {e}")
             return None
 
+    def _extract_from_text(self, content: str, incorporation_ref) -> Optional[str]:
+        """Extract MD&A content from the text of a referenced document."""
+        span = self._section_span(content, incorporation_ref)
+        return content[span[0]:span[1]] if span else None
+
+    def _section_span(self, content: str, incorporation_ref) -> Optional[Tuple[int, int]]:
+        """Locate the referenced MD&A in a document's text."""
+        # If specific caption provided, search for it
+        if incorporation_ref.caption:
+            mdna_start = self._find_caption_in_text(content, incorporation_ref.caption)
+            if mdna_start is not None:
+                # Extract reasonable chunk after caption
+                mdna_end = self._find_next_major_section(content, mdna_start)
+                return mdna_start, mdna_end
+
+        # If page reference provided, try to extract by page markers
+        if incorporation_ref.page_reference:
+            return self._page_reference_span(content, incorporation_ref.page_reference)
+
+        # Fallback: try to find MD&A section in referenced document
+        return self._mdna_span(content)
+
     def _find_caption_in_text(self, text: str, caption: str) -> Optional[int]:
         """Find caption in text and return start position."""
         # Create pattern from caption
@@ -172,25 +224,19 @@ class ReferenceResolver:
 
     def _find_next_major_section(self, text: str, start_pos: int) -> int:
         """Find the next major section after start_pos."""
-        search_text = text[start_pos:]
-
-        # Common section headers in proxy statements and exhibits
-        section_patterns = [
-            r'(?:^|\n)\s*[A-Z][A-Z\s]{10,}\s*(?:\n|$)',  # All caps headers
-            r'(?:^|\n)\s*(?:ITEM|PROPOSAL|ARTICLE)\s+\d+',
-            r'(?:^|\n)\s*(?:Appendix|Exhibit|Schedule)\s+[A-Z0-9]',
-        ]
+        # Max 50k chars; nothing past the cap can change the result
+        end_pos = min(len(text), start_pos + 50000)
 
-        min_pos = len(search_text)
-        for pattern in section_patterns:
-            match = re.search(pattern, search_text, re.MULTILINE)
-            if match and match.start() > 500:  # Ensure we get some content
+        min_pos = end_pos
+        for pattern in MAJOR_SECTION_PATTERNS:
+            match = pattern.search(text, start_pos, end_pos)
+            if match and match.start() - start_pos > 500:  # Ensure we get some content
                 min_pos = min(min_pos, match.start())
 
-        return start_pos + min(min_pos, 50000)  # Max 50k chars
+        return min_pos
 
-    def _extract_by_page_reference(self, text: str, page_ref: str) -> Optional[str]:
-        """Extract content based on page references."""
+    def _page_reference_span(self, text: str, page_ref: str) -> Optional[Tuple[int, int]]:
+        """Locate content based on page references."""
         # This is challenging without proper page markers
         # Look for page numbers in text
         page_pattern = re.compile(
@@ -203,11 +249,11 @@ class ReferenceResolver:
             start = match.end()
             # Extract up to next page marker or section
             end = self._find_next_major_section(text, start)
-            return text[start:end]
+            return start, end
 
         return None
 
-    def _find_mdna_in_document(self, text: str) -> Optional[str]:
+    def _mdna_span(self, text: str) -> Optional[Tuple[int, int]]:
         """Fallback: try to find MD&A section in any document."""
         mdna_patterns = [
             r"(?:^|\n)\s*Management['']?s?\s+Discussion\s+and\s+Analysis",
@@ -220,6 +266,6 @@ class ReferenceResolver:
             if match:
                 start = match.start()
                 end = self._find_next_major_section(text, start)
-                return text[start:end]
+                return start, end
 
         return None
\ No newline at end of file
@@ -0,0 +1,133 @@
+"""Streaming reader for EDGAR full-submission files that elides binary payloads."""
+
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import BinaryIO, List, Tuple
+from config.settings import SGML_BINARY_TYPES
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# First line of a uuencoded block: "begin <mode> <filename>"
+UUENCODE_BEGIN_PATTERN = re.compile(rb'begin [0-7]{3,4} ')
+
+BINARY_TYPES = frozenset(t.upper().encode('ascii') for t in SGML_BINARY_TYPES)
+
+
+@dataclass
+class ElidedBlock:
+    """A run of binary payload bytes replaced by a placeholder line."""
+    offset: int  # Offset of the placeholder in the compacted bytes
+    placeholder_length: int  # Bytes of the placeholder line
+    original_offset: int  # Offset of the elided bytes in the original file
+    original_length: int  # Bytes elided
+    kind: str  # Document <TYPE>, or 'uuencode'
+
+
+def _placeholder(kind: str, length: int, original_offset: int) -> bytes:
+    return f"[{length} BYTES OF {kind} ELIDED AT {original_offset}]\n".encode('ascii')
+
+
+def read_submission(stream: BinaryIO) -> Tuple[bytes, List[ElidedBlock]]:
+    """
+    Read a submission line by line, replacing binary payloads with placeholders.
+
+    The text of <DOCUMENT> blocks whose <TYPE> is one of SGML_BINARY_TYPES,
+    and any ``begin 644`` uuencoded block elsewhere, is skipped without
+    being kept or decoded. Each skipped run becomes one placeholder line
+    naming its original offset and length; the SGML tags around it are
+    kept, so document boundaries stay intact.
+
+    Args:
+        stream: Binary file object positioned at the start of the submission
+
+    Returns:
+        Tuple of (compacted bytes, elided blocks in order)
+    """
+    parts: List[bytes] = []
+    blocks: List[ElidedBlock] = []
+    written = 0
+    original = 0
+
+    binary_document = False
+    skipping = None  # None, or the kind of payload being skipped
+    skip_start = 0
+
+    def close_skip():
+        placeholder = _placeholder(skipping, original - skip_start, skip_start)
+        blocks.append(ElidedBlock(written, len(placeholder), skip_start, original - skip_start, skipping))
+        parts.append(placeholder)
+        return len(placeholder)
+
+    for line in stream:
+        if skipping is not None:
+            if line[:2] == b'</':
+                tag = line.strip().upper()
+                if tag in (b'</TEXT>', b'</DOCUMENT>'):
+                    written += close_skip()
+                    skipping = None
+            elif skipping == 'uuencode' and line.rstrip() == b'end':
+                original += len(line)
+                written += close_skip()
+                skipping = None
+                continue
+
+            if skipping is not None:
+                original += len(line)
+                continue
+
+        elif line[:1] == b'<':
+            tag = line[:10].upper()
+            if tag.startswith(b'<DOCUMENT>'):
+                binary_document = False
+            elif tag.startswith(b'<TYPE>'):
+                doc_type = line[6:].strip().split(b' ')[0].upper()
+                binary_document = doc_type in BINARY_TYPES
+            elif tag.startswith(b'<TEXT>') and binary_document:
+                parts.append(line)
+                written += len(line)
+                original += len(line)
+                skipping = doc_type.decode('ascii', errors='replace')
+                skip_start = original
+                continue
+
+        elif line[:6] == b'begin ' and UUENCODE_BEGIN_PATTERN.match(line):
+            skipping = 'uuencode'
+            skip_start = original
+            original += len(line)
+            continue
+
+        parts.append(line)
+        written += len(line)
+        original += len(line)
+
+    if skipping is not None:
+        written += close_skip()
+
+    if blocks:
+        elided = sum(block.original_length for block in blocks)
+        logger.debug(f"Elided {elided:,} bytes of binary payload in {len(blocks)} blocks")
+    return b''.join(parts), blocks
+
+
+def original_offset(blocks: List[ElidedBlock], offset: int) -> int:
+    """
+    Map an offset in compacted bytes back to the original file.
+
+    Args:
+        blocks: Elided blocks returned by read_submission
+        offset: Byte offset in the compacted bytes
+
+    Returns:
+        Byte offset in the original file; offsets inside a placeholder map
+        to the start of the bytes it replaced
+    """
+    i = bisect_right([block.offset for block in blocks], offset) - 1
+    if i < 0:
+        return offset
+    block = blocks[i]
+    if offset < block.offset + block.placeholder_length:
+        return block.original_offset
+    shift = block.original_offset + block.original_length - (block.offset + block.placeholder_length)
+    return offset + shift
@@ -0,0 +1,191 @@
+"""Export of detected MD&A tables as typed Parquet or Feather datasets."""
+
+import importlib.util
+from pathlib import Path
+from typing import List, Optional
+import numpy as np
+import pandas as pd
+from config.settings import TABLE_DASH_AS_ZERO, TABLE_EXPORT_DIRNAME
+from src.models.filing import ExtractionResult
+from src.parsers.table_parser import Table
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+EXPORT_FORMATS = ("parquet", "feather")
+
+# Cell text of a nil amount: hyphens and en/em dashes (TextNormalizer turns an em dash into '--')
+DASH_PATTERN = '[-\u2013\u2014]+'
+# Whitespace around '$' and parentheses, which only lays out an amount ('$ (1,234)')
+SYMBOL_SPACING_PATTERN = r'\s*([$()])\s*'
+# Characters that only format an amount
+NUMBER_FORMATTING_PATTERN = r'[$,]'
+# Amount in parentheses: a negative number
+PARENTHESES_PATTERN = r'^\((.*)\)$'
+# What is left of an amount once formatting, sign parentheses and '%' are removed
+NUMBER_PATTERN = r'-?(?:\d+(?:\.\d*)?|\.\d+)'
+# Bare fiscal year, as in a column heading; not an amount
+YEAR_PATTERN = r'(?:19|20)\d{2}'
+
+CELL_COLUMNS = ["cik", "filing_date", "form_type", "table_index", "table_title", "table_type",
+                "row", "column", "header", "row_label", "column_header", "text", "value", "percent"]
+
+
+def export_available() -> bool:
+    """Whether pyarrow, which pandas writes Parquet and Feather with, is installed."""
+    return importlib.util.find_spec("pyarrow") is not None
+
+
+def parse_numbers(text: pd.Series) -> pd.DataFrame:
+    """
+    Numeric value of every cell, parsed with whole-column string operations.
+
+    '$' and ',' are dropped, as are spaces next to '$' and parentheses,
+    '(1,234)' is -1234, '12.0%' is 12.0 with percent set, and a cell of
+    dashes is 0 (or NaN when TABLE_DASH_AS_ZERO is off). Any other text,
+    including numbers separated by spaces ('2023 2022'), is NaN.
+
+    Args:
+        text: Cell strings
+
+    Returns:
+        DataFrame with float 'value' and bool 'percent' columns, indexed like text
+    """
+    cleaned = text.astype(str).str.strip().str.replace(SYMBOL_SPACING_PATTERN, r'\1', regex=True)
+    cleaned = cleaned.str.replace(NUMBER_FORMATTING_PATTERN, '', regex=True)
+    dash = cleaned.str.fullmatch(DASH_PATTERN)
+
+    percent = cleaned.str.endswith('%')
+    cleaned = cleaned.str.replace('%$', '', regex=True)
+
+    negative = cleaned.str.match(PARENTHESES_PATTERN)
+    cleaned = cleaned.str.replace(PARENTHESES_PATTERN, r'\1', regex=True)
+
+    # Only text that is a plain number is converted; to_numeric would also take 'inf' or '1e5'
+    numeric = cleaned.str.fullmatch(NUMBER_PATTERN)
+    value = pd.to_numeric(cleaned.where(numeric), errors='coerce').astype('float64')
+    value = value.where(~negative, -value)
+    value = value.mask(dash, 0.0 if TABLE_DASH_AS_ZERO else np.nan)
+
+    return pd.DataFrame({"value": value, "percent": percent & value.notna()}, index=text.index)
+
+
+def table_cells(tables: List[Table]) -> pd.DataFrame:
+    """
+    One row per cell of the tables, with its parsed value.
+
+    The header of a table is the rows before its first row with an amount
+    (a numeric cell other than a bare year) outside the label column; each cell also carries its row label
+    (first column) and the header text of its column, so amounts can be
+    selected without re-reading the table layout.
+
+    Args:
+        tables: Detected tables, in document order
+
+    Returns:
+        DataFrame with the table_index, table_title, table_type, row,
+        column, header, row_label, column_header, text, value and percent
+        columns of CELL_COLUMNS
+    """
+    records = [
+        (table_index, table.title, table.table_type, row, column, cells[0] if cells else '', text)
+        for table_index, table in enumerate(tables)
+        for row, cells in enumerate(table.content)
+        for column, text in enumerate(cells)
+    ]
+    cells = pd.DataFrame.from_records(
+        records, columns=["table_index", "table_title", "table_type", "row", "column", "row_label", "text"]
+    ).astype({"table_index": "int32", "table_title": "string", "table_type": "string", "row": "int32",
+              "column": "int32", "row_label": "string", "text": "string"})
+    cells = pd.concat([cells, parse_numbers(cells["text"])], axis=1)
+
+    # Header rows: before the first row with an amount outside the label column
+    amount = (cells["column"] > 0) & cells["value"].notna() & ~cells["text"].str.fullmatch(YEAR_PATTERN)
+    amount_rows = cells["row"].where(amount)
+    first_amount_row = amount_rows.groupby(cells["table_index"]).transform('min')
+    cells["header"] = cells["row"] < first_amount_row.fillna(np.inf)
+
+    header_text = cells.loc[cells["header"] & (cells["text"] != '')]
+    column_headers = header_text.groupby(["table_index", "column"])["text"].agg(' '.join).rename("column_header")
+    cells = cells.join(column_headers, on=["table_index", "column"])
+    cells["column_header"] = cells["column_header"].fillna('').astype("string")
+
+    return cells
+
+
+def table_frame(table: Table) -> pd.DataFrame:
+    """
+    One table as a DataFrame with typed columns.
+
+    Columns are named by their header text (or column_<n>) and hold floats
+    when every non-empty body cell parses as a number, text otherwise.
+
+    Args:
+        table: Detected table
+
+    Returns:
+        DataFrame of the table's body rows
+    """
+    cells = table_cells([table])
+    body = cells.loc[~cells["header"]]
+    frame = pd.DataFrame(index=pd.Index(body["row"].unique(), name="row"))
+
+    for column, group in body.groupby("column", sort=True):
+        header = group["column_header"].iloc[0] or f"column_{column}"
+        if header in frame.columns:
+            header = f"{header}_{column}"
+        filled = group["text"] != ''
+        numeric = filled.any() and group.loc[filled, "value"].notna().all()
+        frame[header] = (group["value"] if numeric else group["text"]).set_axis(group["row"])
+
+    return frame.reset_index(drop=True)
+
+
+class TableExporter:
+    """Writes the tables of each extraction as one typed Parquet or Feather file."""
+
+    def __init__(self, output_dir: Path, export_format: str = "parquet"):
+        """
+        Args:
+            output_dir: Extraction output directory; files go to its
+                TABLE_EXPORT_DIRNAME subdirectory
+            export_format: 'parquet' or 'feather'
+        """
+        if export_format not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown table export format {export_format!r}; expected one of {EXPORT_FORMATS}")
+        self.export_dir = Path(output_dir) / TABLE_EXPORT_DIRNAME
+        self.export_format = export_format
+
+    def export(self, result: ExtractionResult, filename_stem: str) -> Optional[Path]:
+        """
+        Write the cells of an extraction's tables, keyed by CIK, filing date and table index.
+
+        One file per filing keeps pool workers from sharing a writer; the
+        directory reads back as one dataset (pd.read_parquet on it, or
+        pyarrow.dataset for either format).
+
+        Args:
+            result: Extraction whose tables are written
+            filename_stem: Name of the file without extension, matching the MD&A text output
+
+        Returns:
+            Path of the written file, or None if the extraction has no tables
+        """
+        if not result.tables:
+            return None
+
+        cells = table_cells(result.tables)
+        cells.insert(0, "cik", result.filing.cik)
+        cells.insert(1, "filing_date", pd.Timestamp(result.filing.filing_date).normalize())
+        cells.insert(2, "form_type", result.filing.form_type)
+        cells = cells[CELL_COLUMNS].astype({"cik": "string", "form_type": "string"})
+
+        self.export_dir.mkdir(parents=True, exist_ok=True)
+        path = self.export_dir / f"{filename_stem}.{self.export_format}"
+        if self.export_format == "parquet":
+            cells.to_parquet(path, index=False)
+        else:
+            cells.to_feather(path)
+
+        logger.info(f"Exported {len(result.tables)} tables ({len(cells)} cells) to: {path}")
+        return path
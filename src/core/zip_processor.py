@@ -1,26 +1,204 @@
 """ZIP archive processor for handling compressed SEC filings with 10-Q fallback logic."""
 
+import logging
 import zipfile
 import tempfile
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
-from typing import List, Dict
+from typing import List, Dict, Iterable, Optional, Tuple
 
+from src.core.accession_index import AccessionIndex
 from src.core.extractor import MDNAExtractor
-from src.core.file_handler import FileHandler
 from src.core.filing_manager import FilingManager
-from src.utils.logger import get_logger, log_error
-from config.settings import VALID_EXTENSIONS, ZIP_EXTENSIONS
+from src.utils import pattern_profiler
+from src.utils.lru_cache import merge_stats
+from src.utils.logger import get_logger, log_error, setup_logging
+from config.settings import VALID_EXTENSIONS, ZIP_EXTENSIONS, ZIP_MEMBER_SPILL_MB, SGML_HEADER_PREFIX_BYTES
 
 logger = get_logger(__name__)
 
+# Per-process state for pool workers, populated by _init_worker
+_worker_processor: Optional["ZipProcessor"] = None
+_worker_resolver = None
+
+
+def _init_worker(output_dir: str, input_dir: str, resolve_references: bool, log_level: int,
+                 profile_patterns: bool = False, accession_index: Optional[AccessionIndex] = None,
+                 table_export_format: Optional[str] = None):
+    """
+    Initialize a pool worker with its own processor, extractor and reference resolver.
+
+    Args:
+        output_dir: Output directory the worker writes its results to
+        input_dir: Input directory used for reference resolution
+        resolve_references: Whether to attempt resolving incorporation by reference
+        log_level: Root log level of the parent process
+        profile_patterns: Whether to collect per-pattern profiling counters
+        accession_index: Index of input_dir built once by the parent process
+        table_export_format: Format the worker exports tables in, or None
+    """
+    global _worker_processor, _worker_resolver
+
+    setup_logging(verbose=log_level <= logging.DEBUG)
+
+    if profile_patterns:
+        # Before the processor is built, so its scanner holds the instrumented patterns
+        pattern_profiler.enable()
+        pattern_profiler.reset()
+
+    _worker_processor = ZipProcessor(Path(output_dir), table_export_format=table_export_format)
+    _worker_resolver = None
+    if resolve_references:
+        from src.core.reference_resolver import ReferenceResolver
+        _worker_resolver = ReferenceResolver(Path(input_dir), accession_index)
+
+
+def _extract_in_worker(file_path: Path, zip_source: Optional[Tuple[Path, str]] = None) -> Dict[str, any]:
+    """
+    Extract a single filing inside a pool worker.
+
+    Outputs are written by the worker itself; only a compact outcome
+    record is sent back to the parent process.
+
+    Args:
+        file_path: Path (or logical in-archive path) of the filing
+        zip_source: (zip_path, member_name) when the filing lives in a ZIP archive
+
+    Returns:
+        Dictionary with 'file', 'success' and 'error' keys, plus
+        'pattern_profile' counters when pattern profiling is enabled and
+        'reference_cache' counters when references are resolved
+    """
+    try:
+        result = _worker_processor.extract_filing(file_path, zip_source, _worker_resolver)
+        outcome = {"file": str(file_path), "success": result is not None, "error": None}
+    except Exception as e:
+        outcome = {"file": str(file_path), "success": False, "error": str(e)}
+
+    if pattern_profiler.is_enabled():
+        outcome["pattern_profile"] = pattern_profiler.drain()
+    if _worker_resolver is not None:
+        outcome["reference_cache"] = _worker_resolver.document_cache.drain_stats()
+    return outcome
+
 
 class ZipProcessor:
     """Handles processing of ZIP archives containing SEC filings."""
 
-    def __init__(self, output_dir: Path):
+    def __init__(self, output_dir: Path, spill_threshold_mb: float = ZIP_MEMBER_SPILL_MB,
+                 table_export_format: Optional[str] = None):
         self.output_dir = Path(output_dir)
-        self.extractor = MDNAExtractor(output_dir)
-        self.file_handler = FileHandler()
+        self.table_export_format = table_export_format
+        self.extractor = MDNAExtractor(output_dir, table_export_format)
+        # Shared with the extractor so detected encodings are cached across both read paths
+        self.file_handler = self.extractor.file_handler
+        self.spill_threshold_bytes = int(spill_threshold_mb * 1024 * 1024)
+        self._archives: Dict[Path, zipfile.ZipFile] = {}
+
+    def extract_filing(
+            self,
+            file_path: Path,
+            zip_source: Optional[Tuple[Path, str]] = None,
+            reference_resolver=None
+    ):
+        """
+        Extract a loose filing or a ZIP member.
+
+        Args:
+            file_path: Path of a loose file, or logical path of a ZIP member
+            zip_source: (zip_path, member_name) when the filing lives in a ZIP archive
+            reference_resolver: Optional ReferenceResolver instance
+
+        Returns:
+            ExtractionResult or None if extraction failed
+        """
+        if zip_source is None:
+            return self.extractor.extract_from_file(file_path, reference_resolver)
+
+        zip_path, member = zip_source
+        return self._extract_member(self._open_archive(zip_path), member, file_path, reference_resolver)
+
+    def _extract_member(
+            self,
+            zf: zipfile.ZipFile,
+            member: str,
+            logical_path: Path,
+            reference_resolver=None
+    ):
+        """
+        Extract MD&A from a ZIP member without writing it to disk.
+
+        The member is decompressed straight into memory and decoded there.
+        Only members larger than the spill threshold are spooled to a scratch
+        directory, which is removed as soon as the member is processed.
+
+        Args:
+            zf: Open ZIP archive
+            member: Member name inside the archive
+            logical_path: Path used for metadata and logging (archive path / member)
+            reference_resolver: Optional ReferenceResolver instance
+
+        Returns:
+            ExtractionResult or None if extraction failed
+        """
+        info = zf.getinfo(member)
+
+        if info.file_size > self.spill_threshold_bytes:
+            logger.info(f"Spooling large member to disk ({info.file_size / (1024 * 1024):.1f} MB): {logical_path}")
+            with tempfile.TemporaryDirectory() as temp_dir:
+                spilled = Path(zf.extract(info, temp_dir))
+                return self.extractor.extract_from_file(spilled, reference_resolver, zf.filename)
+
+        logger.info(f"Processing file: {logical_path}")
+        with zf.open(info) as fh:
+            content = self.file_handler.read_stream(fh, zf.filename)
+
+        if not content:
+            log_error(f"Failed to read file: {logical_path}")
+            return None
+
+        return self.extractor.extract_from_content(
+            content, logical_path, reference_resolver, self.file_handler.last_decode
+        )
+
+    def _read_header_prefix(self, file_path: Path, zip_source: Optional[Tuple[Path, str]] = None) -> str:
+        """
+        Read the leading SGML header bytes of a filing without reading the rest.
+
+        Args:
+            file_path: Path of a loose file, or logical path of a ZIP member
+            zip_source: (zip_path, member_name) when the filing lives in a ZIP archive
+
+        Returns:
+            Header prefix decoded as latin-1, or an empty string on failure
+        """
+        try:
+            if zip_source is None:
+                with open(file_path, 'rb') as fh:
+                    prefix = fh.read(SGML_HEADER_PREFIX_BYTES)
+            else:
+                zip_path, member = zip_source
+                with self._open_archive(zip_path).open(member) as fh:
+                    prefix = fh.read(SGML_HEADER_PREFIX_BYTES)
+        except Exception as e:
+            logger.warning(f"Could not read header of {file_path}: {e}")
+            return ""
+
+        return prefix.decode('latin-1')
+
+    def _open_archive(self, zip_path: Path) -> zipfile.ZipFile:
+        """Return an open handle for zip_path, reusing it across members."""
+        zf = self._archives.get(zip_path)
+        if zf is None:
+            zf = zipfile.ZipFile(zip_path, 'r')
+            self._archives[zip_path] = zf
+        return zf
+
+    def close_archives(self):
+        """Close all archive handles opened by extract_filing."""
+        for zf in self._archives.values():
+            zf.close()
+        self._archives.clear()
 
     def process_zip_file(self, zip_path: Path) -> Dict[str, any]:
         """
@@ -50,22 +228,19 @@ class ZipProcessor:
                 stats["total_files"] = len(text_files)
                 logger.info(f"Found {len(text_files)} text files in archive")
 
-                with tempfile.TemporaryDirectory() as temp_dir:
-                    temp_path = Path(temp_dir)
-                    for file_name in text_files:
-                        try:
-                            zf.extract(file_name, temp_path)
-                            file_path = temp_path / file_name
-                            result = self.extractor.extract_from_file(file_path)
-                            if result:
-                                stats["processed"] += 1
-                            else:
-                                stats["failed"] += 1
-                                stats["errors"].append({"file": file_name, "error": "Extraction failed"})
-                        except Exception as e:
+                for file_name in text_files:
+                    try:
+                        logical_path = zip_path / file_name
+                        result = self._extract_member(zf, file_name, logical_path)
+                        if result:
+                            stats["processed"] += 1
+                        else:
                             stats["failed"] += 1
-                            stats["errors"].append({"file": file_name, "error": str(e)})
-                            log_error(f"Error processing {file_name} from {zip_path}: {e}")
+                            stats["errors"].append({"file": file_name, "error": "Extraction failed"})
+                    except Exception as e:
+                        stats["failed"] += 1
+                        stats["errors"].append({"file": file_name, "error": str(e)})
+                        log_error(f"Error processing {file_name} from {zip_path}: {e}")
         except zipfile.BadZipFile:
             log_error(f"Invalid ZIP file: {zip_path}")
             stats["errors"].append({"file": str(zip_path), "error": "Invalid ZIP file"})
@@ -113,7 +288,8 @@ class ZipProcessor:
     def process_mixed_directory(
             self,
             input_dir: Path,
-            resolve_references: bool = True
+            resolve_references: bool = True,
+            workers: int = 1
     ) -> Dict[str, any]:
         """
         Process directory containing both ZIP files and loose text files,
@@ -122,6 +298,7 @@ class ZipProcessor:
         Args:
             input_dir: Input directory
             resolve_references: Whether to attempt resolving incorporation by reference
+            workers: Number of worker processes (1 processes serially)
 
         Returns:
             Combined processing statistics
@@ -133,80 +310,180 @@ class ZipProcessor:
             "errors": []
         }
 
-        # 1) Discover all text files (from ZIPs and loose)
-        zip_text_files: List[Path] = []
-        for zip_path in {*input_dir.glob("*.zip"), *input_dir.glob("*.ZIP")}:
-            try:
-                with zipfile.ZipFile(zip_path, 'r') as zf:
-                    for member in zf.namelist():
-                        if any(member.endswith(ext) for ext in VALID_EXTENSIONS):
-                            tmp = tempfile.mkdtemp()
-                            zf.extract(member, tmp)
-                            zip_text_files.append(Path(tmp) / member)
-            except Exception as e:
-                log_error(f"Error listing {zip_path}: {e}")
-
-        loose_files: List[Path] = []
-        for ext in VALID_EXTENSIONS:
-            loose_files.extend(input_dir.glob(f"*{ext}"))
-
-        # ─── Dedupe any duplicates (e.g. .txt vs .TXT) ───
-        zip_text_files = list(dict.fromkeys(zip_text_files))
-        loose_files = list(dict.fromkeys(loose_files))
-
-        stats["zip_results"]["total_files"] = len(zip_text_files)
-        stats["text_results"]["total_files"] = len(loose_files)
-
-        all_text_files = zip_text_files + loose_files
-        stats["combined"]["total_files"] = len(all_text_files)
-
-        # 2) Register with FilingManager
-        fm = FilingManager()
-        for fp in all_text_files:
-            cik, year, form_type = fm._parse_filename_metadata(fp)
-            if cik and year and form_type:
-                fm.add_filing(fp, cik, year, form_type)
-
-        # 3) Select which to process and skip
-        selection = fm._select_filings_to_process()
-        to_process = set(selection["process"])
-        to_skip = set(selection["skip"])
-
-        # Initialize reference resolver if requested
-        reference_resolver = None
-        if resolve_references:
-            from src.core.reference_resolver import ReferenceResolver
-            reference_resolver = ReferenceResolver(input_dir)
-
-        # 4) Process only selected filings
-        for fp in to_process:
-            try:
-                result = self.extractor.extract_from_file(fp, reference_resolver)
-                if result:
-                    stats["combined"]["processed"] += 1
-                    if fp in zip_text_files:
-                        stats["zip_results"]["processed"] += 1
-                    else:
-                        stats["text_results"]["processed"] += 1
-                else:
-                    stats["combined"]["failed"] += 1
-                    stats["errors"].append(str(fp))
-                    if fp in zip_text_files:
-                        stats["zip_results"]["failed"] += 1
-                    else:
-                        stats["text_results"]["failed"] += 1
-            except Exception as e:
-                stats["combined"]["failed"] += 1
-                stats["errors"].append(f"{fp}: {e}")
-                if fp in zip_text_files:
-                    stats["zip_results"]["failed"] += 1
-                else:
-                    stats["text_results"]["failed"] += 1
+        try:
+            # 1) Plan: catalog ZIP members from each archive's central directory.
+            #    Nothing is decompressed here; members are read when processed.
+            zip_text_files: List[Path] = []
+            zip_sources: Dict[Path, Tuple[Path, str]] = {}
+            for zip_path in {*input_dir.glob("*.zip"), *input_dir.glob("*.ZIP")}:
+                try:
+                    zf = self._open_archive(zip_path)
+                    for info in zf.infolist():
+                        if not info.is_dir() and any(info.filename.endswith(ext) for ext in VALID_EXTENSIONS):
+                            logical_path = zip_path / info.filename
+                            zip_text_files.append(logical_path)
+                            zip_sources[logical_path] = (zip_path, info.filename)
+                except Exception as e:
+                    log_error(f"Error listing {zip_path}: {e}")
+
+            loose_files: List[Path] = []
+            for ext in VALID_EXTENSIONS:
+                loose_files.extend(input_dir.glob(f"*{ext}"))
+
+            # ─── Dedupe any duplicates (e.g. .txt vs .TXT) ───
+            zip_text_files = list(dict.fromkeys(zip_text_files))
+            loose_files = list(dict.fromkeys(loose_files))
+
+            stats["zip_results"]["total_files"] = len(zip_text_files)
+            stats["text_results"]["total_files"] = len(loose_files)
+
+            all_text_files = zip_text_files + loose_files
+            stats["combined"]["total_files"] = len(all_text_files)
+
+            # 2) Register with FilingManager, probing the SGML header only
+            #    when the filename does not identify the filing
+            fm = FilingManager()
+            form_types: Dict[Path, str] = {}
+            header_probes = 0
+            for fp in all_text_files:
+                cik, year, form_type = fm._parse_filename_metadata(fp)
+                if not (cik and year and form_type):
+                    header_probes += 1
+                    header = self._read_header_prefix(fp, zip_sources.get(fp))
+                    h_cik, h_year, h_form_type = fm._parse_header_metadata(header)
+                    cik, year, form_type = h_cik or cik, h_year or year, h_form_type or form_type
+                if cik and year and form_type:
+                    fm.add_filing(fp, cik, year, form_type)
+                    form_types[fp] = form_type
+
+            # 3) Select which to process and skip
+            selection = fm._select_filings_to_process()
+            to_process = set(selection["process"])
+            to_skip = set(selection["skip"])
+
+            selected_members = sum(1 for fp in to_process if fp in zip_sources)
+            stats["plan"] = {
+                "zip_members": len(zip_text_files),
+                "zip_members_selected": selected_members,
+                "header_probes": header_probes
+            }
+            logger.info(
+                f"Planned {len(zip_text_files)} ZIP members: {selected_members} selected for "
+                f"decompression, {header_probes} header probes"
+            )
+
+            # 4) Process only selected filings; referenced documents are
+            #    indexed once, covering loose files and ZIP members
+            accession_index = AccessionIndex.build(input_dir) if resolve_references else None
+            if workers > 1 and len(to_process) > 1:
+                # Workers open their own archive handles
+                self.close_archives()
+                self._process_in_pool(
+                    to_process, zip_sources, stats, input_dir, resolve_references, workers, accession_index
+                )
+            else:
+                # Initialize reference resolver if requested
+                reference_resolver = None
+                if resolve_references:
+                    from src.core.reference_resolver import ReferenceResolver
+                    reference_resolver = ReferenceResolver(input_dir, accession_index)
+
+                for fp in to_process:
+                    try:
+                        result = self.extract_filing(fp, zip_sources.get(fp), reference_resolver)
+                        self._record_outcome(stats, fp, fp in zip_sources, result is not None)
+                    except Exception as e:
+                        self._record_outcome(stats, fp, fp in zip_sources, False, str(e))
+
+                if reference_resolver is not None:
+                    stats["reference_cache"] = reference_resolver.document_cache.drain_stats()
+        finally:
+            self.close_archives()
 
         # 5) Count skipped 10-Qs
         for fp in to_skip:
-            _, _, ft = fm._parse_filename_metadata(fp)
+            ft = form_types.get(fp)
             if ft and ft.startswith("10-Q"):
                 stats["combined"]["skipped_10q"] += 1
 
         return stats
+
+    def _process_in_pool(
+            self,
+            to_process: Iterable[Path],
+            zip_sources: Dict[Path, Tuple[Path, str]],
+            stats: Dict[str, any],
+            input_dir: Path,
+            resolve_references: bool,
+            workers: int,
+            accession_index: Optional[AccessionIndex] = None
+    ):
+        """
+        Extract the selected filings in a process pool and merge the outcomes.
+
+        Args:
+            to_process: Filings selected by FilingManager
+            zip_sources: (zip_path, member_name) for filings that live in ZIP archives
+            stats: Combined statistics to update in place
+            input_dir: Input directory (for reference resolution)
+            resolve_references: Whether workers resolve incorporation by reference
+            workers: Number of worker processes
+            accession_index: Index of input_dir shared with the workers
+        """
+        logger.info(f"Processing {len(to_process)} filings with {workers} worker processes")
+
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                initializer=_init_worker,
+                initargs=(str(self.output_dir), str(input_dir), resolve_references,
+                          logging.getLogger().level, pattern_profiler.is_enabled(), accession_index,
+                          self.table_export_format)
+        ) as executor:
+            futures = {
+                executor.submit(_extract_in_worker, fp, zip_sources.get(fp)): fp
+                for fp in to_process
+            }
+
+            for future in as_completed(futures):
+                fp = futures[future]
+                try:
+                    outcome = future.result()
+                except Exception as e:
+                    # Worker died (e.g. BrokenProcessPool); count the filing as failed
+                    log_error(f"Worker failed on {fp}: {e}")
+                    self._record_outcome(stats, fp, fp in zip_sources, False, str(e))
+                    continue
+
+                self._record_outcome(stats, fp, fp in zip_sources, outcome["success"], outcome["error"])
+                if "pattern_profile" in outcome:
+                    pattern_profiler.merge(outcome["pattern_profile"])
+                if "reference_cache" in outcome:
+                    merge_stats(stats.setdefault("reference_cache", {}), outcome["reference_cache"])
+
+    def _record_outcome(
+            self,
+            stats: Dict[str, any],
+            file_path: Path,
+            from_zip: bool,
+            success: bool,
+            error: Optional[str] = None
+    ):
+        """
+        Merge a single filing outcome into the combined statistics.
+
+        Args:
+            stats: Combined statistics to update in place
+            file_path: Filing that was processed
+            from_zip: Whether the filing came from a ZIP archive
+            success: Whether extraction produced a result
+            error: Exception message, if extraction raised
+        """
+        bucket = stats["zip_results"] if from_zip else stats["text_results"]
+
+        if success:
+            stats["combined"]["processed"] += 1
+            bucket["processed"] += 1
+        else:
+            stats["combined"]["failed"] += 1
+            bucket["failed"] += 1
+            stats["errors"].append(f"{file_path}: {error}" if error else str(file_path))
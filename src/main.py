@@ -6,6 +6,8 @@ from pathlib import Path
 
 from src.core.zip_processor import ZipProcessor
 from src.core.extractor import MDNAExtractor
+from src.core.table_exporter import EXPORT_FORMATS, export_available
+from src.utils import pattern_profiler
 from src.utils.logger import setup_logging, get_logger, log_summary
 from config.settings import INPUT_DIR, OUTPUT_DIR
 
@@ -50,8 +52,36 @@ def main():
         help="Process only text files"
     )
 
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Number of worker processes for mixed processing (default: 1)"
+    )
+
+    parser.add_argument(
+        "--profile-patterns",
+        type=Path,
+        metavar="PATH",
+        help="Record per-pattern call counts, time and hits, and write a JSON report to PATH"
+    )
+
+    parser.add_argument(
+        "--export-tables",
+        choices=EXPORT_FORMATS,
+        metavar="FORMAT",
+        help="Also write each filing's tables, with parsed numeric values, to OUTPUT/tables "
+             "as parquet or feather files (requires pyarrow)"
+    )
+
     args = parser.parse_args()
 
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    if args.export_tables and not export_available():
+        parser.error("--export-tables requires pyarrow (pip install pyarrow)")
+
     # Set up logging
     setup_logging(verbose=args.verbose)
 
@@ -66,12 +96,16 @@ def main():
     logger.info(f"Input directory: {args.input}")
     logger.info(f"Output directory: {args.output}")
 
+    if args.profile_patterns:
+        # Must precede processor creation so every parser sees the instrumented patterns
+        pattern_profiler.enable()
+
     try:
         # Initialize stats container
         stats = {}
 
         if args.zip_only:
-            processor = ZipProcessor(args.output)
+            processor = ZipProcessor(args.output, table_export_format=args.export_tables)
             zipped = processor.process_directory(args.input)
             # Normalize to unified stats format
             stats = {
@@ -85,7 +119,7 @@ def main():
             }
 
         elif args.text_only:
-            extractor = MDNAExtractor(args.output)
+            extractor = MDNAExtractor(args.output, args.export_tables)
             txt = extractor.process_directory(args.input)
             stats = {
                 "combined": {
@@ -98,13 +132,16 @@ def main():
             }
 
         else:
-            processor = ZipProcessor(args.output)
+            processor = ZipProcessor(args.output, table_export_format=args.export_tables)
             # Mixed processing with 10-Q fallback logic
-            stats = processor.process_mixed_directory(args.input)
+            stats = processor.process_mixed_directory(args.input, workers=args.workers)
 
         # Log summary
         log_summary(stats)
 
+        if args.profile_patterns:
+            pattern_profiler.write_report(args.profile_patterns)
+
         # Log skipped 10-Q fallback count
         skipped = stats.get("combined", {}).get("skipped_10q", 0)
         if skipped:
@@ -0,0 +1,199 @@
+"""Heading location on undecoded filing bytes (e.g. a memory-mapped file)."""
+
+import re
+from bisect import bisect_right
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+# Line-leading heading keywords. Works for any ASCII-compatible encoding.
+BYTE_HEADING_PATTERN = re.compile(
+    rb'^[^\S\n]*(?P<keyword>ITEM|PART|NOTE|SIGNATURES|EXHIBIT\s+INDEX|MANAGEMENT)(?P<tail>[^\n]{0,200})',
+    re.IGNORECASE | re.MULTILINE
+)
+
+BYTE_LABEL_PATTERN = re.compile(rb'\s*(?P<label>\d+[A-Z]?|[IVX]+[A-Z]?)\b', re.IGNORECASE)
+
+# Words that mark an ITEM (or bare MANAGEMENT'S ...) line as the MD&A heading
+BYTE_MDNA_WORDS = re.compile(rb'DISCUSSION|MD\s*&\s*A', re.IGNORECASE)
+
+# A heading line ending in a page number or dot leaders is a table-of-contents entry
+BYTE_TOC_ENTRY_TAIL = re.compile(rb'(?:\.{3,}|\s(?:\d{1,3}|[A-Z]-\d{1,3}))\s*$')
+# Most bytes between a table-of-contents entry line and an ITEM/PART line right
+# after it (a page-number line at most)
+BYTE_TOC_ENTRY_GAP = 16
+
+# Start item label and (keyword, label) end headings of the MD&A, per form family
+MDNA_BYTE_BOUNDARIES: Dict[str, Tuple[str, FrozenSet[Tuple[str, str]]]] = {
+    "10-K": ("7", frozenset({("ITEM", "7A"), ("ITEM", "8")})),
+    "10-Q": ("2", frozenset({("ITEM", "3"), ("ITEM", "4"), ("PART", "II")})),
+}
+
+# Headings that close a cross-reference target section, as the resolvers in
+# CrossReferenceParser find them: keyword -> first character class of the label
+# (None: no label needed)
+ITEM_RANGE_END_HEADINGS = {"ITEM": "0123456789", "PART": "IVX", "SIGNATURES": None}
+NOTE_RANGE_END_HEADINGS = {"NOTE": "0123456789", "ITEM": "0123456789", "SIGNATURES": None}
+INDEX_RANGE_END_HEADINGS = {"SIGNATURES": None}
+
+
+@dataclass
+class ByteHeading:
+    """A line-leading heading keyword found in the raw bytes."""
+    keyword: str  # 'ITEM', 'PART', 'NOTE', 'SIGNATURES', 'EXHIBIT INDEX', 'MANAGEMENT'
+    label: Optional[str]  # Item number, Part numeral or Note number
+    start: int  # Byte offset of the start of the heading line
+    end: int  # Byte offset of the end of the heading line
+    page_entry: bool  # The line ends in a page number or dot leaders, as in a table of contents
+    is_mdna: bool  # The line names the MD&A
+
+
+def scan_byte_headings(data, pos: int = 0, stop: Optional[int] = None, offset: int = 0) -> List[ByteHeading]:
+    """
+    Find every heading line in a bytes-like buffer.
+
+    Args:
+        data: bytes or mmap of an ASCII-compatible encoded filing
+        pos: Scan start; a heading must follow a newline unless pos is 0
+        stop: Only headings starting before this position are returned
+        offset: Added to every position, when data is a window of a larger file
+
+    Returns:
+        Headings in document order
+    """
+    headings = []
+    for match in BYTE_HEADING_PATTERN.finditer(data, pos):
+        if stop is not None and match.start() >= stop:
+            break
+        keyword = b' '.join(match.group('keyword').upper().split()).decode('ascii')
+        tail = match.group('tail')
+
+        label = None
+        if keyword in ('ITEM', 'PART', 'NOTE'):
+            label_match = BYTE_LABEL_PATTERN.match(tail)
+            if label_match:
+                label = label_match.group('label').upper().decode('ascii')
+
+        headings.append(ByteHeading(
+            keyword=keyword,
+            label=label,
+            start=offset + match.start(),
+            end=offset + match.end(),
+            page_entry=BYTE_TOC_ENTRY_TAIL.search(tail) is not None,
+            is_mdna=BYTE_MDNA_WORDS.search(tail) is not None
+        ))
+    return headings
+
+
+def _is_toc_entry(headings: List[ByteHeading], i: int) -> bool:
+    """Whether a heading line is a table-of-contents entry rather than a section heading."""
+    heading = headings[i]
+    if heading.page_entry or i + 1 == len(headings):
+        return heading.page_entry
+    following = headings[i + 1]
+    return following.keyword in ('ITEM', 'PART') and following.start - heading.end <= BYTE_TOC_ENTRY_GAP
+
+
+def locate_mdna_bytes(headings: List[ByteHeading], form_type: str,
+                      data_length: int, unbounded_max_bytes: int) -> Optional[Tuple[int, int]]:
+    """
+    Byte range of the MD&A body.
+
+    Candidates are chosen as SectionParser chooses its start match: headings
+    outside the table of contents first, Item-labelled headings before bare
+    MANAGEMENT'S DISCUSSION ones, then the first in the document. Each is
+    paired with the next end heading for the form. A bare heading with no
+    end heading after it (e.g. in an annual report exhibit) ranks last and
+    spans at most unbounded_max_bytes.
+
+    Args:
+        headings: Output of scan_byte_headings
+        form_type: Form type of the filing
+        data_length: Length of the buffer in bytes
+        unbounded_max_bytes: Longest span taken after a bare heading with no end heading
+
+    Returns:
+        (start, end) byte offsets, or None if there is no MD&A heading
+    """
+    family = "10-Q" if "10-Q" in form_type else "10-K"
+    start_label, end_headings = MDNA_BYTE_BOUNDARIES[family]
+
+    ends = [h.start for h in headings if (h.keyword, h.label) in end_headings]
+
+    best = None
+    for i, heading in enumerate(headings):
+        is_item = heading.keyword == 'ITEM' and heading.label == start_label
+        if not heading.is_mdna or not (is_item or heading.keyword == 'MANAGEMENT'):
+            continue
+
+        j = bisect_right(ends, heading.start)
+        bounded = j < len(ends)
+        if bounded:
+            end = ends[j]
+        else:
+            end = data_length if is_item else min(heading.start + unbounded_max_bytes, data_length)
+
+        rank = (_is_toc_entry(headings, i), not is_item and not bounded, not is_item, heading.start)
+        if best is None or rank < best[0]:
+            best = (rank, (heading.start, end))
+    return best[1] if best else None
+
+
+def _is_end_heading(heading: ByteHeading, end_headings: Dict[str, Optional[str]]) -> bool:
+    if heading.keyword not in end_headings:
+        return False
+    label_start = end_headings[heading.keyword]
+    return label_start is None or (heading.label is not None and heading.label[0] in label_start)
+
+
+def _section_ranges(headings: List[ByteHeading], selected: List[int], end_headings: Dict[str, Optional[str]],
+                    data_length: int, max_bytes: int) -> List[Tuple[int, int]]:
+    """
+    Ranges from each selected heading through the heading line that ends it.
+
+    The closing heading is included so a resolver that searches the decoded
+    range stops at the same place it would in the full document.
+    """
+    ranges = []
+    for i in selected:
+        end = min(headings[i].start + max_bytes, data_length)
+        for j in range(i + 1, len(headings)):
+            if headings[j].start >= end:
+                break
+            if _is_end_heading(headings[j], end_headings):
+                end = headings[j].end
+                break
+        ranges.append((headings[i].start, end))
+    return ranges
+
+
+def reference_byte_ranges(headings: List[ByteHeading], targets: Set[Tuple[str, str]],
+                          data_length: int, max_bytes: int) -> List[Tuple[int, int]]:
+    """
+    Byte ranges that cross-reference targets can resolve against.
+
+    Args:
+        headings: Output of scan_byte_headings
+        targets: (reference_type, target_id) pairs of type 'item', 'note' or 'exhibit'
+        data_length: Length of the buffer in bytes
+        max_bytes: Longest range taken for one target
+
+    Returns:
+        (start, end) byte ranges, unsorted and possibly overlapping
+    """
+    items = {target.upper() for kind, target in targets if kind == 'item'}
+    notes = {target.upper() for kind, target in targets if kind == 'note'}
+    wants_exhibits = any(kind == 'exhibit' for kind, _ in targets)
+
+    # Over-inclusion is harmless: 'Item 1' lookups can also match 'Item 1A' headings
+    item_headings = [
+        i for i, h in enumerate(headings)
+        if h.keyword == 'ITEM' and h.label and any(h.label.startswith(item) for item in items)
+    ]
+    note_headings = [i for i, h in enumerate(headings) if h.keyword == 'NOTE' and h.label in notes]
+    index_headings = [i for i, h in enumerate(headings) if wants_exhibits and h.keyword == 'EXHIBIT INDEX']
+
+    return (
+        _section_ranges(headings, item_headings, ITEM_RANGE_END_HEADINGS, data_length, max_bytes)
+        + _section_ranges(headings, note_headings, NOTE_RANGE_END_HEADINGS, data_length, max_bytes)
+        + _section_ranges(headings, index_headings, INDEX_RANGE_END_HEADINGS, data_length, max_bytes)
+    )
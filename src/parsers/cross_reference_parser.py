@@ -1,14 +1,25 @@
 """Parser for resolving cross-references in MD&A sections."""
 
 import re
-from typing import List, Dict, Set, Optional, Tuple
+import sys
+from typing import List, Set, Optional, Tuple
 from dataclasses import dataclass
 from config.patterns import COMPILED_PATTERNS
-from config.settings import MAX_CROSS_REFERENCE_DEPTH
+from config.settings import MAX_CROSS_REFERENCE_DEPTH, CROSS_REFERENCE_CACHE_KB
+from src.parsers.document_map import DocumentMap
 from src.utils.logger import get_logger
+from src.utils.lru_cache import ByteBudgetLRU
+from src.utils.safe_regex import safe_finditer
 
 logger = get_logger(__name__)
 
+# Headings that end an item section: keyword -> pattern that must follow it
+ITEM_END_HEADINGS = {
+    "ITEM": re.compile(r'\s*\d', re.IGNORECASE),
+    "PART": re.compile(r'\s*[IVX]', re.IGNORECASE),
+    "SIGNATURES": None,
+}
+
 
 @dataclass
 class CrossReference:
@@ -25,9 +36,28 @@ class CrossReference:
 class CrossReferenceParser:
     """Handles cross-reference detection and resolution."""
 
-    def __init__(self):
+    def __init__(self, cache_kb: float = CROSS_REFERENCE_CACHE_KB):
         self.patterns = COMPILED_PATTERNS["cross_reference"]
-        self.resolved_cache: Dict[str, str] = {}
+        # Resolutions for the current document only; rotated when the document changes
+        self.resolved_cache = ByteBudgetLRU(int(cache_kb * 1024))
+        self._cache_document: Optional[Tuple[int, int]] = None
+
+    def _use_cache_for(self, document: str) -> Tuple[int, int]:
+        """
+        Scope the resolution cache to a document, clearing it when the document changes.
+
+        Args:
+            document: Document that references are resolved against
+
+        Returns:
+            Identity of the document, used in cache keys
+        """
+        # str caches its hash, so this is one pass per document, then O(1)
+        identity = (len(document), hash(document))
+        if identity != self._cache_document:
+            self.resolved_cache.clear()
+            self._cache_document = identity
+        return identity
 
     def find_cross_references(self, text: str) -> List[CrossReference]:
         """
@@ -42,7 +72,7 @@ class CrossReferenceParser:
         references = []
 
         for pattern in self.patterns:
-            for match in pattern.finditer(text):
+            for match in safe_finditer(pattern, text):
                 ref = self._parse_reference(match, text)
                 if ref:
                     references.append(ref)
@@ -57,7 +87,8 @@ class CrossReferenceParser:
             references: List[CrossReference],
             full_document: str,
             normalizer=None,  # Add normalizer parameter
-            depth: int = 0
+            depth: int = 0,
+            document_map: Optional[DocumentMap] = None
     ) -> List[CrossReference]:
         """
         Resolve cross-references by finding referenced content.
@@ -67,6 +98,7 @@ class CrossReferenceParser:
             full_document: Complete document text
             normalizer: TextNormalizer instance for cleaning text
             depth: Current recursion depth
+            document_map: Optional prebuilt DocumentMap of full_document
 
         Returns:
             List of resolved references
@@ -75,26 +107,32 @@ class CrossReferenceParser:
             logger.warning(f"Maximum cross-reference depth {MAX_CROSS_REFERENCE_DEPTH} reached")
             return references
 
+        if document_map is None or document_map.text is not full_document:
+            document_map = DocumentMap(full_document)
+
+        document_identity = self._use_cache_for(full_document)
+
         for ref in references:
             if ref.resolved:
                 continue
 
             # Check cache first
-            cache_key = f"{ref.reference_type}:{ref.target_id}"
-            if cache_key in self.resolved_cache:
-                ref.resolution_text = self.resolved_cache[cache_key]
+            cache_key = (document_identity, ref.reference_type, ref.target_id)
+            cached = self.resolved_cache.get(cache_key)
+            if cached is not None:
+                ref.resolution_text = cached
                 ref.resolved = True
                 continue
 
             # Resolve based on type
             if ref.reference_type == 'note':
-                resolution = self._resolve_note_reference(ref.target_id, full_document)
+                resolution = self._resolve_note_reference(ref.target_id, full_document, document_map)
             elif ref.reference_type == 'item':
-                resolution = self._resolve_item_reference(ref.target_id, full_document)
+                resolution = self._resolve_item_reference(ref.target_id, full_document, document_map)
             elif ref.reference_type == 'exhibit':
-                resolution = self._resolve_exhibit_reference(ref.target_id, full_document)
+                resolution = self._resolve_exhibit_reference(ref.target_id, full_document, document_map)
             elif ref.reference_type == 'section':
-                resolution = self._resolve_section_reference(ref.target_id, full_document)
+                resolution = self._resolve_section_reference(ref.target_id, full_document, document_map)
             else:
                 resolution = None
 
@@ -105,12 +143,12 @@ class CrossReferenceParser:
 
                 ref.resolution_text = resolution
                 ref.resolved = True
-                self.resolved_cache[cache_key] = resolution
+                self.resolved_cache.put(cache_key, resolution, sys.getsizeof(resolution))
 
                 # Check for nested references
                 nested_refs = self.find_cross_references(resolution)
                 if nested_refs:
-                    self.resolve_references(nested_refs, full_document, normalizer, depth + 1)
+                    self.resolve_references(nested_refs, full_document, normalizer, depth + 1, document_map)
 
         return references
 
@@ -153,61 +191,45 @@ class CrossReferenceParser:
             end_pos=match.end()
         )
 
-    def _resolve_note_reference(self, note_num: str, document: str) -> Optional[str]:
+    def _resolve_note_reference(self, note_num: str, document: str,
+                                document_map: Optional[DocumentMap] = None) -> Optional[str]:
         """Resolve a note reference to financial statements."""
-        # Common patterns for note sections
-        note_patterns = [
-            rf"(?:^|\n)\s*NOTE\s*{note_num}\s*[-–—:.\s]+([^\n]+)",
-            rf"(?:^|\n)\s*Note\s*{note_num}\s*[-–—:.\s]+([^\n]+)",
-            rf"(?:^|\n)\s*\({note_num}\)\s*([^\n]+)",
-        ]
-
-        for pattern_str in note_patterns:
-            pattern = re.compile(pattern_str, re.IGNORECASE | re.MULTILINE)
-            match = pattern.search(document)
+        if document_map is None or document_map.text is not document:
+            document_map = DocumentMap(document)
 
-            if match:
-                # Extract note content
-                start_pos = match.start()
+        found = document_map.find_note(note_num)
+        if found:
+            start_pos, heading_end = found
 
-                # Find end of note (next note or section)
-                end_pattern = re.compile(
-                    r'(?:^|\n)\s*(?:NOTE\s*\d+|ITEM\s*\d+|SIGNATURES)',
-                    re.IGNORECASE | re.MULTILINE
-                )
+            # Find end of note (next note or section)
+            end_pos = document_map.note_end(heading_end)
+            if end_pos is None:
+                end_pos = min(start_pos + 5000, len(document))
 
-                end_match = end_pattern.search(document, start_pos + len(match.group(0)))
-                end_pos = end_match.start() if end_match else min(start_pos + 5000, len(document))
+            note_text = document[start_pos:end_pos].strip()
 
-                note_text = document[start_pos:end_pos].strip()
-
-                # Clean up the text
-                note_text = self._clean_reference_text(note_text)
-
-                return note_text
+            # Clean up the text
+            return self._clean_reference_text(note_text)
 
         return None
 
-    def _resolve_item_reference(self, item_id: str, document: str) -> Optional[str]:
+    def _resolve_item_reference(self, item_id: str, document: str,
+                                document_map: Optional[DocumentMap] = None) -> Optional[str]:
         """Resolve an item reference."""
-        # Pattern for item sections
-        item_pattern = re.compile(
-            rf"(?:^|\n)\s*ITEM\s*{item_id}\.?\s*[-–—:.\s]*([^\n]+)",
-            re.IGNORECASE | re.MULTILINE
-        )
+        if document_map is None or document_map.text is not document:
+            document_map = DocumentMap(document)
 
-        match = item_pattern.search(document)
-        if match:
-            start_pos = match.start()
+        # Heading for the item section
+        item_tail = re.compile(rf"\s*{item_id}\.?\s*[-–—:.\s]*([^\n]+)", re.IGNORECASE)
 
-            # Find next item or major section
-            end_pattern = re.compile(
-                r'(?:^|\n)\s*(?:ITEM\s*\d+|PART\s*[IVX]+|SIGNATURES)',
-                re.IGNORECASE | re.MULTILINE
-            )
+        found = document_map.find_heading({"ITEM": item_tail})
+        if found:
+            start_pos, heading = found
+            heading_end = item_tail.match(document, heading.keyword_end).end()
 
-            end_match = end_pattern.search(document, start_pos + len(match.group(0)))
-            end_pos = end_match.start() if end_match else min(start_pos + 10000, len(document))
+            # Find next item or major section
+            end_match = document_map.find_heading(ITEM_END_HEADINGS, heading_end, from_slice=False)
+            end_pos = end_match[0] if end_match else min(start_pos + 10000, len(document))
 
             # Extract first few paragraphs as summary
             item_text = document[start_pos:end_pos]
@@ -218,41 +240,27 @@ class CrossReferenceParser:
 
         return None
 
-    def _resolve_exhibit_reference(self, exhibit_id: str, document: str) -> Optional[str]:
+    def _resolve_exhibit_reference(self, exhibit_id: str, document: str,
+                                   document_map: Optional[DocumentMap] = None) -> Optional[str]:
         """Resolve an exhibit reference."""
-        # For exhibits, we typically just note what it is
-        exhibit_pattern = re.compile(
-            rf"(?:^|\n)\s*(?:Exhibit\s*)?{exhibit_id}\s*[-–—:.\s]*([^\n]+)",
-            re.IGNORECASE | re.MULTILINE
-        )
-
-        # Look in exhibit index
-        index_section = re.search(
-            r'EXHIBIT\s*INDEX.*?(?=SIGNATURES|$)',
-            document,
-            re.IGNORECASE | re.DOTALL
-        )
+        if document_map is None or document_map.text is not document:
+            document_map = DocumentMap(document)
 
-        if index_section:
-            match = exhibit_pattern.search(index_section.group(0))
-            if match:
-                description = match.group(1).strip()
-                return f"[Exhibit {exhibit_id}: {description}]"
+        # For exhibits, we typically just note what it is
+        description = document_map.exhibit_description(exhibit_id)
+        if description:
+            return f"[Exhibit {exhibit_id}: {description}]"
 
         return f"[Reference to Exhibit {exhibit_id}]"
 
-    def _resolve_section_reference(self, section_title: str, document: str) -> Optional[str]:
+    def _resolve_section_reference(self, section_title: str, document: str,
+                                   document_map: Optional[DocumentMap] = None) -> Optional[str]:
         """Resolve a section reference by title."""
-        # Create pattern from section title
-        escaped_title = re.escape(section_title)
-        section_pattern = re.compile(
-            rf"(?:^|\n)\s*{escaped_title}\s*(?:\n|$)",
-            re.IGNORECASE | re.MULTILINE
-        )
+        if document_map is None or document_map.text is not document:
+            document_map = DocumentMap(document)
 
-        match = section_pattern.search(document)
-        if match:
-            start_pos = match.end()
+        start_pos = document_map.find_title_line(section_title)
+        if start_pos is not None:
 
             # Extract a summary (first 2 paragraphs)
             text_after = document[start_pos:start_pos + 3000]
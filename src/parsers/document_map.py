@@ -0,0 +1,308 @@
+"""Structure map of a filing's headings, built once and shared by the parsers."""
+
+import re
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from config.settings import TOC_BLOCK_SIZE, TOC_BLOCK_MARGIN
+from src.parsers.pattern_scanner import PatternScanner, ScanResult
+from src.parsers.toc_detector import find_toc_spans
+from src.utils.line_index import LineIndex
+
+# Line-leading keywords recorded in the map. Section ends and cross-reference
+# lookups are all expressed as one of these keywords plus a tail pattern.
+HEADING_LINE_PATTERN = re.compile(
+    r'^[^\S\n]*(?P<keyword>ITEM|PART|SIGNATURES|EXHIBIT\s+INDEX'
+    r'|LEGAL\s+PROCEEDINGS|MARKET\s+RISK\s+DISCLOSURES'
+    r'|UNREGISTERED\s+SALES|DEFAULTS\s+UPON\s+SENIOR'
+    r'|FINANCIAL\s*STATEMENTS|CONDENSED\s*CONSOLIDATED)',
+    re.IGNORECASE | re.MULTILINE
+)
+
+HEADING_LABEL_PATTERN = re.compile(r'\s*(?P<label>\d+[A-Z]?|[IVX]+[A-Z]?)\b', re.IGNORECASE)
+
+# Note headings ("NOTE 7 - DEBT", "(7) Debt"). The title is matched in a
+# lookahead, so a heading whose title runs onto the next line cannot hide
+# a heading on that line from finditer.
+NOTE_HEADING_PATTERN = re.compile(
+    r'(?:^|\n)\s*NOTE\s*(?P<number>\d+)(?=(?P<title>\s*[-–—:.\s]+[^\n]+))',
+    re.IGNORECASE | re.MULTILINE
+)
+PAREN_NOTE_HEADING_PATTERN = re.compile(
+    r'(?:^|\n)\s*\((?P<number>\d+)\)(?=(?P<title>\s*[^\n]+))',
+    re.MULTILINE
+)
+NOTE_END_PATTERN = re.compile(r'(?:^|\n)\s*(?:NOTE\s*\d+|ITEM\s*\d+|SIGNATURES)', re.IGNORECASE | re.MULTILINE)
+
+# Exhibit index: from the first "EXHIBIT INDEX" to the next "SIGNATURES"
+EXHIBIT_INDEX_PATTERN = re.compile(r'EXHIBIT\s*INDEX', re.IGNORECASE)
+EXHIBIT_INDEX_END_PATTERN = re.compile(r'SIGNATURES', re.IGNORECASE)
+EXHIBIT_ENTRY_PATTERN = re.compile(
+    r'(?:^|\n)\s*(?:Exhibit\s*)?(?P<number>\d+(?:\.\d+)*)(?=\s*[-–—:.\s]*(?P<description>[^\n]+))',
+    re.IGNORECASE | re.MULTILINE
+)
+
+# Whitespace after a title line, up to the last newline before the text
+TITLE_TRAILER_PATTERN = re.compile(r'\s*(?:\n|$)', re.MULTILINE)
+MAX_TITLE_LINE_CHARS = 200
+
+
+@dataclass
+class Heading:
+    """A line-leading heading keyword found in the document."""
+    keyword: str  # 'ITEM', 'PART', 'SIGNATURES', 'EXHIBITINDEX', ... (whitespace removed)
+    label: Optional[str]  # Item number or Part numeral, e.g. '7A', 'II'
+    start_pos: int  # Position of the keyword
+    keyword_end: int
+    run_start: int  # Start of the whitespace run before the keyword
+    line_number: int
+    confidence: float  # 1.0 for an upper-case heading line, 0.5 otherwise
+
+
+class DocumentMap:
+    """
+    Every PART/ITEM/SIGNATURES/EXHIBIT INDEX heading in a filing, plus the
+    section-heading pattern families, found in one pass each.
+
+    Heading searches elsewhere in the parsers are lookups here. A lookup
+    reports the same position the equivalent ``(?:^|\\n)\\s*KEYWORD`` or
+    ``^\\s*KEYWORD`` regex search would. Only keywords that begin a line
+    count; a slice starting mid-line no longer makes the rest of that line
+    look like a heading. Note headings, the exhibit index and title lines
+    used by cross-reference resolution are mapped the same way. The map is
+    built lazily; only the parts a caller uses are computed.
+    """
+
+    def __init__(self, text: str, scanner: Optional[PatternScanner] = None):
+        self.text = text
+        self.scanner = scanner or PatternScanner()
+        self._line_index: Optional[LineIndex] = None
+        self._headings: Optional[List[Heading]] = None
+        self._heading_starts: List[int] = []
+        self._sections: Optional[ScanResult] = None
+        self._toc_blocks: Dict[int, List[Tuple[int, int]]] = {}
+        self._notes: Optional[Dict[str, Tuple[int, int]]] = None
+        self._note_ends: Optional[array] = None
+        self._exhibits: Optional[Dict[str, str]] = None
+        self._title_lines: Optional[Dict[str, int]] = None
+
+    @property
+    def line_index(self) -> LineIndex:
+        if self._line_index is None:
+            self._line_index = LineIndex(self.text)
+        return self._line_index
+
+    @property
+    def headings(self) -> List[Heading]:
+        if self._headings is None:
+            self._headings = self._build_headings()
+            self._heading_starts = [h.start_pos for h in self._headings]
+        return self._headings
+
+    @property
+    def sections(self) -> ScanResult:
+        """Matches of every section-heading pattern family (see PatternScanner)."""
+        if self._sections is None:
+            self._sections = self.scanner.scan(self.text)
+        return self._sections
+
+    def toc_spans(self, pos: int) -> List[Tuple[int, int]]:
+        """
+        Table-of-contents regions around a position (see find_toc_spans).
+
+        TOC regions are found per TOC_BLOCK_SIZE block, each scanned once
+        with TOC_BLOCK_MARGIN of context on both sides, so a query never
+        scans more of a large filing than the blocks it touches.
+        """
+        block = pos // TOC_BLOCK_SIZE
+        if block not in self._toc_blocks:
+            line_index = self.line_index
+            start = max(0, block * TOC_BLOCK_SIZE - TOC_BLOCK_MARGIN)
+            end = min(len(self.text), (block + 1) * TOC_BLOCK_SIZE + TOC_BLOCK_MARGIN)
+            start = line_index.line_offset(line_index.line_number(start) - 1)
+            end = line_index.line_end(line_index.line_number(end) - 1)
+            self._toc_blocks[block] = find_toc_spans(self.text, line_index, start, end)
+        return self._toc_blocks[block]
+
+    def in_toc(self, pos: int) -> bool:
+        """Whether a position falls inside a table-of-contents region."""
+        return any(start <= pos <= end for start, end in self.toc_spans(pos))
+
+    def find_note(self, number: str) -> Optional[Tuple[int, int]]:
+        """
+        First heading of a note, as ``NOTE n - Title`` or else ``(n) Title``.
+
+        Args:
+            number: Note number
+
+        Returns:
+            Tuple of (heading start, end of its title line), or None
+        """
+        if self._notes is None:
+            notes: Dict[str, Tuple[int, int]] = {}
+            paren_notes: Dict[str, Tuple[int, int]] = {}
+            for pattern, found in ((NOTE_HEADING_PATTERN, notes), (PAREN_NOTE_HEADING_PATTERN, paren_notes)):
+                for match in pattern.finditer(self.text):
+                    found.setdefault(match.group('number'), (match.start(), match.end('title')))
+            # NOTE headings take precedence over parenthesized ones for the same number
+            self._notes = {**paren_notes, **notes}
+        return self._notes.get(number)
+
+    def note_end(self, pos: int) -> Optional[int]:
+        """Start of the first NOTE/ITEM/SIGNATURES heading at or after pos, or None."""
+        if self._note_ends is None:
+            self._note_ends = array('q', (m.start() for m in NOTE_END_PATTERN.finditer(self.text)))
+        i = bisect_left(self._note_ends, pos)
+        return self._note_ends[i] if i < len(self._note_ends) else None
+
+    def exhibit_description(self, number: str) -> Optional[str]:
+        """
+        Description of an exhibit in the exhibit index.
+
+        Args:
+            number: Exhibit number, e.g. '13' or '10.1'
+
+        Returns:
+            Description from the first index entry with exactly that number, or None
+        """
+        if self._exhibits is None:
+            self._exhibits = {}
+            index = EXHIBIT_INDEX_PATTERN.search(self.text)
+            if index:
+                end = EXHIBIT_INDEX_END_PATTERN.search(self.text, index.end())
+                end_pos = end.start() if end else len(self.text)
+                for match in EXHIBIT_ENTRY_PATTERN.finditer(self.text, index.start(), end_pos):
+                    self._exhibits.setdefault(match.group('number'), match.group('description').strip())
+        return self._exhibits.get(number)
+
+    def find_title_line(self, title: str) -> Optional[int]:
+        """
+        First line that consists of a title alone, ignoring case and surrounding whitespace.
+
+        Args:
+            title: Section title
+
+        Returns:
+            Position after the title line and any blank lines that follow it, or None
+        """
+        if self._title_lines is None:
+            self._title_lines = {}
+            for match in re.finditer(r'[^\n]+', self.text):
+                line = match.group(0).rstrip()
+                title_line = line.lstrip()
+                if title_line and len(title_line) <= MAX_TITLE_LINE_CHARS:
+                    self._title_lines.setdefault(title_line.lower(), match.start() + len(line))
+        title_end = self._title_lines.get(title.strip().lower())
+        if title_end is None:
+            return None
+        return TITLE_TRAILER_PATTERN.match(self.text, title_end).end()
+
+    def _build_headings(self) -> List[Heading]:
+        text = self.text
+        headings = []
+
+        for match in HEADING_LINE_PATTERN.finditer(text):
+            keyword_pos = match.start('keyword')
+            keyword = ''.join(match.group('keyword').upper().split())
+
+            label = None
+            if keyword in ('ITEM', 'PART'):
+                label_match = HEADING_LABEL_PATTERN.match(text, match.end())
+                if label_match:
+                    label = label_match.group('label').upper()
+
+            run_start = keyword_pos
+            while run_start > 0 and text[run_start - 1].isspace():
+                run_start -= 1
+
+            line_end = text.find('\n', keyword_pos)
+            line = text[keyword_pos:line_end if line_end != -1 else len(text)]
+
+            headings.append(Heading(
+                keyword=keyword,
+                label=label,
+                start_pos=keyword_pos,
+                keyword_end=match.end(),
+                run_start=run_start,
+                line_number=self.line_index.line_number(keyword_pos),
+                confidence=1.0 if line.isupper() else 0.5
+            ))
+
+        return headings
+
+    def find_heading(self, tails: Dict[str, Optional[re.Pattern]], pos: int = 0,
+                     line_start_only: bool = False,
+                     from_slice: bool = True,
+                     endpos: Optional[int] = None) -> Optional[Tuple[int, Heading]]:
+        """
+        Find the first heading at or after pos.
+
+        Args:
+            tails: Heading keywords to accept (upper case, whitespace removed), each
+                mapped to a pattern that must match right after the keyword, or None
+            pos: Search start position
+            line_start_only: Report the position a ``^\\s*`` pattern would
+                (a line start) rather than a ``(?:^|\\n)\\s*`` pattern (the newline)
+            from_slice: Treat pos as the start of a slice, where ``^`` matches,
+                as when searching ``text[pos:]``; otherwise as ``search(text, pos)``
+            endpos: Only accept headings starting before this position
+
+        Returns:
+            Tuple of (match start position, Heading) or None
+        """
+        headings = self.headings
+        end = len(headings) if endpos is None else bisect_left(self._heading_starts, endpos)
+
+        for i in range(bisect_left(self._heading_starts, pos), end):
+            heading = headings[i]
+            if heading.keyword not in tails:
+                continue
+            tail = tails[heading.keyword]
+            if tail is not None and not tail.match(self.text, heading.keyword_end):
+                continue
+
+            anchor = self._anchor(heading, pos, line_start_only, from_slice)
+            if anchor is not None:
+                return anchor, heading
+
+        return None
+
+    def first_section_match(self, pattern_key: str, pos: int = 0) -> Optional[Tuple[int, int, re.Match]]:
+        """
+        First match of a pattern family in ``text[pos:]``.
+
+        As with searching the slice, the first match of each pattern is taken
+        and the lowest-index (highest-confidence) pattern that matched wins.
+
+        Args:
+            pattern_key: Pattern family key
+            pos: Search start position
+
+        Returns:
+            Tuple of (pattern index, start position, match) or None
+        """
+        best = None
+        for i, match in self.sections[pattern_key]:
+            if best is not None and i >= best[0]:
+                continue
+            # The slice cannot see a match whose keyword lies before pos; one
+            # whose leading whitespace straddles pos starts at pos instead.
+            matched = match.group(0)
+            keyword_pos = match.start() + len(matched) - len(matched.lstrip())
+            if keyword_pos >= pos:
+                best = (i, max(match.start(), pos), match)
+        return best
+
+    def _anchor(self, heading: Heading, pos: int, line_start_only: bool, from_slice: bool) -> Optional[int]:
+        """Where a line-anchored pattern searched from pos would start for this heading."""
+        if from_slice and heading.run_start <= pos <= heading.start_pos:
+            return pos
+
+        text = self.text
+        for q in range(max(heading.run_start, pos), heading.start_pos + 1):
+            if q == 0 or text[q - 1] == '\n':
+                return q
+            if not line_start_only and text[q] == '\n':
+                return q
+        return None
@@ -5,10 +5,52 @@ from pathlib import Path
 from typing import Optional, Tuple, List, Dict
 from dataclasses import dataclass
 from config.patterns import COMPILED_PATTERNS
+from src.parsers.document_map import DocumentMap
+from src.parsers.pattern_scanner import PatternScanner
+from src.utils import pattern_profiler
+from src.utils.line_index import LineIndex
 from src.utils.logger import get_logger
+from src.utils.safe_regex import safe_search, safe_finditer
 
 logger = get_logger(__name__)
 
+LEADING_WHITESPACE = re.compile(r'\s*')
+
+# Section-end headings: keyword -> pattern that must follow the keyword
+_HEADING_FLAGS = re.IGNORECASE | re.MULTILINE
+
+TEN_Q_END_HEADINGS = [
+    ("item_3_start", {"ITEM": re.compile(r'\s*3[\.\:\-\s]*QUANTITATIVE', _HEADING_FLAGS)}),
+    ("item_4_start", {"ITEM": re.compile(r'\s*4[\.\:\-\s]*CONTROLS', _HEADING_FLAGS)}),
+    ("part_ii_start", {"PART": re.compile(r'\s*II\b', _HEADING_FLAGS)}),
+]
+
+TEN_K_END_HEADINGS = [
+    ("item_7a_start", {"ITEM": re.compile(r'\s*7A[\.\:\-\s]', _HEADING_FLAGS)}),
+    ("item_8_start", {"ITEM": re.compile(r'\s*8[\.\:\-\s]', _HEADING_FLAGS)}),
+]
+
+FALLBACK_END_HEADINGS = [
+    {"SIGNATURES": re.compile(r'\s*(?:\n|$)', _HEADING_FLAGS)},
+    {"EXHIBITINDEX": re.compile(r'\s*(?:\n|$)', _HEADING_FLAGS)},
+    {"PART": re.compile(r'\s+III\s*(?:\n|$)', _HEADING_FLAGS)},
+]
+
+TEN_Q_STRONG_BREAK_HEADINGS = [
+    {"PART": re.compile(r'\s*II', _HEADING_FLAGS)},
+    {"ITEM": re.compile(r'\s*[3-9]\b', _HEADING_FLAGS)},
+    {"FINANCIALSTATEMENTS": None},
+    {"CONDENSEDCONSOLIDATED": None},
+    {"SIGNATURES": None},
+]
+
+TEN_Q_FALLBACK_END_HEADINGS = [
+    {"LEGALPROCEEDINGS": None, "MARKETRISKDISCLOSURES": None},
+    {"UNREGISTEREDSALES": None, "DEFAULTSUPONSENIOR": None},
+    {"SIGNATURES": re.compile(r'\s*$', _HEADING_FLAGS)},
+    {"EXHIBITINDEX": re.compile(r'\s*$', _HEADING_FLAGS)},
+]
+
 
 @dataclass
 class SectionBoundary:
@@ -18,6 +60,8 @@ class SectionBoundary:
     end_pos: int
     line_number: int
     confidence: float
+    pattern_key: Optional[str] = None  # Family in COMPILED_PATTERNS that matched
+    pattern_index: Optional[int] = None  # Index of the matching pattern in that family
 
 
 @dataclass
@@ -36,14 +80,35 @@ class SectionParser:
     def __init__(self):
         self.patterns = COMPILED_PATTERNS
         self._current_form_type = "10-K"  # Default
-
-    def find_mdna_section(self, text: str, form_type: str = "10-K") -> Optional[Tuple[int, int]]:
+        self.scanner = PatternScanner(self.patterns)
+        self._document_map: Optional[DocumentMap] = None
+
+    def _get_document_map(self, text: str) -> DocumentMap:
+        """Return the structure map for text, building it once per document."""
+        if self._document_map is None or self._document_map.text is not text:
+            self._document_map = DocumentMap(text, self.scanner)
+        return self._document_map
+
+    def _get_line_index(self, text: str) -> LineIndex:
+        """Return the line-offset index for text, building it once per document."""
+        return self._get_document_map(text).line_index
+
+    @staticmethod
+    def _record_selected(*boundaries: Optional[SectionBoundary]):
+        """Credit the patterns behind the chosen section boundaries (pattern profiling only)."""
+        for boundary in boundaries:
+            if boundary is not None:
+                pattern_profiler.record_selected(boundary.pattern_key, boundary.pattern_index)
+
+    def find_mdna_section(self, text: str, form_type: str = "10-K",
+                          document_map: Optional[DocumentMap] = None) -> Optional[Tuple[int, int]]:
         """
         Find the MD&A section boundaries in the text.
 
         Args:
             text: Full text of the filing
             form_type: Type of form ("10-K", "10-K/A", "10-Q", "10-Q/A")
+            document_map: Optional prebuilt DocumentMap of text, shared with other parsers
 
         Returns:
             Tuple of (start_pos, end_pos) or None if not found
@@ -51,6 +116,9 @@ class SectionParser:
         # Store form_type for use in validation
         self._current_form_type = form_type
 
+        if document_map is not None and document_map.text is text:
+            self._document_map = document_map
+
         if "10-Q" in form_type:
             return self._find_10q_mdna_section(text)
         else:
@@ -84,22 +152,19 @@ class SectionParser:
         # Find section end (Item 7A or Item 8)
         search_start = valid_match.end_pos
 
-        item_7a_start = self._find_section_start(text[search_start:], "item_7a_start")
-        item_8_start = self._find_section_start(text[search_start:], "item_8_start")
+        item_7a_start = self._find_section_start(text, "item_7a_start", search_start)
+        item_8_start = self._find_section_start(text, "item_8_start", search_start)
 
         # Determine end position
-        end_candidates = []
-        if item_7a_start:
-            end_candidates.append(search_start + item_7a_start.start_pos)
-        if item_8_start:
-            end_candidates.append(search_start + item_8_start.start_pos)
+        end_candidates = [b for b in (item_7a_start, item_8_start) if b]
+        end_match = min(end_candidates, key=lambda b: b.start_pos, default=None)
 
-        if not end_candidates:
+        if not end_match:
             end_pos = self._find_fallback_end(text, search_start)
             if not end_pos:
                 end_pos = len(text)
         else:
-            end_pos = min(end_candidates)
+            end_pos = end_match.start_pos
 
         # Validate content length
         content_length = end_pos - valid_match.start_pos
@@ -113,6 +178,7 @@ class SectionParser:
                     logger.info(f"Using next Item 7 match at position {next_match.start_pos}")
                     return self._extract_from_validated_start(next_match, text, "10-K")
 
+        self._record_selected(valid_match, end_match)
         return (valid_match.start_pos, end_pos)
 
     def _find_10q_mdna_section(self, text: str) -> Optional[Tuple[int, int]]:
@@ -122,18 +188,16 @@ class SectionParser:
             all_item_2_matches = self._find_all_section_matches(text, "item_2_start")
 
             # Also check for Part I, Item 2 pattern
-            part_i_item_2_pattern = re.compile(
-                r'(?:^|\n)\s*(?:PART\s*I.*?)?\s*ITEM\s*2[\.\:\-\s]*MANAGEMENT[\'’]?S?\s*DISCUSSION',
-                re.IGNORECASE | re.MULTILINE | re.DOTALL
-            )
+            part_i_item_2_pattern = self.patterns["part_i_item_2"][0]
 
             # Add any Part I hits with higher confidence
-            for match in part_i_item_2_pattern.finditer(text):
+            line_index = self._get_line_index(text)
+            for match in safe_finditer(part_i_item_2_pattern, text):
                 boundary = SectionBoundary(
                     pattern_matched=match.group(0),
                     start_pos=match.start(),
                     end_pos=match.end(),
-                    line_number=text[:match.start()].count('\n') + 1,
+                    line_number=line_index.line_number(match.start()),
                     confidence=1.5  # Higher confidence for Part I pattern
                 )
                 all_item_2_matches.append(boundary)
@@ -171,20 +235,32 @@ class SectionParser:
             return []
 
         all_matches = []
+        line_index = self._get_line_index(text)
 
-        for i, pattern in enumerate(self.patterns[pattern_key]):
-            for match in pattern.finditer(text):  # Use finditer instead of search
-                confidence = 1.0 - (i * 0.1)
-                line_number = text[:match.start()].count('\n') + 1
+        if pattern_key in self.scanner.families:
+            # All heading families come from a single shared scan
+            indexed_matches = self._get_document_map(text).sections[pattern_key]
+        else:
+            indexed_matches = [
+                (i, match)
+                for i, pattern in enumerate(self.patterns[pattern_key])
+                for match in pattern.finditer(text)
+            ]
 
-                boundary = SectionBoundary(
-                    pattern_matched=pattern.pattern,
-                    start_pos=match.start(),
-                    end_pos=match.end(),
-                    line_number=line_number,
-                    confidence=confidence
-                )
-                all_matches.append(boundary)
+        for i, match in indexed_matches:
+            confidence = 1.0 - (i * 0.1)
+            line_number = line_index.line_number(match.start())
+
+            boundary = SectionBoundary(
+                pattern_matched=match.re.pattern,
+                start_pos=match.start(),
+                end_pos=match.end(),
+                line_number=line_number,
+                confidence=confidence,
+                pattern_key=pattern_key,
+                pattern_index=i
+            )
+            all_matches.append(boundary)
 
         # Sort by position
         all_matches.sort(key=lambda x: x.start_pos)
@@ -290,42 +366,9 @@ class SectionParser:
         if len(text) < 5000:
             return False
 
-        # Look backwards up to 5KB for TOC markers
-        look_back = min(5000, match.start_pos)
-        preceding_text = text[max(0, match.start_pos - look_back):match.start_pos]
-
-        # TOC patterns
-        toc_patterns = [
-            r'TABLE\s+OF\s+CONTENTS',
-            r'INDEX\s+TO\s+(?:FINANCIAL\s+STATEMENTS|FORM)',
-            r'(?:^|\n)\s*(?:Page|PART|ITEM)\s*(?:No\.?|Number)?\s*$',  # Column headers
-        ]
-
-        # Check if we're in a TOC
-        for pattern in toc_patterns:
-            if re.search(pattern, preceding_text, re.IGNORECASE | re.MULTILINE):
-                # Now check if we've exited the TOC
-                # Look for substantial text blocks or section starts
-                exit_patterns = [
-                    r'(?:^|\n)\s*(?:PART\s+I\s*$|BUSINESS\s*$|RISK\s+FACTORS)',
-                    r'(?:^|\n)\s*FORWARD.?LOOKING\s+STATEMENTS',
-                    r'(?:^|\n)\s*(?:INTRODUCTION|OVERVIEW|SUMMARY)',
-                ]
-
-                for exit_pattern in exit_patterns:
-                    if re.search(exit_pattern, preceding_text, re.IGNORECASE | re.MULTILINE):
-                        return False  # We've exited the TOC
-
-                # Check for dense text (TOCs have sparse text)
-                lines = preceding_text.split('\n')[-20:]  # Last 20 lines
-                non_empty_lines = [l for l in lines if len(l.strip()) > 20]
-                if len(non_empty_lines) > 10:
-                    return False  # Too much text for a TOC
-
-                return True  # Still in TOC
-
-        return False
-
+        # Judge the heading line itself, not the newline a match may start on
+        heading_pos = LEADING_WHITESPACE.match(text, match.start_pos).end()
+        return self._get_document_map(text).in_toc(heading_pos)
 
     def _is_reference_only(self, text: str, match: SectionBoundary) -> bool:
         """Check if this is just a reference to Item 2, not the actual section."""
@@ -350,40 +393,33 @@ class SectionParser:
     def _extract_from_validated_start(self, start_match: SectionBoundary, text: str, form_type: str) -> Optional[
         Tuple[int, int]]:
         """Extract section content from a validated start position."""
-        search_start = start_match.start_pos
-
         if "10-Q" in form_type:
             # 10-Q specific endpoints
-            end_patterns = [
-                ("item_3_start", r'(?:^|\n)\s*ITEM\s*3[\.\:\-\s]*QUANTITATIVE'),
-                ("item_4_start", r'(?:^|\n)\s*ITEM\s*4[\.\:\-\s]*CONTROLS'),
-                ("part_ii_start", r'(?:^|\n)\s*PART\s*II\b'),
-            ]
+            end_headings = TEN_Q_END_HEADINGS
         else:
             # 10-K endpoints
-            end_patterns = [
-                ("item_7a_start", r'(?:^|\n)\s*ITEM\s*7A[\.\:\-\s]'),
-                ("item_8_start", r'(?:^|\n)\s*ITEM\s*8[\.\:\-\s]'),
-            ]
+            end_headings = TEN_K_END_HEADINGS
 
-        segment = text[start_match.end_pos:]
-        end_candidates = []
+        document_map = self._get_document_map(text)
+        end_candidates = []  # (position, SectionBoundary or None for a plain heading)
 
-        for pattern_key, pattern_str in end_patterns:
+        for pattern_key, tails in end_headings:
             # Try compiled patterns
             if pattern_key in self.patterns:
-                match = self._find_section_start(segment, pattern_key)
+                match = self._find_section_start(text, pattern_key, start_match.end_pos)
                 if match:
-                    end_candidates.append(start_match.end_pos + match.start_pos)
+                    end_candidates.append((match.start_pos, match))
 
-            # Also try direct regex
-            direct_match = re.search(pattern_str, segment, re.IGNORECASE | re.MULTILINE)
-            if direct_match:
-                end_candidates.append(start_match.end_pos + direct_match.start())
+            # Also try the plain heading
+            heading = document_map.find_heading(tails, start_match.end_pos)
+            if heading:
+                end_candidates.append((heading[0], None))
 
         if end_candidates:
-            end_pos = min(end_candidates)
+            end_pos, end_match = min(end_candidates, key=lambda c: c[0])
+            self._record_selected(start_match, end_match)
         else:
+            self._record_selected(start_match)
             end_pos = self._find_fallback_end(text, start_match.end_pos)
             if not end_pos:
                 # Set reasonable maximum
@@ -396,22 +432,14 @@ class SectionParser:
         """
         Extended search for 10-Q MD&A end when initial search was too restrictive.
         """
-        search_text = text[start_pos:]
+        document_map = self._get_document_map(text)
 
         # Look for strong section breaks that indicate end of MD&A
-        strong_breaks = [
-            r'(?im)^\s*PART\s*II',
-            r'(?im)^\s*ITEM\s*[3-9]\b',
-            r'(?im)^\s*FINANCIAL\s*STATEMENTS',
-            r'(?im)^\s*CONDENSED\s*CONSOLIDATED',
-            r'(?im)^\s*SIGNATURES',
-        ]
-
         min_end = None
-        for pattern in strong_breaks:
-            match = re.search(pattern, search_text)
-            if match and match.start() > 500:  # ensure we capture some content
-                pos = start_pos + match.start()
+        for tails in TEN_Q_STRONG_BREAK_HEADINGS:
+            heading = document_map.find_heading(tails, start_pos, line_start_only=True)
+            if heading and heading[0] - start_pos > 500:  # ensure we capture some content
+                pos = heading[0]
                 if min_end is None or pos < min_end:
                     min_end = pos
 
@@ -422,35 +450,26 @@ class SectionParser:
             Find fallback end position for 10-Q MD&A.
 
             This looks for any of several common section-break cues, anchored to the
-            start of a line so that match.start() points exactly at the first letter.
+            start of a line so that the returned position is that line's start.
             """
-            # All patterns are MULTILINE-anchored to the true line start
-            fallback_patterns = [
-                r"^\s*(?:LEGAL\s+PROCEEDINGS|MARKET\s+RISK\s+DISCLOSURES)",
-                r"^\s*(?:UNREGISTERED\s+SALES|DEFAULTS\s+UPON\s+SENIOR)",
-                r"^\s*SIGNATURES\s*(?:$)",
-                r"^\s*EXHIBIT\s+INDEX\s*(?:$)",
-            ]
-            compiled = [re.compile(p, re.IGNORECASE | re.MULTILINE)
-                        for p in fallback_patterns]
-
-            search_text = text[start_pos:]
+            # All cues are anchored to the true line start
+            document_map = self._get_document_map(text)
             end_positions = []
-            for pat in compiled:
-                m = pat.search(search_text)
-                if m:
-                    # m.start() now is the exact index of 'L' or 'M' at the start of the cue
-                    end_positions.append(start_pos + m.start())
+            for tails in TEN_Q_FALLBACK_END_HEADINGS:
+                heading = document_map.find_heading(tails, start_pos, line_start_only=True)
+                if heading:
+                    end_positions.append(heading[0])
 
             return min(end_positions) if end_positions else None
 
-    def _find_section_start(self, text: str, pattern_key: str) -> Optional[SectionBoundary]:
+    def _find_section_start(self, text: str, pattern_key: str, pos: int = 0) -> Optional[SectionBoundary]:
         """
         Find the start of a section using multiple patterns.
 
         Args:
             text: Text to search
             pattern_key: Key for pattern list in COMPILED_PATTERNS
+            pos: Position to search from
 
         Returns:
             SectionBoundary or None
@@ -459,31 +478,32 @@ class SectionParser:
             logger.warning(f"Pattern key '{pattern_key}' not found in compiled patterns")
             return None
 
-        matches = []
-
-        for i, pattern in enumerate(self.patterns[pattern_key]):
-            match = pattern.search(text)
-            if match:
-                # Calculate confidence based on pattern specificity
-                confidence = 1.0 - (i * 0.1)  # Earlier patterns have higher confidence
-
-                # Get line number
-                line_number = text[:match.start()].count('\n') + 1
-
-                boundary = SectionBoundary(
-                    pattern_matched=pattern.pattern,
-                    start_pos=match.start(),
-                    end_pos=match.end(),
-                    line_number=line_number,
-                    confidence=confidence
-                )
-                matches.append(boundary)
-
-        if not matches:
-            return None
+        if pattern_key in self.scanner.families:
+            # First match of the highest-confidence pattern, from the document map
+            found = self._get_document_map(text).first_section_match(pattern_key, pos)
+            if not found:
+                return None
+            i, start_pos, match = found
+            end_pos = match.end()
+        else:
+            for i, pattern in enumerate(self.patterns[pattern_key]):
+                match = pattern.search(text, pos)
+                if match:
+                    start_pos, end_pos = match.start(), match.end()
+                    break
+            else:
+                return None
 
-        # Return match with highest confidence
-        return max(matches, key=lambda x: x.confidence)
+        # Earlier patterns have higher confidence
+        return SectionBoundary(
+            pattern_matched=match.re.pattern,
+            start_pos=start_pos,
+            end_pos=end_pos,
+            line_number=self._get_line_index(text).line_number(start_pos),
+            confidence=1.0 - (i * 0.1),
+            pattern_key=pattern_key,
+            pattern_index=i
+        )
 
     def _find_fallback_end(self, text: str, start_pos: int) -> Optional[int]:
         """
@@ -497,24 +517,13 @@ class SectionParser:
             End position or None
         """
         # Look for common section endings
-        fallback_patterns = [
-            r"(?:^|\n)\s*SIGNATURES\s*(?:\n|$)",
-            r"(?:^|\n)\s*EXHIBIT\s+INDEX\s*(?:\n|$)",
-            r"(?:^|\n)\s*PART\s+III\s*(?:\n|$)",
-        ]
-
-        compiled_fallbacks = [
-            re.compile(p, re.IGNORECASE | re.MULTILINE)
-            for p in fallback_patterns
-        ]
-
+        document_map = self._get_document_map(text)
         end_positions = []
-        search_text = text[start_pos:]
 
-        for pattern in compiled_fallbacks:
-            match = pattern.search(search_text)
-            if match:
-                end_positions.append(start_pos + match.start())
+        for tails in FALLBACK_END_HEADINGS:
+            heading = document_map.find_heading(tails, start_pos)
+            if heading:
+                end_positions.append(heading[0])
 
         return min(end_positions) if end_positions else None
 
@@ -570,9 +579,10 @@ class SectionParser:
                 "liquidity", "capital resources", "revenue"
             ]
 
+        section_lower = section_text.lower()
         keyword_count = sum(
             1 for keyword in mdna_keywords
-            if keyword.lower() in section_text.lower()
+            if keyword.lower() in section_lower
         )
 
         if keyword_count < 1:  # More lenient for 10-Q
@@ -601,6 +611,7 @@ class SectionParser:
         ]
 
         subsections = []
+        line_index = self._get_line_index(text)
 
         for pattern_str in subsection_patterns:
             pattern = re.compile(pattern_str, re.IGNORECASE | re.MULTILINE)
@@ -611,7 +622,7 @@ class SectionParser:
                     "title": match.group().strip(),
                     "start_pos": match.start(),
                     "end_pos": match.end(),
-                    "line_number": text[:match.start()].count('\n') + 1
+                    "line_number": line_index.line_number(match.start())
                 })
 
         # Sort by position
@@ -637,21 +648,19 @@ class SectionParser:
         Returns:
             IncorporationByReference object if found, None otherwise
         """
-        section_text = text[start_pos:end_pos]
-
         # Check first 2000 characters of the section for incorporation language
-        check_text = section_text[:2000] if len(section_text) > 2000 else section_text
+        check_end = min(end_pos, start_pos + 2000)
 
         if "incorporation_by_reference" not in self.patterns:
             logger.warning("No incorporation_by_reference patterns found")
             return None
 
         for pattern in self.patterns["incorporation_by_reference"]:
-            match = pattern.search(check_text)
+            match = safe_search(pattern, text, start_pos, check_end)
             if match:
                 # Extract details about the incorporation
-                full_match_start = start_pos + match.start()
-                full_match_end = start_pos + match.end()
+                full_match_start = match.start()
+                full_match_end = match.end()
 
                 # Get surrounding context (up to 500 chars before and after)
                 context_start = max(0, full_match_start - 250)
@@ -0,0 +1,126 @@
+"""Index of the <DOCUMENT> blocks inside an EDGAR full-submission file."""
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Iterable, List, Optional, Tuple
+
+# SGML tags that open, describe and close each document of a submission
+SGML_TAG_PATTERN = re.compile(
+    r'^<(?P<tag>/?DOCUMENT|TYPE|SEQUENCE|FILENAME|DESCRIPTION|/?TEXT)>(?P<value>[^\n]*)',
+    re.IGNORECASE | re.MULTILINE
+)
+SGML_TAG_BYTES_PATTERN = re.compile(
+    rb'^<(?P<tag>/?DOCUMENT|TYPE|SEQUENCE|FILENAME|DESCRIPTION|/?TEXT)>(?P<value>[^\n]*)',
+    re.IGNORECASE | re.MULTILINE
+)
+
+DESCRIPTIVE_TAGS = ('TYPE', 'SEQUENCE', 'FILENAME', 'DESCRIPTION')
+
+
+@dataclass
+class SubmissionDocument:
+    """One <DOCUMENT> block of a submission."""
+    doc_type: str  # <TYPE>, e.g. '10-K', 'EX-13', 'GRAPHIC'
+    sequence: Optional[str]
+    filename: Optional[str]
+    description: Optional[str]
+    start: int  # Offset of the document text (after <TEXT>)
+    end: int  # Offset of </TEXT>, or of </DOCUMENT> if there is no <TEXT>
+
+
+def build_documents(tags: Iterable[Tuple[str, str, int, int]], length: int) -> List[SubmissionDocument]:
+    """
+    Assemble documents from SGML tag occurrences in document order.
+
+    Args:
+        tags: (tag, value, line start, line end) for each tag line
+        length: Length of the indexed text or bytes
+
+    Returns:
+        Documents in submission order
+    """
+    documents = []
+    fields = None
+
+    def close(end: int):
+        documents.append(SubmissionDocument(
+            doc_type=(fields.get('TYPE') or '').upper(),
+            sequence=fields.get('SEQUENCE'),
+            filename=fields.get('FILENAME'),
+            description=fields.get('DESCRIPTION'),
+            start=fields.get('text_start', fields['document_start']),
+            end=fields.get('text_end', end)
+        ))
+
+    for tag, value, line_start, line_end in tags:
+        tag = tag.upper()
+        if tag == 'DOCUMENT':
+            if fields is not None:
+                close(line_start)
+            fields = {'document_start': min(line_end + 1, length)}
+        elif fields is None:
+            continue
+        elif tag in DESCRIPTIVE_TAGS:
+            fields.setdefault(tag, value.strip())
+        elif tag == 'TEXT':
+            fields.setdefault('text_start', min(line_end + 1, length))
+        elif tag == '/TEXT':
+            fields.setdefault('text_end', line_start)
+        elif tag == '/DOCUMENT':
+            close(line_start)
+            fields = None
+
+    if fields is not None:
+        close(length)
+    return documents
+
+
+class SubmissionIndex:
+    """
+    Offsets of every <DOCUMENT> in a submission, found in one pass.
+
+    Document text is only materialized when asked for, through the loader
+    the index was built with, so an index over a memory-mapped submission
+    decodes nothing up front.
+    """
+
+    def __init__(self, documents: List[SubmissionDocument], loader: Callable[[int, int], str]):
+        """
+        Args:
+            documents: Indexed documents in submission order
+            loader: Returns the text between two offsets
+        """
+        self.documents = documents
+        self._loader = loader
+
+    @classmethod
+    def from_text(cls, text: str) -> "SubmissionIndex":
+        """Index a decoded submission."""
+        tags = (
+            (m.group('tag'), m.group('value'), m.start(), m.end())
+            for m in SGML_TAG_PATTERN.finditer(text)
+        )
+        return cls(build_documents(tags, len(text)), lambda start, end: text[start:end])
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def find(self, type_prefixes: Iterable[str]) -> Optional[SubmissionDocument]:
+        """
+        First document whose <TYPE> starts with one of the prefixes.
+
+        Args:
+            type_prefixes: Upper-case type prefixes, e.g. ('EX-13',) also matches 'EX-13.1'
+
+        Returns:
+            Matching document or None
+        """
+        prefixes = tuple(type_prefixes)
+        for document in self.documents:
+            if document.doc_type.startswith(prefixes):
+                return document
+        return None
+
+    def text(self, document: SubmissionDocument) -> str:
+        """Text of an indexed document."""
+        return self._loader(document.start, document.end)
@@ -0,0 +1,412 @@
+"""Per-line feature matrix and vectorized table-block detection."""
+
+import re
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import List, Sequence, Set, Tuple
+import numpy as np
+from config.settings import TABLE_MIN_ROWS, TABLE_MIN_DIGIT_DENSITY, TABLE_MIN_GUTTER
+from src.utils.line_classifier import COLUMNAR, DELIMITER, HEADER, PIPE
+
+# Byte -> is whitespace, for indexing with a uint8 array
+IS_WHITESPACE = np.zeros(256, dtype=bool)
+IS_WHITESPACE[[ord(' '), ord('\t'), ord('\r'), ord('\n')]] = True
+
+# Byte -> b'0' for whitespace, b'1' otherwise: a row's occupancy as a binary numeral
+OCCUPANCY_DIGITS = bytes(ord('0') if IS_WHITESPACE[byte] else ord('1') for byte in range(256))
+
+# Text of one cell: words separated by single spaces
+CELL_TEXT_PATTERN = re.compile(r'[^ ]+(?: [^ ]+)*')
+# Matches at the character before a cut that falls inside such a run
+SPLIT_RUN_PATTERN = re.compile(r'[^ ] ?[^ ]|(?<=[^ ]) [^ ]')
+
+
+@dataclass
+class LineFeatures:
+    """Feature matrix of a section, one entry per line."""
+    starts: np.ndarray  # Offset of each line in the section
+    lengths: np.ndarray  # Characters per line
+    nonspace: np.ndarray  # Non-whitespace characters per line
+    digits: np.ndarray  # ASCII digits per line
+    numeric_tokens: np.ndarray  # Runs of digits (with ',' and '.' inside) per line
+    flags: np.ndarray  # line_classifier flags per line
+    chars: np.ndarray  # The section as one byte per character (non-ASCII as '?')
+
+    @property
+    def digit_density(self) -> np.ndarray:
+        return self.digits / np.maximum(self.nonspace, 1)
+
+
+def _per_line_sums(mask: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    # One reduceat over the interleaved bounds of the sorted, disjoint ranges; a
+    # cumsum would first widen every character to int64
+    if not len(starts):
+        return np.zeros(0, dtype=np.int64)
+    padded = np.append(mask, False).view(np.uint8)
+    bounds = np.stack((starts, ends), axis=1).ravel()
+    sums = np.add.reduceat(padded, bounds, dtype=np.int64)[::2]
+    sums[starts == ends] = 0
+    return sums
+
+
+def line_features(text: str, line_flags: Sequence[int]) -> LineFeatures:
+    """
+    Build the feature matrix of a section in a few whole-text array passes.
+
+    Args:
+        text: Section text
+        line_flags: line_classifier flags of each line of text
+
+    Returns:
+        LineFeatures of text
+    """
+    chars = np.frombuffer(text.encode('ascii', 'replace'), dtype=np.uint8)
+    newlines = np.flatnonzero(chars == ord('\n'))
+    starts = np.concatenate(([0], newlines + 1))
+    ends = np.append(newlines, len(chars))
+
+    is_digit = (chars >= ord('0')) & (chars <= ord('9'))
+    in_number = is_digit | (chars == ord(',')) | (chars == ord('.'))
+    token_start = is_digit.copy()
+    token_start[1:] &= ~in_number[:-1]
+
+    return LineFeatures(
+        starts=starts,
+        lengths=ends - starts,
+        nonspace=_per_line_sums(~IS_WHITESPACE[chars], starts, ends),
+        digits=_per_line_sums(is_digit, starts, ends),
+        numeric_tokens=_per_line_sums(token_start, starts, ends),
+        flags=np.frombuffer(bytes(line_flags), dtype=np.uint8),
+        chars=chars
+    )
+
+
+def table_blocks(features: LineFeatures) -> List[Tuple[int, int, int]]:
+    """
+    Line ranges of candidate tables.
+
+    A row is a delimiter, pipe or column-gapped line, or a line of two or
+    more numbers that are at least TABLE_MIN_DIGIT_DENSITY of its text. A
+    block is a run of rows in which single blank lines are allowed (two
+    blank lines end a table, as in the line-by-line detector, and a blank
+    line between pipe and other rows ends it too), extended upward over the
+    header lines directly above it.
+
+    Args:
+        features: Output of line_features
+
+    Returns:
+        Inclusive (start_line, end_line, first_row) ranges with at least
+        TABLE_MIN_ROWS rows; lines before first_row are header lines
+    """
+    flags = features.flags
+    blank = features.nonspace == 0
+    pipe = (flags & PIPE) != 0
+    numeric_row = (features.numeric_tokens >= 2) & (features.digit_density >= TABLE_MIN_DIGIT_DENSITY)
+    row = ~blank & (((flags & (COLUMNAR | PIPE | DELIMITER)) != 0) | numeric_row)
+
+    # Bridge single blank lines between rows of the same kind
+    bridged = row.copy()
+    bridged[1:-1] |= blank[1:-1] & row[:-2] & row[2:] & (pipe[:-2] == pipe[2:])
+
+    edges = np.diff(np.concatenate(([0], bridged.view(np.int8), [0])))
+    run_starts = np.flatnonzero(edges == 1)
+    run_ends = np.flatnonzero(edges == -1) - 1
+
+    row_counts = _per_line_sums(row, run_starts, run_ends + 1)
+    is_header = ~blank & ((flags & HEADER) != 0)
+
+    blocks = []
+    for first_row, end, rows in zip(run_starts, run_ends, row_counts):
+        if rows < TABLE_MIN_ROWS:
+            continue
+        start = first_row
+        while start > 0 and is_header[start - 1] and not row[start - 1]:
+            start -= 1
+        blocks.append((int(start), int(end), int(first_row)))
+    return blocks
+
+
+def block_rows(features: LineFeatures, blocks: Sequence[Tuple[int, int]]) -> List[Tuple[List[int], int, bool]]:
+    """
+    Row lines of every block, counted in whole-section array passes.
+
+    Args:
+        features: Output of line_features
+        blocks: (start_line, end_line) of each block, inclusive, disjoint
+
+    Returns:
+        For each block, its row line numbers (non-blank lines other than
+        rules), how many of them are pipe rows, and whether it has a rule
+    """
+    if not len(blocks):
+        return []
+    bounds = np.asarray(blocks, dtype=np.int64)[:, :2].copy()
+    bounds[:, 1] += 1
+
+    rule = (features.flags & DELIMITER) != 0
+    row = (features.nonspace > 0) & ~rule
+    pipe_rows = _per_line_sums(row & ((features.flags & PIPE) != 0), bounds[:, 0], bounds[:, 1]).tolist()
+    rules = _per_line_sums(rule, bounds[:, 0], bounds[:, 1]).tolist()
+
+    rows = np.flatnonzero(row)
+    row_bounds = np.searchsorted(rows, bounds).tolist()
+    rows = rows.tolist()
+    return [(rows[first:last], pipes, bool(rule_count))
+            for (first, last), pipes, rule_count in zip(row_bounds, pipe_rows, rules)]
+
+
+def block_columns(features: LineFeatures, blocks: Sequence[Tuple[int, int]], data_lines: np.ndarray,
+                  min_gutter: int = TABLE_MIN_GUTTER) -> List[List[Tuple[int, int]]]:
+    """
+    Column spans of every block, from the whitespace gutters shared by its data lines.
+
+    The non-space columns of all data lines of all blocks are marked in one
+    (block x column) occupancy matrix; a column of a block is a run of
+    occupied columns, and runs closer together than min_gutter empty
+    columns (spaces inside a cell) are merged.
+
+    Args:
+        features: Output of line_features
+        blocks: (start_line, end_line) of each block, inclusive, disjoint
+        data_lines: Boolean mask of the lines whose characters define the
+            gutters (headers and rules spanning columns left out)
+        min_gutter: Empty columns that separate two columns
+
+    Returns:
+        For each block, (start, end) column spans with end exclusive
+    """
+    if not len(blocks):
+        return []
+    bounds = np.asarray(blocks, dtype=np.int64)[:, :2]
+
+    # Block of each line, -1 outside blocks
+    block_of_line = np.full(len(features.lengths), -1, dtype=np.int64)
+    sizes = bounds[:, 1] - bounds[:, 0] + 1
+    block_lines = np.repeat(bounds[:, 0] - np.cumsum(sizes) + sizes, sizes) + np.arange(sizes.sum())
+    block_of_line[block_lines] = np.repeat(np.arange(len(bounds)), sizes)
+
+    # Every character of the data lines, with its column
+    lines = np.flatnonzero((block_of_line >= 0) & data_lines)
+    lengths = features.lengths[lines]
+    line_of_char = np.repeat(lines, lengths)
+    columns = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    filled = ~IS_WHITESPACE[features.chars[features.starts[line_of_char] + columns]]
+
+    width = int(lengths.max()) if len(lengths) else 0
+    occupied = np.zeros((len(bounds), width + 2), dtype=bool)
+    occupied[block_of_line[line_of_char[filled]], columns[filled] + 1] = True
+
+    # Runs of occupied columns, in (block, column) order
+    edges = np.diff(occupied.view(np.int8), axis=1)
+    run_blocks, run_starts = np.nonzero(edges == 1)
+    _, run_ends = np.nonzero(edges == -1)
+
+    # Merge runs separated by gaps narrower than a gutter
+    keep = np.ones(len(run_starts), dtype=bool)
+    keep[1:] = (run_blocks[1:] != run_blocks[:-1]) | (run_starts[1:] - run_ends[:-1] >= min_gutter)
+    kept = np.flatnonzero(keep)
+    span_ends = run_ends[np.append(kept[1:] - 1, len(run_ends) - 1)] if len(kept) else run_ends
+
+    spans: List[List[Tuple[int, int]]] = [[] for _ in range(len(bounds))]
+    for block, start, end in zip(run_blocks[kept].tolist(), run_starts[kept].tolist(), span_ends.tolist()):
+        spans[block].append((start, end))
+    return spans
+
+
+def gutter_columns(rows: Sequence[str], min_gutter: int = TABLE_MIN_GUTTER) -> List[Tuple[int, int]]:
+    """
+    Column spans of one table, from the whitespace gutters shared by all its rows.
+
+    Each row becomes an integer bitmask of its non-space columns and the
+    masks are ORed, so a right-aligned number or a wrapped label on any
+    row widens its column instead of being cut against the header.
+
+    Args:
+        rows: Lines whose characters define the gutters
+        min_gutter: Empty columns that separate two columns
+
+    Returns:
+        (start, end) column spans with end exclusive
+    """
+    width = max(map(len, rows), default=0)
+    if not width:
+        return []
+    occupied = 0
+    for row in rows:
+        occupied |= int(row.encode('ascii', 'replace').translate(OCCUPANCY_DIGITS).ljust(width, b'0'), 2)
+
+    # Runs of occupied columns, and the gaps narrower than a gutter inside them
+    column = '1+' if min_gutter <= 1 else f'1+(?:0{{1,{min_gutter - 1}}}1+)*'
+    return [match.span() for match in re.finditer(column, format(occupied, 'b').zfill(width))]
+
+
+def cut_cells(line: str, columns: Sequence[Tuple[int, int]]) -> List[str]:
+    """
+    Cells of one row, one per column.
+
+    The row is cut at the start of each column after the first. A cut that
+    falls inside a run of words moves to the edge of the run, so that the
+    run lands whole in the cell it overlaps most: a heading spanning two
+    columns is not split mid-word.
+
+    Args:
+        line: Table row
+        columns: (start, end) column spans, end exclusive, in order
+
+    Returns:
+        One string per column, '' where the row has no text
+    """
+    if not columns:
+        return []
+    cuts = [start for start, _ in columns[1:]]
+
+    if any(SPLIT_RUN_PATTERN.match(line, cut - 1) for cut in cuts):
+        for match in CELL_TEXT_PATTERN.finditer(line):
+            start, end = match.span()
+            crossed = range(bisect_right(cuts, start), bisect_left(cuts, end))
+            if not crossed:
+                continue
+            # Slice k runs from cut k - 1 to cut k; keep the run in the one it overlaps most
+            edges = [start] + [cuts[k] for k in crossed] + [end]
+            best = max(range(len(edges) - 1), key=lambda i: edges[i + 1] - edges[i])
+            for i, k in enumerate(crossed):
+                cuts[k] = start if i < best else end
+
+    bounds = [0] + cuts + [len(line)]
+    return [line[bounds[i]:bounds[i + 1]].strip() for i in range(len(columns))]
+
+
+def split_run_lines(features: LineFeatures, blocks: Sequence[Tuple[int, int]],
+                    block_spans: Sequence[Sequence[Tuple[int, int]]]) -> np.ndarray:
+    """
+    Lines on which a column start of their block falls inside a run of words.
+
+    The SPLIT_RUN_PATTERN test of cut_cells, for every (line, column start)
+    pair of every block at once; only the flagged lines need cut_cells to
+    move a cut, the others can be cut at the column starts as they are.
+
+    Args:
+        features: Output of line_features
+        blocks: (start_line, end_line) of each block, inclusive, disjoint
+        block_spans: Column spans of each block (output of block_columns)
+
+    Returns:
+        Boolean mask over the lines of the section
+    """
+    split = np.zeros(len(features.lengths), dtype=bool)
+    if not len(blocks):
+        return split
+    bounds = np.asarray(blocks, dtype=np.int64)[:, :2]
+    sizes = bounds[:, 1] - bounds[:, 0] + 1
+    cut_counts = np.array([max(len(spans) - 1, 0) for spans in block_spans], dtype=np.int64)
+    cuts = np.array([start for spans in block_spans for start, _ in spans[1:]], dtype=np.int64)
+    cut_offsets = np.cumsum(cut_counts) - cut_counts
+
+    # One (line, cut) pair per column start after the first, for every line of every block
+    lines = np.repeat(bounds[:, 0] - np.cumsum(sizes) + sizes, sizes) + np.arange(sizes.sum())
+    line_blocks = np.repeat(np.arange(len(bounds)), sizes)
+    pair_counts = cut_counts[line_blocks]
+    pair_lines = np.repeat(lines, pair_counts)
+    pair_cuts = cuts[
+        np.arange(pair_counts.sum()) - np.repeat(np.cumsum(pair_counts) - pair_counts, pair_counts)
+        + np.repeat(cut_offsets[line_blocks], pair_counts)
+    ]
+
+    # Outside its line, a column reads as the space appended here
+    chars = np.append(features.chars, np.uint8(ord(' ')))
+
+    def text_at(offset: int) -> np.ndarray:
+        # Non-space character (as SPLIT_RUN_PATTERN's [^ ]) at pair_cuts + offset
+        columns = pair_cuts + offset
+        inside = (columns >= 0) & (columns < features.lengths[pair_lines])
+        return chars[np.where(inside, features.starts[pair_lines] + columns, len(chars) - 1)] != ord(' ')
+
+    before, at, after = text_at(-1), text_at(0), text_at(1)
+    split_run = (before & (at | after)) | (text_at(-2) & ~before & at)
+    split[pair_lines[split_run]] = True
+    return split
+
+
+def cut_rows(lines: Sequence[str], columns: Sequence[Tuple[int, int]], split: Sequence[bool]) -> List[List[str]]:
+    """
+    Cells of rows sharing one set of columns (see cut_cells).
+
+    Args:
+        lines: Table rows
+        columns: (start, end) column spans, end exclusive, in order
+        split: For each row, whether a column start falls inside a run of
+            words (see split_run_lines); only those rows go through cut_cells
+
+    Returns:
+        One list of cells per row
+    """
+    if not columns:
+        return [[] for _ in lines]
+    starts = [0] + [start for start, _ in columns[1:]]
+    slices = [slice(start, end) for start, end in zip(starts, starts[1:] + [None])]
+    return [
+        cut_cells(line, columns) if split_line else [line[cell].strip() for cell in slices]
+        for line, split_line in zip(lines, split)
+    ]
+
+
+@dataclass
+class TableAgreement:
+    """How the tables of two detectors line up on one section."""
+    reference_tables: int
+    candidate_tables: int
+    exact_matches: int  # Candidate tables with the same line range as a reference table
+    overlapping: int  # Candidate tables overlapping a reference table without matching it
+    reference_only: int  # Reference tables no candidate table overlaps
+    candidate_only: int  # Candidate tables overlapping no reference table
+    reference_lines: int  # Lines inside reference tables
+    candidate_lines: int
+    shared_lines: int  # Lines inside tables of both
+
+    @property
+    def line_agreement(self) -> float:
+        """Jaccard similarity of the two detectors' table lines (1.0 when neither finds a table)."""
+        union = self.reference_lines + self.candidate_lines - self.shared_lines
+        return self.shared_lines / union if union else 1.0
+
+
+def _line_set(ranges: Sequence[Tuple[int, int]]) -> Set[int]:
+    return {line for start, end in ranges for line in range(start, end + 1)}
+
+
+def compare_tables(reference: Sequence[Tuple[int, int]],
+                   candidate: Sequence[Tuple[int, int]]) -> TableAgreement:
+    """
+    Agreement between two detectors' tables.
+
+    Args:
+        reference: Inclusive (start_line, end_line) of each reference table
+        candidate: Inclusive (start_line, end_line) of each candidate table
+
+    Returns:
+        TableAgreement
+    """
+    def overlaps(a, b):
+        return a[0] <= b[1] and b[0] <= a[1]
+
+    reference_set = set(reference)
+    exact = sum(1 for span in candidate if span in reference_set)
+    overlapping = sum(
+        1 for span in candidate
+        if span not in reference_set and any(overlaps(span, other) for other in reference)
+    )
+    reference_lines = _line_set(reference)
+    candidate_lines = _line_set(candidate)
+
+    return TableAgreement(
+        reference_tables=len(reference),
+        candidate_tables=len(candidate),
+        exact_matches=exact,
+        overlapping=overlapping,
+        reference_only=sum(1 for span in reference if not any(overlaps(span, other) for other in candidate)),
+        candidate_only=len(candidate) - exact - overlapping,
+        reference_lines=len(reference_lines),
+        candidate_lines=len(candidate_lines),
+        shared_lines=len(reference_lines & candidate_lines)
+    )
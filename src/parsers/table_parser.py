@@ -1,12 +1,21 @@
 """Parser for detecting and preserving tables within MD&A sections."""
 
 import re
+from bisect import bisect_right
 
-import pandas as pd
 from typing import List, Dict, Tuple, Optional, Set
 from dataclasses import dataclass
 from config.patterns import COMPILED_PATTERNS
-from config.settings import TABLE_MIN_COLUMNS, TABLE_MIN_ROWS
+from config.settings import TABLE_MIN_COLUMNS, TABLE_MIN_ROWS, TABLE_DETECTOR, TABLE_MAX_CONTINUATION_CHARS
+from src.parsers.table_features import (
+    CELL_TEXT_PATTERN, TableAgreement, block_columns, block_rows, compare_tables, cut_cells, cut_rows,
+    gutter_columns, line_features, split_run_lines, table_blocks
+)
+from src.utils.line_classifier import (
+    COLUMNAR, DELIMITER, FINANCIAL_NUMBER_PATTERN, HEADER, PIPE, TABLE_DATA, TABLE_LINE, classify_line,
+    classify_lines
+)
+from src.utils.line_index import LineIndex
 from src.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -26,40 +35,90 @@ class Table:
     original_text: str  # Preserve original formatting
 
 
+TABLE_DETECTORS = ("rules", "vector")
+
+
 class TableParser:
     """Detects and preserves tables within text."""
 
-    def __init__(self):
+    def __init__(self, detector: str = TABLE_DETECTOR):
+        """
+        Args:
+            detector: 'rules' walks the lines one by one; 'vector' (experimental)
+                finds table blocks and column gutters on a NumPy feature matrix
+        """
+        if detector not in TABLE_DETECTORS:
+            raise ValueError(f"Unknown table detector {detector!r}; expected one of {TABLE_DETECTORS}")
         self.patterns = COMPILED_PATTERNS
+        self.detector = detector
 
-    def identify_tables(self, text: str) -> List[Table]:
+    def identify_tables(self, text: str, line_index: Optional[LineIndex] = None,
+                        line_flags: Optional[bytearray] = None) -> List[Table]:
         """
         Identify tables in text while preserving their original formatting.
 
         Args:
             text: Text containing potential tables
+            line_index: Line-offset index of text, built here if not supplied
+            line_flags: line_classifier flags of each line of text (e.g. from
+                TextNormalizer.normalize_with_line_flags), computed here if not supplied
 
         Returns:
             List of Table objects with position information
         """
         tables = []
         lines = text.split('\n')
+        if line_flags is None or len(line_flags) != len(lines):
+            line_flags = classify_lines(lines)
 
-        # Track which lines are part of tables
-        table_lines = set()
+        if self.detector == "vector":
+            # Blocks are disjoint, so there is nothing to deduplicate
+            tables.extend(self._identify_tables_vectorized(text, lines, line_flags))
+        else:
+            # Track which lines are part of tables
+            table_lines = set()
 
-        # Try different detection methods
-        tables.extend(self._identify_delimited_tables(lines, table_lines))
-        tables.extend(self._identify_aligned_tables(lines, table_lines))
+            # Try different detection methods
+            tables.extend(self._identify_delimited_tables(lines, table_lines, line_flags))
+            tables.extend(self._identify_aligned_tables(lines, table_lines, line_flags))
 
-        # Remove duplicates and overlaps
-        tables = self._deduplicate_tables(tables)
+            # Remove duplicates and overlaps
+            tables = self._deduplicate_tables(tables)
 
         # Sort by position
         tables.sort(key=lambda t: t.start_line)
 
+        # Resolve character offsets from line numbers
+        if tables:
+            if line_index is None:
+                line_index = LineIndex(text)
+            for table in tables:
+                table.start_pos = line_index.line_offset(table.start_line)
+                table.end_pos = line_index.line_end(min(table.end_line, len(line_index) - 1))
+
         return tables
 
+    def compare_detectors(self, text: str, line_flags: Optional[bytearray] = None) -> TableAgreement:
+        """
+        Run both detectors on the same text and report how their tables agree.
+
+        Args:
+            text: Text containing potential tables
+            line_flags: line_classifier flags of each line of text, computed here if not supplied
+
+        Returns:
+            TableAgreement with the rules detector as the reference
+        """
+        lines = text.split('\n')
+        if line_flags is None or len(line_flags) != len(lines):
+            line_flags = classify_lines(lines)
+
+        spans = {}
+        for detector in TABLE_DETECTORS:
+            tables = TableParser(detector).identify_tables(text, line_flags=line_flags)
+            spans[detector] = [(table.start_line, table.end_line) for table in tables]
+        return compare_tables(spans["rules"], spans["vector"])
+
     def preserve_tables_in_text(self, text: str, tables: List[Table]) -> str:
         """
         Return text with tables preserved in their original positions.
@@ -93,7 +152,8 @@ class TableParser:
 
         return '\n'.join(lines)
 
-    def _identify_delimited_tables(self, lines: List[str], table_lines: Set[int]) -> List[Table]:
+    def _identify_delimited_tables(self, lines: List[str], table_lines: Set[int],
+                                   line_flags: bytearray) -> List[Table]:
         """Identify tables with clear delimiters."""
         tables = []
         i = 0
@@ -105,8 +165,8 @@ class TableParser:
                 continue
 
             # Check for horizontal delimiter
-            if self._is_horizontal_delimiter(lines[i]):
-                table = self._extract_delimited_table(lines, i, table_lines)
+            if line_flags[i] & DELIMITER:
+                table = self._extract_delimited_table(lines, i, table_lines, line_flags)
                 if table:
                     tables.append(table)
                     # Mark lines as part of table
@@ -116,8 +176,8 @@ class TableParser:
                 else:
                     i += 1
             # Check for pipe-delimited table
-            elif '|' in lines[i] and lines[i].count('|') >= 2:
-                table = self._extract_pipe_table(lines, i, table_lines)
+            elif line_flags[i] & PIPE:
+                table = self._extract_pipe_table(lines, i, table_lines, line_flags)
                 if table:
                     tables.append(table)
                     for line_num in range(table.start_line, table.end_line + 1):
@@ -130,7 +190,8 @@ class TableParser:
 
         return tables
 
-    def _identify_aligned_tables(self, lines: List[str], table_lines: Set[int]) -> List[Table]:
+    def _identify_aligned_tables(self, lines: List[str], table_lines: Set[int],
+                                 line_flags: bytearray) -> List[Table]:
         """Identify space-aligned tables."""
         tables = []
         i = 0
@@ -142,8 +203,8 @@ class TableParser:
                 continue
 
             # Look for potential table headers
-            if self._looks_like_table_header(lines[i]):
-                table = self._extract_aligned_table(lines, i, table_lines)
+            if line_flags[i] & HEADER:
+                table = self._extract_aligned_table(lines, i, table_lines, line_flags)
                 if table:
                     tables.append(table)
                     for line_num in range(table.start_line, table.end_line + 1):
@@ -156,61 +217,54 @@ class TableParser:
 
         return tables
 
-    def _is_horizontal_delimiter(self, line: str) -> bool:
-        """Check if line is a horizontal delimiter."""
-        stripped = line.strip()
-        if len(stripped) < 3:
-            return False
+    def _identify_tables_vectorized(self, text: str, lines: List[str], line_flags: bytearray) -> List[Table]:
+        """Identify table blocks and their column gutters from the section's feature matrix."""
+        features = line_features(text, line_flags)
+        blocks = table_blocks(features)
 
-        # Check for lines made of dashes, equals, or underscores
-        delimiter_chars = {'-', '=', '_'}
-        unique_chars = set(stripped.replace(' ', ''))
+        # Gutters come from the data rows; rules and header lines spanning columns would cover them
+        data_lines = (features.nonspace > 0) & ((features.flags & DELIMITER) == 0)
+        for start_line, _, first_row in blocks:
+            data_lines[start_line:first_row] = False
+        block_spans = block_columns(features, blocks, data_lines)
+        split = split_run_lines(features, blocks, block_spans).tolist()
 
-        return len(unique_chars) == 1 and unique_chars.issubset(delimiter_chars)
+        tables = []
+        for (start_line, end_line, _), columns, (row_lines, pipe_rows, delimited) in zip(
+                blocks, block_spans, block_rows(features, blocks)):
+            if pipe_rows * 2 >= len(row_lines):
+                content = [cells for cells in (self._split_pipe_cells(lines[i]) for i in row_lines) if cells]
+                table_type, confidence = 'delimited', 0.95
+            elif len(columns) < TABLE_MIN_COLUMNS:
+                continue
+            else:
+                content = cut_rows([lines[i] for i in row_lines], columns, [split[i] for i in row_lines])
+                if delimited:
+                    table_type, confidence = 'delimited', 0.9
+                else:
+                    table_type, confidence = 'aligned', 0.8
+
+            tables.append(Table(
+                content=content,
+                start_pos=0,
+                end_pos=0,
+                start_line=start_line,
+                end_line=end_line,
+                title=self._extract_table_title(lines, start_line, line_flags),
+                confidence=confidence,
+                table_type=table_type,
+                original_text='\n'.join(lines[start_line:end_line + 1])
+            ))
+
+        return tables
 
     def _is_table_line(self, line: str) -> bool:
         """Check if a line appears to be part of a table."""
-        # Has multiple segments separated by significant spaces
-        if re.search(r'\s{3,}', line):
-            segments = re.split(r'\s{3,}', line.strip())
-            if len(segments) >= 2:
-                return True
-
-        # Has pipe delimiters
-        if '|' in line and line.count('|') >= 2:
-            return True
-
-        # Is a delimiter line
-        if self._is_horizontal_delimiter(line):
-            return True
-
-        return False
-
-    def _looks_like_table_header(self, line: str) -> bool:
-        """Check if line looks like a table header."""
-        # Check for date headers
-        if re.search(r'(?:Year|Period|Quarter|Month)\s+End(?:ed|ing)', line, re.IGNORECASE):
-            return True
-
-        # Check for financial statement headers
-        if re.search(r'(?:December|June|March|September)\s+\d{1,2},?\s+20\d{2}', line, re.IGNORECASE):
-            return True
-
-        # Check for columnar structure with common headers
-        segments = re.split(r'\s{3,}', line.strip())
-        if len(segments) >= TABLE_MIN_COLUMNS:
-            header_keywords = ['total', 'year', 'quarter', 'revenue', 'income', 'assets',
-                             'change', 'increase', 'decrease', '%', '$', '2019', '2020',
-                             '2021', '2022', '2023', '2024']
-            matches = sum(1 for seg in segments
-                         if any(keyword in seg.lower() for keyword in header_keywords))
-            if matches >= 1:
-                return True
-
-        return False
+        # Column gaps, pipe delimiters or a delimiter line
+        return bool(classify_line(line) & TABLE_LINE)
 
     def _extract_delimited_table(self, lines: List[str], delimiter_line: int,
-                                table_lines: Set[int]) -> Optional[Table]:
+                                table_lines: Set[int], line_flags: bytearray) -> Optional[Table]:
         """Extract a table with horizontal delimiter."""
         # Look for header above delimiter
         if delimiter_line > 0 and not lines[delimiter_line - 1].strip():
@@ -228,6 +282,8 @@ class TableParser:
 
         # Skip delimiter
         current_line = delimiter_line + 1
+        end_line = delimiter_line
+        data_rows = []
 
         # Collect data rows
         consecutive_empty = 0
@@ -239,8 +295,10 @@ class TableParser:
             else:
                 consecutive_empty = 0
                 # Check if line looks like table data
-                if self._looks_like_table_data(line):
+                if line_flags[current_line] & TABLE_DATA:
                     table_content.append(line)
+                    data_rows.append(line)
+                    end_line = current_line
                 else:
                     break
 
@@ -250,16 +308,21 @@ class TableParser:
             return None
 
         # Find title
-        title = self._extract_table_title(lines, start_line)
+        title = self._extract_table_title(lines, start_line, line_flags)
 
         # Preserve original text
-        end_line = start_line + len(table_content)
         original_lines = lines[start_line:end_line + 1]
         original_text = '\n'.join(original_lines)
 
+        # Cut cells at the gutters shared by the data rows, as for aligned tables;
+        # splitting on every space breaks multi-word labels and '$ 1,234' apart
+        column_positions = gutter_columns(data_rows)
+        if len(column_positions) < TABLE_MIN_COLUMNS:
+            column_positions = gutter_columns(table_content)
+
         return Table(
-            content=[line.split() for line in table_content],
-            start_pos=0,  # Will be calculated later if needed
+            content=[self._extract_cells_by_position(line, column_positions) for line in table_content],
+            start_pos=0,  # Resolved from line numbers in identify_tables
             end_pos=0,
             start_line=start_line,
             end_line=end_line,
@@ -270,7 +333,7 @@ class TableParser:
         )
 
     def _extract_pipe_table(self, lines: List[str], start_line: int,
-                           table_lines: Set[int]) -> Optional[Table]:
+                           table_lines: Set[int], line_flags: bytearray) -> Optional[Table]:
         """Extract a pipe-delimited table."""
         table_content = []
         current_line = start_line
@@ -289,17 +352,12 @@ class TableParser:
         # Parse pipe-delimited content
         parsed_content = []
         for line in table_content:
-            cells = [cell.strip() for cell in line.split('|')]
-            # Remove empty cells at start/end
-            if cells and not cells[0]:
-                cells = cells[1:]
-            if cells and not cells[-1]:
-                cells = cells[:-1]
+            cells = self._split_pipe_cells(line)
             if cells:
                 parsed_content.append(cells)
 
         # Find title
-        title = self._extract_table_title(lines, start_line)
+        title = self._extract_table_title(lines, start_line, line_flags)
 
         # Preserve original
         end_line = start_line + len(table_content) - 1
@@ -317,8 +375,18 @@ class TableParser:
             original_text=original_text
         )
 
+    def _split_pipe_cells(self, line: str) -> List[str]:
+        """Cells of a pipe-delimited row."""
+        cells = [cell.strip() for cell in line.split('|')]
+        # Remove empty cells at start/end
+        if cells and not cells[0]:
+            cells = cells[1:]
+        if cells and not cells[-1]:
+            cells = cells[:-1]
+        return cells
+
     def _extract_aligned_table(self, lines: List[str], start_line: int,
-                              table_lines: Set[int]) -> Optional[Table]:
+                              table_lines: Set[int], line_flags: bytearray) -> Optional[Table]:
         """Extract a space-aligned table."""
         # Determine column positions from header
         header = lines[start_line]
@@ -328,6 +396,8 @@ class TableParser:
             return None
 
         table_content = [header]
+        data_rows = []  # Column-gapped rows below the header
+        end_line = start_line
         current_line = start_line + 1
         consecutive_empty = 0
 
@@ -341,15 +411,18 @@ class TableParser:
             else:
                 consecutive_empty = 0
 
-            # Check if line aligns with columns
-            if self._line_matches_columns(line, column_positions):
+            # Rows have a column gap and text under the header's columns; prose
+            # spans the columns too, but TextNormalizer leaves it without gaps
+            if line_flags[current_line] & COLUMNAR and self._line_matches_columns(line, column_positions):
+                table_content.append(line)
+                data_rows.append(line)
+            # Check if it's a continuation or total line
+            elif self._is_table_continuation(line, column_positions):
                 table_content.append(line)
             else:
-                # Check if it's a continuation or total line
-                if self._is_table_continuation(line):
-                    table_content.append(line)
-                else:
-                    break
+                break
+
+            end_line = current_line
 
             current_line += 1
 
@@ -357,17 +430,18 @@ class TableParser:
             return None
 
         # Find title
-        title = self._extract_table_title(lines, start_line)
+        title = self._extract_table_title(lines, start_line, line_flags)
 
         # Preserve original formatting
-        end_line = start_line + len(table_content) - 1
         original_text = '\n'.join(table_content)
 
-        # Parse content while preserving alignment
-        parsed_content = []
-        for line in table_content:
-            cells = self._extract_cells_by_position(line, column_positions)
-            parsed_content.append(cells)
+        # Cut cells at the gutters shared by the data rows; the header alone
+        # misplaces right-aligned numbers and wrapped labels
+        gutters = gutter_columns(data_rows)
+        if len(gutters) >= TABLE_MIN_COLUMNS:
+            column_positions = gutters
+
+        parsed_content = [self._extract_cells_by_position(line, column_positions) for line in table_content]
 
         return Table(
             content=parsed_content,
@@ -383,28 +457,8 @@ class TableParser:
 
     def _find_column_boundaries(self, header: str) -> List[Tuple[int, int]]:
         """Find column boundaries in header line."""
-        # Look for transitions between text and spaces
-        boundaries = []
-        in_text = False
-        start = 0
-
-        for i, char in enumerate(header + ' '):
-            if char != ' ' and not in_text:
-                start = i
-                in_text = True
-            elif char == ' ' and in_text:
-                # Check if we've hit a column boundary (multiple spaces)
-                spaces_ahead = 0
-                j = i
-                while j < len(header) and header[j] == ' ':
-                    spaces_ahead += 1
-                    j += 1
-
-                if spaces_ahead >= 2 or j >= len(header):
-                    boundaries.append((start, i))
-                    in_text = False
-
-        return boundaries
+        # Runs of text separated by two or more spaces
+        return [match.span() for match in CELL_TEXT_PATTERN.finditer(header)]
 
     def _line_matches_columns(self, line: str, column_positions: List[Tuple[int, int]]) -> bool:
         """Check if line content aligns with column positions."""
@@ -420,39 +474,24 @@ class TableParser:
 
     def _extract_cells_by_position(self, line: str, column_positions: List[Tuple[int, int]]) -> List[str]:
         """Extract cell values based on column positions."""
-        cells = []
-
-        for i, (start, end) in enumerate(column_positions):
-            if i < len(column_positions) - 1:
-                next_start = column_positions[i + 1][0]
-                cell = line[start:next_start].strip() if start < len(line) else ''
-            else:
-                cell = line[start:].strip() if start < len(line) else ''
-            cells.append(cell)
-
-        return cells
+        return cut_cells(line, column_positions)
 
-    def _looks_like_table_data(self, line: str) -> bool:
-        """Check if line looks like table data."""
-        # Contains numbers
-        if re.search(r'\d', line):
-            return True
-
-        # Has columnar structure
-        if re.search(r'\s{3,}', line):
-            segments = re.split(r'\s{3,}', line.strip())
-            if len(segments) >= 2:
-                return True
-
-        return False
-
-    def _is_table_continuation(self, line: str) -> bool:
+    def _is_table_continuation(self, line: str, column_positions: List[Tuple[int, int]]) -> bool:
         """Check if line is a table continuation (like totals)."""
         continuation_keywords = ['total', 'subtotal', 'net', 'gross', 'sum']
         line_lower = line.lower()
-        return any(keyword in line_lower for keyword in continuation_keywords)
+        if not any(keyword in line_lower for keyword in continuation_keywords):
+            return False
 
-    def _extract_table_title(self, lines: List[str], table_start: int) -> Optional[str]:
+        # A label alone, or a label with an amount as the cell of a value column;
+        # prose that mentions "net sales" is neither, its words stay in one cell
+        if len(line.strip()) <= TABLE_MAX_CONTINUATION_CHARS:
+            return True
+        cells = cut_cells(line, column_positions)
+        return any(FINANCIAL_NUMBER_PATTERN.fullmatch(cell) for cell in cells[1:])
+
+    def _extract_table_title(self, lines: List[str], table_start: int,
+                             line_flags: bytearray) -> Optional[str]:
         """Extract table title from preceding lines."""
         # Look at previous 3 lines
         for i in range(1, min(4, table_start + 1)):
@@ -468,7 +507,7 @@ class TableParser:
 
             # Check if it looks like a title
             if (len(line) < 200 and
-                not self._is_table_line(line) and
+                not line_flags[line_idx] & TABLE_LINE and
                 not line.endswith('.') and
                 not re.match(r'^\d+$', line)):  # Not just a number
                 return line
@@ -476,24 +515,44 @@ class TableParser:
         return None
 
     def _deduplicate_tables(self, tables: List[Table]) -> List[Table]:
-        """Remove duplicate and overlapping tables."""
-        if not tables:
-            return tables
+        """
+        Remove duplicate and overlapping tables.
 
-        # Sort by start position
-        tables.sort(key=lambda t: t.start_line)
+        Tables are taken most confident first (earlier start on a tie) and
+        kept unless they overlap a table already kept, partly or by
+        containment. A kept table overlaps [start_line, end_line] exactly
+        when it starts at or before end_line and ends at or after
+        start_line, so a Fenwick tree over the sorted distinct start lines
+        holds the latest end of the kept tables starting at or before each
+        one: every table is one O(log n) prefix query and at most one
+        O(log n) update, O(n log n) in all.
 
-        deduped = []
-        for table in tables:
-            # Check if overlaps with existing tables
-            overlap = False
-            for existing in deduped:
-                if (table.start_line >= existing.start_line and
-                    table.start_line <= existing.end_line):
-                    overlap = True
-                    break
+        Args:
+            tables: Detected tables, possibly overlapping
+
+        Returns:
+            Disjoint tables in start order
+        """
+        starts = sorted({table.start_line for table in tables})
+        size = len(starts)
+        latest_end = [-1] * (size + 1)  # Fenwick tree of prefix maxima, 1-based
+        deduped: List[Table] = []
+
+        for table in sorted(tables, key=lambda t: (-t.confidence, t.start_line)):
+            # Skip it if a kept table starting at or before its end ends at or after its start
+            start_line, end_line = table.start_line, table.end_line
+            i = bisect_right(starts, end_line)
+            while i and latest_end[i] < start_line:
+                i &= i - 1
+            if i:
+                continue
 
-            if not overlap:
-                deduped.append(table)
+            deduped.append(table)
+            i = bisect_right(starts, start_line)
+            while i <= size:
+                if latest_end[i] < end_line:
+                    latest_end[i] = end_line
+                i += i & -i
 
-        return deduped
\ No newline at end of file
+        deduped.sort(key=lambda t: t.start_line)
+        return deduped
@@ -0,0 +1,112 @@
+"""Table-of-contents region detection from per-line feature arrays."""
+
+import re
+from typing import List, Optional, Tuple
+import numpy as np
+from config.settings import TOC_MAX_LINE_LENGTH, TOC_MIN_ENTRIES, TOC_MAX_GAP_LINES
+from src.utils.line_index import LineIndex
+
+# Per-line features, each found by one MULTILINE scan over the whole document
+NONBLANK_LINE_PATTERN = re.compile(r'^[^\S\n]*\S', re.MULTILINE)
+TEXT_LINE_PATTERN = re.compile(r'^[^\S\n]*[A-Za-z(]', re.MULTILINE)
+TRAILING_PAGE_PATTERN = re.compile(r'(?<=[\s.…])(?:\d{1,3}|[A-Z]-\d{1,3})[^\S\n]*$', re.MULTILINE)
+PAGE_ONLY_PATTERN = re.compile(r'^[^\S\n]*(?:\d{1,3}|[A-Z]-\d{1,3})[^\S\n]*$', re.MULTILINE)
+DOT_LEADER_PATTERN = re.compile(r'\.(?:\.{3,}|(?: \.){2,} )|…{2,}')
+ITEM_PREFIX_PATTERN = re.compile(r'^[^\S\n]*(?:ITEM|PART)\b', re.IGNORECASE | re.MULTILINE)
+TOC_MARKER_PATTERN = re.compile(
+    r'^[^\S\n]*(?:TABLE\s+OF\s+CONTENTS|INDEX\s+TO\s+(?:FINANCIAL\s+STATEMENTS|FORM)'
+    r'|(?:Page|PART|ITEM)[^\S\n]*(?:No\.?|Number)?[^\S\n]*$)',  # Titles and column headers
+    re.IGNORECASE | re.MULTILINE
+)
+MONEY_PATTERN = re.compile(r'[$%]')
+
+
+def _line_mask(pattern: re.Pattern, text: str, line_starts: np.ndarray, start: int, end: int) -> np.ndarray:
+    """Boolean array marking the lines that contain a match of pattern."""
+    mask = np.zeros(len(line_starts), dtype=bool)
+    positions = np.fromiter((m.start() for m in pattern.finditer(text, start, end)), dtype=np.int64)
+    if positions.size:
+        mask[np.searchsorted(line_starts, positions, side='right') - 1] = True
+    return mask
+
+
+def find_toc_spans(text: str, line_index: LineIndex,
+                   start: int = 0, end: Optional[int] = None) -> List[Tuple[int, int]]:
+    """
+    Find the table-of-contents regions of a document, or of the lines in
+    ``text[start:end]``.
+
+    A TOC entry is a short line that either starts with text and ends in a
+    page number or dot leaders, is a TABLE OF CONTENTS / INDEX TO marker,
+    or is an ITEM/PART line followed by a page-number-only line. Lines with
+    dollar or percent signs (financial tables) are never entries. A TOC
+    region is a dense run of at least TOC_MIN_ENTRIES entries with no more
+    than TOC_MAX_GAP_LINES other non-blank lines between neighbours.
+
+    Args:
+        text: Document text
+        line_index: LineIndex of text
+        start: Start of the region to scan (a line start)
+        end: End of the region to scan (a line end); defaults to the end of text
+
+    Returns:
+        Sorted (start_pos, end_pos) character spans, from the start of the
+        first entry line to the end of the last
+    """
+    if end is None:
+        end = len(text)
+
+    all_starts = np.frombuffer(line_index.line_starts, dtype=np.int64)
+    first, last = np.searchsorted(all_starts, [start, end], side='right') - 1
+    line_starts = all_starts[first:last + 1]
+    line_count = len(line_starts)
+
+    line_ends = np.empty(line_count, dtype=np.int64)
+    line_ends[:-1] = line_starts[1:] - 1
+    line_ends[-1] = end
+    short = (line_ends - line_starts) <= TOC_MAX_LINE_LENGTH
+
+    def line_mask(pattern: re.Pattern) -> np.ndarray:
+        return _line_mask(pattern, text, line_starts, start, end)
+
+    nonblank = line_mask(NONBLANK_LINE_PATTERN)
+    starts_with_text = line_mask(TEXT_LINE_PATTERN)
+    trailing_page = line_mask(TRAILING_PAGE_PATTERN)
+    page_only = line_mask(PAGE_ONLY_PATTERN)
+    dot_leaders = line_mask(DOT_LEADER_PATTERN)
+    item_prefix = line_mask(ITEM_PREFIX_PATTERN)
+    marker = line_mask(TOC_MARKER_PATTERN)
+    money = line_mask(MONEY_PATTERN)
+
+    # Work over non-blank lines only, so blank spacing never breaks a run
+    rows = np.flatnonzero(nonblank)
+    if rows.size == 0:
+        return []
+
+    # ITEM/PART title whose page number sits alone on the next non-blank line
+    page_follows = np.zeros(rows.size, dtype=bool)
+    page_follows[:-1] = page_only[rows[1:]]
+
+    entry = short[rows] & ~money[rows] & (
+        (starts_with_text[rows] & (trailing_page[rows] | dot_leaders[rows]))
+        | marker[rows]
+        | (item_prefix[rows] & page_follows)
+    )
+
+    entry_rows = np.flatnonzero(entry)
+    if entry_rows.size < TOC_MIN_ENTRIES:
+        return []
+
+    # Split the entries into runs wherever too many other lines intervene
+    breaks = np.flatnonzero(np.diff(entry_rows) - 1 > TOC_MAX_GAP_LINES) + 1
+    run_starts = np.concatenate(([0], breaks))
+    run_ends = np.concatenate((breaks, [entry_rows.size]))
+    dense = (run_ends - run_starts) >= TOC_MIN_ENTRIES
+
+    first_lines = rows[entry_rows[run_starts[dense]]]
+    last_lines = rows[entry_rows[run_ends[dense] - 1]]
+
+    return [
+        (int(start), int(end))
+        for start, end in zip(line_starts[first_lines], line_ends[last_lines])
+    ]
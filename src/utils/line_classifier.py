@@ -0,0 +1,102 @@
+"""Per-line structure flags shared by text normalization and table detection."""
+
+import re
+from typing import Iterable
+from config.settings import TABLE_MIN_COLUMNS
+
+# Flag bits, one byte per line
+COLUMNAR = 0x01  # Text on both sides of a gap of 3+ whitespace characters
+DELIMITER = 0x02  # Horizontal rule: one repeated '-', '=' or '_' (3+ characters)
+PIPE = 0x04  # Two or more '|' characters
+NUMERIC = 0x08  # Contains a digit
+HEADER = 0x10  # Looks like a table header: period/date headings, or keyword columns
+RULE = 0x20  # Nothing but 3+ '-', '=' or '_' characters and surrounding whitespace
+SPACED_NUMBERS = 0x40  # Two consecutive numbers starting more than 10 characters apart (only
+                       # tested when no other STRUCTURED flag is set)
+
+# Combinations the consumers test for
+STRUCTURED = COLUMNAR | PIPE | RULE | SPACED_NUMBERS  # Spacing kept by TextNormalizer
+TABLE_LINE = COLUMNAR | PIPE | DELIMITER  # Part of a table; not a table title
+TABLE_DATA = COLUMNAR | NUMERIC  # Data row below a delimited table's rule
+
+COLUMN_GAP_PATTERN = re.compile(r'\s{3,}')
+RULE_LINE_PATTERN = re.compile(r'^\s*[-=_]{3,}\s*$')
+DIGIT_PATTERN = re.compile(r'\d')
+FINANCIAL_NUMBER_PATTERN = re.compile(r'(?:\$\s*)?\(?[\d,]+(?:\.\d+)?\)?(?:\s*[%KMB])?')
+COLUMN_NUMBER_SPACING = 10  # Gap between number starts that suggests separate columns
+
+# Period headings ("Year Ended") and financial statement dates ("December 31, 2023"),
+# only searched for when the line contains 'end' or '20' respectively
+PERIOD_HEADER_PATTERN = re.compile(r'(?:Year|Period|Quarter|Month)\s+End(?:ed|ing)', re.IGNORECASE)
+DATE_HEADER_PATTERN = re.compile(r'(?:December|June|March|September)\s+\d{1,2},?\s+20\d{2}', re.IGNORECASE)
+HEADER_KEYWORDS = ('total', 'year', 'quarter', 'revenue', 'income', 'assets',
+                   'change', 'increase', 'decrease', '%', '$', '2019', '2020',
+                   '2021', '2022', '2023', '2024')
+
+DELIMITER_CHARS = frozenset('-=_')
+
+
+def _has_spaced_numbers(line: str) -> bool:
+    previous = None
+    for match in FINANCIAL_NUMBER_PATTERN.finditer(line):
+        if previous is not None and match.start() - previous > COLUMN_NUMBER_SPACING:
+            return True
+        previous = match.start()
+    return False
+
+
+def classify_line(line: str) -> int:
+    """
+    Structure flags of one line.
+
+    The flags of a line TextNormalizer does not treat as STRUCTURED still
+    hold after it collapses the line's whitespace; DELIMITER ignores all
+    whitespace so that this is true for it as well.
+
+    Args:
+        line: Line without its newline
+
+    Returns:
+        Bitwise OR of the flag constants
+    """
+    flags = 0
+    stripped = line.strip()
+
+    gaps = len(COLUMN_GAP_PATTERN.findall(stripped))
+    if gaps:
+        flags |= COLUMNAR
+    if line.count('|') >= 2:
+        flags |= PIPE
+    if DIGIT_PATTERN.search(line):
+        flags |= NUMERIC
+
+    if len(stripped) >= 3 and stripped[0] in DELIMITER_CHARS:
+        if len(set(''.join(stripped.split()))) == 1:
+            flags |= DELIMITER
+        if RULE_LINE_PATTERN.match(line):
+            flags |= RULE
+
+    # Bare commas count as numbers too
+    if not flags & STRUCTURED and (flags & NUMERIC or ',' in line) and _has_spaced_numbers(line):
+        flags |= SPACED_NUMBERS
+
+    lowered = stripped.lower()
+    if ((gaps + 1 >= TABLE_MIN_COLUMNS and any(keyword in lowered for keyword in HEADER_KEYWORDS))
+            or ('end' in lowered and PERIOD_HEADER_PATTERN.search(line))
+            or ('20' in line and DATE_HEADER_PATTERN.search(line))):
+        flags |= HEADER
+
+    return flags
+
+
+def classify_lines(lines: Iterable[str]) -> bytearray:
+    """
+    Structure flags of each line, computed once per line.
+
+    Args:
+        lines: Lines of a section, without newlines
+
+    Returns:
+        One flags byte per line
+    """
+    return bytearray(map(classify_line, lines))
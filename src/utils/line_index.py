@@ -0,0 +1,65 @@
+"""Line-offset index for mapping character positions to line numbers."""
+
+import re
+from array import array
+from bisect import bisect_right
+
+NEWLINE_PATTERN = re.compile(r'\n')
+
+
+class LineIndex:
+    """
+    Sorted line-start offsets of a document, queried by bisect.
+
+    Built once per document in a single pass; every lookup afterwards is
+    O(log n) and never copies or rescans the text.
+    """
+
+    def __init__(self, text: str):
+        self.text_length = len(text)
+        # line_starts[k] is the offset of the first character of line k (0-based)
+        self.line_starts = array('q', [0])
+        self.line_starts.extend(m.end() for m in NEWLINE_PATTERN.finditer(text))
+
+    def __len__(self) -> int:
+        return len(self.line_starts)
+
+    def line_number(self, pos: int) -> int:
+        """
+        Get the 1-based line number containing a position.
+
+        Equivalent to ``text[:pos].count('\\n') + 1``.
+
+        Args:
+            pos: Character offset in the document
+
+        Returns:
+            1-based line number
+        """
+        return bisect_right(self.line_starts, pos)
+
+    def line_offset(self, line_idx: int) -> int:
+        """
+        Get the start offset of a line.
+
+        Args:
+            line_idx: 0-based line index (as in ``text.split('\\n')``)
+
+        Returns:
+            Offset of the line's first character
+        """
+        return self.line_starts[line_idx]
+
+    def line_end(self, line_idx: int) -> int:
+        """
+        Get the end offset of a line, excluding its newline.
+
+        Args:
+            line_idx: 0-based line index
+
+        Returns:
+            Offset just past the line's last character
+        """
+        if line_idx + 1 < len(self.line_starts):
+            return self.line_starts[line_idx + 1] - 1
+        return self.text_length
@@ -120,4 +120,11 @@ def log_summary(stats: dict) -> None:
     if stats.get("failed", 0) > 0:
         logger.warning(f"Check {ERROR_LOG_PATH} for details on failures")
 
+    if "reference_cache" in stats:
+        cache = stats["reference_cache"]
+        logger.info(
+            f"Referenced document cache: {cache.get('hits', 0)} hits, {cache.get('misses', 0)} misses, "
+            f"{cache.get('evictions', 0)} evictions"
+        )
+
     logger.info("=" * 60)
\ No newline at end of file
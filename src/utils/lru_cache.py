@@ -0,0 +1,104 @@
+"""Least-recently-used cache bounded by the total size of its values."""
+
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+STAT_FIELDS = ("hits", "misses", "evictions")
+
+
+class ByteBudgetLRU:
+    """
+    LRU cache whose entries carry a caller-supplied size in bytes.
+
+    Inserting past the budget evicts least-recently-used entries until the
+    total fits again. A value larger than the whole budget is not cached.
+    Hit, miss and eviction counters can be drained per process and merged,
+    like the pattern profiler's counters.
+    """
+
+    def __init__(self, max_bytes: int):
+        """
+        Args:
+            max_bytes: Budget for the summed sizes of the cached values
+        """
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self.stats: Dict[str, int] = dict.fromkeys(STAT_FIELDS, 0)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """
+        Look up a value, marking it most recently used.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cached value, or None on a miss
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats["hits"] += 1
+        return entry[0]
+
+    def put(self, key: Hashable, value: Any, size: int) -> bool:
+        """
+        Cache a value, evicting least-recently-used entries to fit the budget.
+
+        Args:
+            key: Cache key
+            value: Value to cache
+            size: Size of value in bytes
+
+        Returns:
+            Whether the value was cached
+        """
+        if key in self._entries:
+            self.current_bytes -= self._entries.pop(key)[1]
+        if size > self.max_bytes:
+            return False
+
+        while self._entries and self.current_bytes + size > self.max_bytes:
+            _, (_, evicted_size) = self._entries.popitem(last=False)
+            self.current_bytes -= evicted_size
+            self.stats["evictions"] += 1
+
+        self._entries[key] = (value, size)
+        self.current_bytes += size
+        return True
+
+    def clear(self):
+        """Drop every entry, keeping the counters."""
+        self._entries.clear()
+        self.current_bytes = 0
+
+    def drain_stats(self) -> Dict[str, int]:
+        """Take the counters and reset them (used by pool workers)."""
+        drained = dict(self.stats)
+        self.stats = dict.fromkeys(STAT_FIELDS, 0)
+        return drained
+
+
+def merge_stats(total: Dict[str, int], stats: Dict[str, int]) -> Dict[str, int]:
+    """
+    Add drained counters into a running total.
+
+    Args:
+        total: Running total, updated in place
+        stats: Output of ByteBudgetLRU.drain_stats
+
+    Returns:
+        total, for chaining
+    """
+    for field in STAT_FIELDS:
+        total[field] = total.get(field, 0) + stats.get(field, 0)
+    return total
@@ -0,0 +1,226 @@
+"""Opt-in per-pattern hit and cost profiler for config/patterns.py."""
+
+import json
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# (pattern_key, pattern_index) -> counters; populated only while profiling is enabled
+_stats: Dict[Tuple[str, int], Dict[str, any]] = {}
+_enabled = False
+
+
+def _new_counters(pattern: str) -> Dict[str, any]:
+    return {"pattern": pattern, "calls": 0, "time": 0.0, "matches": 0, "selected": 0}
+
+
+class ProfiledPattern:
+    """
+    Proxy around a compiled pattern that records calls, time and matches.
+
+    Every other attribute (``pattern``, ``flags``, ...) is passed through, so
+    the proxy can stand in for the compiled pattern anywhere in the parsers.
+    """
+
+    __slots__ = ("_pattern", "_counters")
+
+    def __init__(self, pattern, counters: Dict[str, any]):
+        self._pattern = pattern
+        self._counters = counters
+
+    def __getattr__(self, name):
+        return getattr(self._pattern, name)
+
+    def __repr__(self) -> str:
+        return f"ProfiledPattern({self._pattern!r})"
+
+    def _record(self, started: float, matches: int):
+        counters = self._counters
+        counters["calls"] += 1
+        counters["time"] += time.perf_counter() - started
+        counters["matches"] += matches
+
+    def search(self, *args, **kwargs):
+        started = time.perf_counter()
+        match = self._pattern.search(*args, **kwargs)
+        self._record(started, match is not None)
+        return match
+
+    def match(self, *args, **kwargs):
+        started = time.perf_counter()
+        match = self._pattern.match(*args, **kwargs)
+        self._record(started, match is not None)
+        return match
+
+    def fullmatch(self, *args, **kwargs):
+        started = time.perf_counter()
+        match = self._pattern.fullmatch(*args, **kwargs)
+        self._record(started, match is not None)
+        return match
+
+    def findall(self, *args, **kwargs):
+        started = time.perf_counter()
+        found = self._pattern.findall(*args, **kwargs)
+        self._record(started, len(found))
+        return found
+
+    def finditer(self, *args, **kwargs):
+        # Time is accumulated across the iteration, which is where the scanning happens
+        counters = self._counters
+        counters["calls"] += 1
+        iterator = self._pattern.finditer(*args, **kwargs)
+        while True:
+            started = time.perf_counter()
+            match = next(iterator, None)
+            counters["time"] += time.perf_counter() - started
+            if match is None:
+                return
+            counters["matches"] += 1
+            yield match
+
+    def sub(self, *args, **kwargs):
+        return self.subn(*args, **kwargs)[0]
+
+    def subn(self, *args, **kwargs):
+        started = time.perf_counter()
+        result = self._pattern.subn(*args, **kwargs)
+        self._record(started, result[1])
+        return result
+
+
+def is_enabled() -> bool:
+    """Whether pattern profiling is active in this process."""
+    return _enabled
+
+
+def instrument(compiled: Dict[str, list]) -> Dict[str, list]:
+    """
+    Wrap every pattern of a compile_patterns() dictionary in place.
+
+    Args:
+        compiled: Mapping of pattern key to compiled patterns
+
+    Returns:
+        The same dictionary, for chaining
+    """
+    for key, patterns in compiled.items():
+        for i, pattern in enumerate(patterns):
+            if isinstance(pattern, ProfiledPattern):
+                continue
+            counters = _stats.setdefault((key, i), _new_counters(pattern.pattern))
+            patterns[i] = ProfiledPattern(pattern, counters)
+    return compiled
+
+
+def enable():
+    """
+    Turn on profiling for this process.
+
+    COMPILED_PATTERNS is instrumented in place, so parsers that already hold
+    it are profiled too. Callers that compile their own copy with
+    compile_patterns() (MDNAExtractor) instrument it when is_enabled(), and
+    parsers that copy patterns elsewhere at construction (such as
+    PatternScanner) must be created after this call.
+    """
+    global _enabled
+    if _enabled:
+        return
+    _enabled = True
+
+    from config.patterns import COMPILED_PATTERNS
+    instrument(COMPILED_PATTERNS)
+
+
+def record_selected(pattern_key: Optional[str], pattern_index: Optional[int]):
+    """
+    Count a pattern as having produced the selected section boundary.
+
+    Args:
+        pattern_key: Pattern family key, or None for boundaries not from config/patterns.py
+        pattern_index: Index of the pattern within its family
+    """
+    if not _enabled or pattern_key is None or pattern_index is None:
+        return
+    counters = _stats.get((pattern_key, pattern_index))
+    if counters is not None:
+        counters["selected"] += 1
+
+
+def snapshot() -> List[Dict[str, any]]:
+    """Current counters as a list of picklable records."""
+    return [
+        {"key": key, "index": index, **counters}
+        for (key, index), counters in sorted(_stats.items())
+    ]
+
+
+def drain() -> List[Dict[str, any]]:
+    """Take the current counters and reset them (used by pool workers)."""
+    records = snapshot()
+    reset()
+    return records
+
+
+def reset():
+    """Zero every counter, keeping the instrumented patterns in place."""
+    for counters in _stats.values():
+        counters.update(calls=0, time=0.0, matches=0, selected=0)
+
+
+def merge(records: List[Dict[str, any]]):
+    """
+    Add counters drained from another process.
+
+    Args:
+        records: Output of drain() or snapshot()
+    """
+    for record in records:
+        counters = _stats.setdefault((record["key"], record["index"]), _new_counters(record["pattern"]))
+        for field in ("calls", "time", "matches", "selected"):
+            counters[field] += record[field]
+
+
+def write_report(report_path: Path) -> Path:
+    """
+    Write the per-pattern counters as a JSON report.
+
+    Args:
+        report_path: Destination file
+
+    Returns:
+        Path of the written report
+    """
+    records = snapshot()
+    report = {
+        "generated_at": datetime.now().isoformat(timespec="seconds"),
+        "pattern_count": len(records),
+        "never_matched": sum(1 for r in records if r["calls"] and not r["matches"]),
+        "never_called": sum(1 for r in records if not r["calls"]),
+        "patterns": [
+            {
+                "key": r["key"],
+                "index": r["index"],
+                "pattern": r["pattern"],
+                "calls": r["calls"],
+                "total_time_ms": round(r["time"] * 1000, 3),
+                "matches": r["matches"],
+                "selected": r["selected"],
+            }
+            for r in records
+        ],
+    }
+
+    report_path = Path(report_path)
+    report_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(report_path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    logger.info(
+        f"Pattern profile written to {report_path} "
+        f"({report['never_matched']} patterns never matched, {report['never_called']} never called)"
+    )
+    return report_path
@@ -0,0 +1,62 @@
+"""Time-bounded evaluation of regex-package patterns over untrusted filing text."""
+
+from typing import List, Optional
+from config.settings import REGEX_TIMEOUT_SECONDS
+from src.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+def _log_timeout(pattern, timeout: float, text_length: int):
+    logger.warning(
+        f"Pattern exceeded its {timeout}s budget on {text_length:,} characters and was skipped: "
+        f"{pattern.pattern[:80]!r}"
+    )
+
+
+def safe_search(pattern, text: str, pos: int = 0, endpos: Optional[int] = None,
+                timeout: float = REGEX_TIMEOUT_SECONDS):
+    """
+    Search with a time budget.
+
+    Args:
+        pattern: Pattern compiled with the regex package
+        text: Text to search
+        pos: Search start position
+        endpos: Search end position; defaults to the end of text
+        timeout: Budget in seconds
+
+    Returns:
+        Match object, or None if there is no match or the budget ran out
+    """
+    try:
+        return pattern.search(text, pos, endpos, timeout=timeout)
+    except TimeoutError:
+        _log_timeout(pattern, timeout, len(text))
+        return None
+
+
+def safe_finditer(pattern, text: str, pos: int = 0, endpos: Optional[int] = None,
+                  timeout: float = REGEX_TIMEOUT_SECONDS) -> List:
+    """
+    Find all matches with a time budget for the whole scan.
+
+    The matches are collected before they are returned, so time the caller
+    spends on each match does not count against the budget. A pattern that
+    runs out of budget contributes no matches at all.
+
+    Args:
+        pattern: Pattern compiled with the regex package
+        text: Text to search
+        pos: Search start position
+        endpos: Search end position; defaults to the end of text
+        timeout: Budget in seconds
+
+    Returns:
+        List of match objects in document order
+    """
+    try:
+        return list(pattern.finditer(text, pos, endpos, timeout=timeout))
+    except TimeoutError:
+        _log_timeout(pattern, timeout, len(text))
+        return []
@@ -3,22 +3,56 @@
 import re
 import unicodedata
 
-from typing import List, Set, Tuple
+from typing import Dict, List, Set, Tuple
 from config.patterns import COMPILED_PATTERNS
 from config.settings import CONTROL_CHAR_REPLACEMENT, MULTIPLE_WHITESPACE_PATTERN
+from src.utils.line_classifier import STRUCTURED, classify_line
+
+# SEC markers, removed in this order before any other normalization
+PAGE_MARKER_PATTERN = re.compile(r'<PAGE>\s*\d+', re.IGNORECASE)
+TOC_HEADER_PATTERN = re.compile(r'^\s*Table\s+of\s+Contents\s*$', re.MULTILINE | re.IGNORECASE)
+PAGE_NUMBER_LINE_PATTERN = re.compile(r'^\s*\d{1,3}\s*$', re.MULTILINE)
+SGML_TAG_PATTERN = re.compile(r'</?[A-Z]+>')
+HORIZONTAL_WHITESPACE_PATTERN = re.compile(r'[ \t]+')
+
+CONTROL_CHARS = [*range(0x00, 0x09), 0x0B, 0x0C, *range(0x0E, 0x20), *range(0x7F, 0xA0)]  # Preserve \t, \n, \r
+
+# Unicode punctuation -> ASCII, applied after NFKD
+UNICODE_REPLACEMENTS: Dict[str, str] = {
+    '\u2019': "'",  # Right single quotation mark
+    '\u2018': "'",  # Left single quotation mark
+    '\u201C': '"',  # Left double quotation mark
+    '\u201D': '"',  # Right double quotation mark
+    '\u2013': '-',  # En dash
+    '\u2014': '--', # Em dash (use double dash to preserve width)
+    '\u2026': '...',  # Ellipsis
+    '\u00A0': ' ',  # Non-breaking space
+    '\u2022': '*',  # Bullet
+    '\u00B7': '*',  # Middle dot
+    '\u2212': '-',  # Minus sign
+}
+
+# Control characters and unicode punctuation in one table. Control
+# characters are replaced after NFKD instead of before: they are starters
+# that NFKD leaves alone and never produces, so the order does not change
+# the result as long as the replacement is a base character.
+CHARACTER_TABLE = str.maketrans({
+    **dict.fromkeys(map(chr, CONTROL_CHARS), CONTROL_CHAR_REPLACEMENT),
+    **UNICODE_REPLACEMENTS,
+})
 
 
 class TextNormalizer:
     """Handles text cleaning and normalization for SEC filings while preserving document structure."""
 
-    def __init__(self):
-        self.control_char_pattern = re.compile(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\x7F-\x9F]')  # Preserve \t, \n, \r
-        self.non_ascii_pattern = re.compile(r'[^\x00-\x7F]+')
-
     def normalize_text(self, text: str, preserve_structure: bool = True) -> str:
         """
         Apply normalization pipeline to text while preserving document structure.
 
+        Character-level cleanup is one NFKD pass (skipped for ASCII text)
+        and one translate table; structure preservation is one pass over
+        the lines.
+
         Args:
             text: Raw text from filing
             preserve_structure: Whether to preserve columnar/table structure
@@ -26,179 +60,127 @@ class TextNormalizer:
         Returns:
             Normalized text
         """
+        if preserve_structure:
+            return self.normalize_with_line_flags(text)[0]
+
         if not text:
             return ""
 
-        # First pass: Remove SEC markers but preserve structure
-        text = self._remove_sec_markers(text)
+        text = self._clean_characters(text)
 
-        # Replace control characters (except tabs and newlines)
-        text = self._replace_control_chars(text)
+        # Standard whitespace normalization
+        text = self._normalize_whitespace(text)
+        text = self._remove_empty_lines(text)
 
-        # Normalize unicode
-        text = self._normalize_unicode(text)
+        return text.strip()
 
-        # Fix encoding issues
-        text = self._fix_encoding_issues(text)
+    def normalize_with_line_flags(self, text: str) -> Tuple[str, bytearray]:
+        """
+        Normalize text preserving structure, keeping the line classification.
 
-        if preserve_structure:
-            # Preserve columnar structure and tables
-            text = self._preserve_document_structure(text)
-        else:
-            # Standard whitespace normalization
-            text = self._normalize_whitespace(text)
-            text = self._remove_empty_lines(text)
+        The flags are computed once per line for the structure decision and
+        describe the normalized lines, so TableParser.identify_tables can
+        reuse them instead of classifying every line again.
 
-        return text.strip()
+        Args:
+            text: Raw text from filing
+
+        Returns:
+            Tuple of (normalized text, line_classifier flags of each of its lines)
+        """
+        if not text:
+            return "", bytearray()
+
+        text = self._clean_characters(text)
+
+        # Preserve columnar structure and tables
+        lines, line_flags = self._preserve_document_structure(text)
+
+        # Only the first line's indentation and a trailing blank line are stripped
+        if lines and not lines[-1]:
+            lines.pop()
+            line_flags.pop()
+
+        return '\n'.join(lines).strip(), line_flags
+
+    def _clean_characters(self, text: str) -> str:
+        """Remove SEC markers and normalize unicode, control and punctuation characters."""
+        # First pass: Remove SEC markers but preserve structure
+        text = self._remove_sec_markers(text)
+
+        # Normalize unicode, then replace control characters (except tabs
+        # and newlines) and unicode punctuation. Mojibake fixes are not
+        # needed here: NFKD has already decomposed the lead characters
+        # (â, Ã, Â) of every sequence they look for.
+        if not text.isascii():
+            text = unicodedata.normalize('NFKD', text)
+        return text.translate(CHARACTER_TABLE)
 
-    def _preserve_document_structure(self, text: str) -> str:
+    def _preserve_document_structure(self, text: str) -> Tuple[List[str], bytearray]:
         """
         Preserve the original document structure including columns and tables.
+
+        Structured lines keep their spacing; other lines have internal
+        spacing collapsed and indentation capped at four spaces. Runs of
+        blank lines become a single blank line.
+
+        Returns:
+            Tuple of (processed lines, flags of each processed line)
         """
-        lines = text.split('\n')
         processed_lines = []
+        line_flags = bytearray()
+        previous_blank = True  # No blank line before the first line
+
+        for line in text.split('\n'):
+            flags = classify_line(line)
 
-        for line in lines:
             # Preserve lines that appear to be part of tables or columnar data
-            if self._is_structured_line(line):
+            if flags & STRUCTURED:
                 # Keep original spacing for structured content
                 processed_lines.append(line.rstrip())  # Remove only trailing spaces
-            else:
-                # For regular text, normalize internal spacing but preserve indentation
+                line_flags.append(flags)
+                previous_blank = False
+                continue
+
+            # For regular text, normalize internal spacing but preserve indentation
+            cleaned = ' '.join(line.split())
+            if cleaned:
                 indent = len(line) - len(line.lstrip())
-                cleaned = ' '.join(line.split())
-                if cleaned:
-                    processed_lines.append(' ' * min(indent, 4) + cleaned)
-                elif processed_lines and processed_lines[-1].strip():
-                    # Keep one empty line between paragraphs
-                    processed_lines.append('')
-
-        # Clean up multiple consecutive empty lines
-        result = []
-        empty_count = 0
-        for line in processed_lines:
-            if not line.strip():
-                empty_count += 1
-                if empty_count <= 2:  # Allow up to 2 consecutive empty lines
-                    result.append(line)
-            else:
-                empty_count = 0
-                result.append(line)
-
-        return '\n'.join(result)
-
-    def _is_structured_line(self, line: str) -> bool:
-        """
-        Determine if a line is part of structured content (table, columnar data).
-        """
-        # Check for table delimiters
-        if re.match(r'^\s*[-=_]{3,}\s*$', line):
-            return True
-
-        # Check for multiple consecutive spaces (columnar data)
-        if re.search(r'\s{3,}', line):
-            # Count segments separated by multiple spaces
-            segments = re.split(r'\s{3,}', line.strip())
-            if len(segments) >= 2 and any(s.strip() for s in segments):
-                return True
-
-        # Check for pipe-delimited content
-        if '|' in line and line.count('|') >= 2:
-            return True
-
-        # Check for numeric data in columns
-        if self._has_columnar_numbers(line):
-            return True
-
-        return False
-
-    def _has_columnar_numbers(self, line: str) -> bool:
-        """Check if line contains numbers in a columnar format."""
-        # Pattern for financial numbers (with or without currency symbols)
-        number_pattern = re.compile(r'(?:\$\s*)?\(?[\d,]+(?:\.\d+)?\)?(?:\s*[%KMB])?')
-        matches = list(number_pattern.finditer(line))
-
-        if len(matches) >= 2:
-            # Check if numbers are spaced out (suggesting columns)
-            positions = [m.start() for m in matches]
-            for i in range(1, len(positions)):
-                if positions[i] - positions[i-1] > 10:  # Arbitrary spacing threshold
-                    return True
-
-        return False
+                processed_lines.append(' ' * min(indent, 4) + cleaned)
+                line_flags.append(flags)
+                previous_blank = False
+            elif not previous_blank:
+                # Keep one empty line between paragraphs
+                processed_lines.append('')
+                line_flags.append(0)
+                previous_blank = True
+
+        return processed_lines, line_flags
 
     def _remove_sec_markers(self, text: str) -> str:
         """Remove SEC-specific markers while preserving document structure."""
+        has_tags = '<' in text
+
         # Remove page markers
-        text = re.sub(r'<PAGE>\s*\d+', '', text, flags=re.IGNORECASE)
+        if has_tags:
+            text = PAGE_MARKER_PATTERN.sub('', text)
 
         # Remove "Table of Contents" headers but keep the structure
-        text = re.sub(r'^\s*Table\s+of\s+Contents\s*$', '', text, flags=re.MULTILINE | re.IGNORECASE)
+        text = TOC_HEADER_PATTERN.sub('', text)
 
         # Remove standalone page numbers at line start/end
-        text = re.sub(r'^\s*\d{1,3}\s*$', '', text, flags=re.MULTILINE)
+        text = PAGE_NUMBER_LINE_PATTERN.sub('', text)
 
         # Remove HTML-like tags
-        text = re.sub(r'</?[A-Z]+>', '', text)
-
-        return text
-
-    def _replace_control_chars(self, text: str) -> str:
-        """Replace control characters except tabs and newlines."""
-        return self.control_char_pattern.sub(CONTROL_CHAR_REPLACEMENT, text)
-
-    def _normalize_unicode(self, text: str) -> str:
-        """Normalize unicode characters to ASCII equivalents where possible."""
-        # Normalize to NFKD form
-        text = unicodedata.normalize('NFKD', text)
-
-        # Replace common unicode characters
-        replacements = {
-            '\u2019': "'",  # Right single quotation mark
-            '\u2018': "'",  # Left single quotation mark
-            '\u201C': '"',  # Left double quotation mark
-            '\u201D': '"',  # Right double quotation mark
-            '\u2013': '-',  # En dash
-            '\u2014': '--', # Em dash (use double dash to preserve width)
-            '\u2026': '...',  # Ellipsis
-            '\u00A0': ' ',  # Non-breaking space
-            '\u2022': '*',  # Bullet
-            '\u00B7': '*',  # Middle dot
-            '\u2212': '-',  # Minus sign
-        }
-
-        for unicode_char, ascii_char in replacements.items():
-            text = text.replace(unicode_char, ascii_char)
-
-        return text
-
-    def _fix_encoding_issues(self, text: str) -> str:
-        """Fix common encoding issues in text."""
-        # Fix mojibake patterns
-        encoding_fixes = {
-            'â€™': "'",
-            'â€œ': '"',
-            'â€': '"',
-            'â€"': '--',
-            'â€"': '-',
-            'Ã¢': '',
-            'Â': '',
-            'â\x80\x99': "'",
-            'â\x80\x9c': '"',
-            'â\x80\x9d': '"',
-            'â\x80\x93': '-',
-            'â\x80\x94': '--',
-        }
-
-        for pattern, replacement in encoding_fixes.items():
-            text = text.replace(pattern, replacement)
+        if has_tags:
+            text = SGML_TAG_PATTERN.sub('', text)
 
         return text
 
     def _normalize_whitespace(self, text: str) -> str:
         """Normalize multiple whitespace to single spaces."""
         # Replace multiple spaces, tabs, etc. with single space
-        text = re.sub(r'[ \t]+', ' ', text)
+        text = HORIZONTAL_WHITESPACE_PATTERN.sub(' ', text)
 
         # Normalize line endings
         text = text.replace('\r\n', '\n').replace('\r', '\n')
@@ -2,7 +2,12 @@ import pytest
 from pathlib import Path
 from datetime import datetime
 
+import src.core.extractor as extractor_module
 from src.core.extractor import MDNAExtractor
+from src.core.file_handler import FileHandler
+from src.core.mapped_filing import MappedFiling, StreamedFiling
+from src.core.accession_index import AccessionIndex
+from src.core.reference_resolver import ReferenceResolver
 from src.core.zip_processor import ZipProcessor
 from src.models.filing import Filing, ExtractionResult
 from src.utils.logger import setup_logging
@@ -64,6 +69,16 @@ ITEM 3. QUANTITATIVE AND QUALITATIVE DISCLOSURES ABOUT MARKET RISK
         # Ensure it stops before ITEM 3
         assert "ITEM 3" not in result.mdna_text
 
+    def test_extract_from_content_logical_path(self, extractor, tmp_path, sample_10q_content):
+        """MDNAExtractor should extract from in-memory content with a path that does not exist."""
+        logical_path = tmp_path / "archive.zip" / "test_10q.txt"
+
+        result = extractor.extract_from_content(sample_10q_content, logical_path)
+
+        assert result is not None
+        assert result.filing.file_path == logical_path
+        assert "Quarterly overview text" in result.mdna_text
+
     def test_skip_10q_when_10k_exists(self, tmp_path, sample_10k_content, sample_10q_content):
         """ZipProcessor should skip 10-Q when a 10-K exists for the same year."""
         # Prepare files
@@ -88,3 +103,164 @@ ITEM 3. QUANTITATIVE AND QUALITATIVE DISCLOSURES ABOUT MARKET RISK
 
         assert stats["combined"]["processed"] == 1
         assert stats["combined"]["skipped_10q"] == 0
+
+
+def build_submission(exhibit_bytes: int = 0) -> str:
+    """Synthetic full 10-K submission with a TOC, cross-reference targets and a trailing exhibit."""
+    filler = "Revenue increased compared to the prior year primarily due to higher volumes.\n\n"
+    return (
+        "CONFORMED SUBMISSION TYPE:\t10-K\n"
+        "COMPANY CONFORMED NAME:\tEXAMPLE CORP\n"
+        "CENTRAL INDEX KEY:\t0001234567\n"
+        "FILED AS OF DATE:\t20240315\n\n"
+        "TABLE OF CONTENTS\n\n"
+        "Item 1.    Business                                     3\n"
+        "Item 1A.   Risk Factors                                12\n"
+        "Item 7.    Management's Discussion and Analysis ....... 25\n"
+        "Item 7A.   Quantitative and Qualitative Disclosures ... 40\n"
+        "Item 8.    Financial Statements ....................... 42\n\n"
+        "PART I\n\nITEM 1. BUSINESS\n\n" + filler * 400
+        + "ITEM 1A. RISK FACTORS\n\nOur business is subject to competition.\n\n" + filler * 400
+        + "PART II\n\nITEM 7. MANAGEMENT'S DISCUSSION AND ANALYSIS OF FINANCIAL CONDITION\n\n"
+        + "Overview of results. See Note 3 for details and the risks discussed in Item 1A.\n\n"
+        + filler * 600
+        + "ITEM 7A. QUANTITATIVE AND QUALITATIVE DISCLOSURES ABOUT MARKET RISK\n\n" + filler * 50
+        + "ITEM 8. FINANCIAL STATEMENTS AND SUPPLEMENTARY DATA\n\n" + filler * 100
+        + "NOTE 3 - DEBT\n\nThe Company has a revolving credit facility.\n\n"
+        + "NOTE 4 - LEASES\n\nLeases are recorded on the balance sheet.\n\n"
+        + "SIGNATURES\n\n"
+        + "<DOCUMENT>\n<TYPE>EX-99\n" + "x" * exhibit_bytes + "\n</DOCUMENT>\n"
+    )
+
+
+class TestMappedExtraction:
+    """Large files are located on a memory map and decoded only around the MD&A."""
+
+    @pytest.fixture
+    def submission_path(self, tmp_path):
+        path = tmp_path / "0001234567_20240315_10-K.txt"
+        path.write_text(build_submission(exhibit_bytes=2 * 1024 * 1024))
+        return path
+
+    def _extract(self, tmp_path, path, monkeypatch, mapped: bool):
+        monkeypatch.setattr(extractor_module, "MMAP_MIN_FILE_MB", 0 if mapped else 10 ** 6)
+        return MDNAExtractor(tmp_path / ("mapped" if mapped else "full")).extract_from_file(path)
+
+    def test_matches_full_read(self, tmp_path, submission_path, monkeypatch):
+        full = self._extract(tmp_path, submission_path, monkeypatch, mapped=False)
+        mapped = self._extract(tmp_path, submission_path, monkeypatch, mapped=True)
+
+        assert full is not None and mapped is not None
+        assert mapped.mdna_text == full.mdna_text
+        assert mapped.mdna_text.lstrip().startswith("ITEM 7. MANAGEMENT'S")
+        assert [(r.reference_type, r.target_id, r.resolution_text) for r in mapped.cross_references] == \
+            [(r.reference_type, r.target_id, r.resolution_text) for r in full.cross_references]
+        assert any(r.resolved for r in mapped.cross_references)
+
+    def test_decodes_only_a_window(self, tmp_path, submission_path, monkeypatch):
+        result = self._extract(tmp_path, submission_path, monkeypatch, mapped=True)
+
+        window_start, window_end = result.extraction_metadata["decoded_bytes"]
+        assert window_end - window_start < submission_path.stat().st_size // 4
+        assert result.extraction_metadata["encoding"] == "utf-8"
+
+    def test_falls_back_without_heading(self, tmp_path, monkeypatch):
+        path = tmp_path / "0001234567_20240315_10-K.txt"
+        path.write_text(build_submission().replace("ITEM 7. MANAGEMENT'S DISCUSSION AND ANALYSIS",
+                                                   "ITEM 7. MANAGEMENT'S REVIEW"))
+
+        result = self._extract(tmp_path, path, monkeypatch, mapped=True)
+
+        assert result is None or "decoded_bytes" not in result.extraction_metadata
+
+
+class TestStreamedExtraction:
+    """Files above MAX_FILE_SIZE_MB are scanned in overlapping windows instead of rejected."""
+
+    @pytest.fixture
+    def submission_path(self, tmp_path):
+        path = tmp_path / "0001234567_20240315_10-K.txt"
+        path.write_text(build_submission(exhibit_bytes=2 * 1024 * 1024))
+        return path
+
+    def test_windows_find_the_same_headings(self, submission_path):
+        data = submission_path.read_bytes()
+        expected = MappedFiling(data, "utf-8").headings
+
+        with FileHandler().open_windowed(submission_path) as view:
+            # Small windows so heading lines straddle window boundaries
+            streamed = StreamedFiling(view, "utf-8", window_bytes=1000, overlap_bytes=300)
+            assert streamed.headings == expected
+            assert streamed.decode(0, 64) == data[:64].decode("utf-8")
+
+    def test_oversized_file_is_extracted(self, tmp_path, submission_path, monkeypatch):
+        monkeypatch.setattr(extractor_module, "MAX_FILE_SIZE_MB", 1)
+        full = MDNAExtractor(tmp_path / "full").extract_from_content(
+            submission_path.read_text(), submission_path
+        )
+
+        result = MDNAExtractor(tmp_path / "streamed").extract_from_file(submission_path)
+
+        assert result is not None
+        assert result.mdna_text == full.mdna_text
+        window_start, window_end = result.extraction_metadata["decoded_bytes"]
+        assert window_end - window_start < submission_path.stat().st_size // 4
+
+    def test_oversized_file_without_mdna_is_skipped(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(extractor_module, "MAX_FILE_SIZE_MB", 0)
+        path = tmp_path / "0001234567_20240315_10-K.txt"
+        path.write_text(build_submission().replace("ITEM 7. MANAGEMENT'S DISCUSSION AND ANALYSIS",
+                                                   "ITEM 7. MANAGEMENT'S REVIEW"))
+
+        assert MDNAExtractor(tmp_path).extract_from_file(path) is None
+
+
+def build_incorporating_submission() -> str:
+    """10-K submission whose MD&A is incorporated from an EX-13 in the same file."""
+    filler = "Revenue increased compared to the prior year primarily due to higher volumes.\n\n"
+    return (
+        "CONFORMED SUBMISSION TYPE:\t10-K\n"
+        "COMPANY CONFORMED NAME:\tEXAMPLE CORP\n"
+        "CENTRAL INDEX KEY:\t0001234567\n"
+        "FILED AS OF DATE:\t20240315\n\n"
+        "<DOCUMENT>\n<TYPE>10-K\n<SEQUENCE>1\n<FILENAME>form10k.txt\n<TEXT>\n"
+        "PART II\n\nITEM 7. MANAGEMENT'S DISCUSSION AND ANALYSIS OF FINANCIAL CONDITION\n\n"
+        "The information required by Item 7 is incorporated herein by reference to the information "
+        "under the caption \"Financial Review\" in Exhibit 13 to this report.\n\n" + filler * 5
+        + "ITEM 8. FINANCIAL STATEMENTS AND SUPPLEMENTARY DATA\n\n" + filler * 5
+        + "</TEXT>\n</DOCUMENT>\n"
+        "<DOCUMENT>\n<TYPE>EX-13\n<SEQUENCE>2\n<FILENAME>ex13.txt\n<TEXT>\n"
+        "ANNUAL REPORT TO SHAREHOLDERS\n\nFinancial Review\n\n"
+        "Net sales grew in every region this year.\n\n" + filler * 20
+        + "REPORT OF INDEPENDENT REGISTERED PUBLIC ACCOUNTING FIRM\n\n" + filler * 3
+        + "</TEXT>\n</DOCUMENT>\n"
+    )
+
+
+class TestSubmissionReferences:
+    """Incorporated MD&A is found in the submission's own documents before the filesystem."""
+
+    def test_resolved_from_exhibit_13_in_submission(self, tmp_path):
+        path = tmp_path / "0001234567_20240315_10-K.txt"
+        path.write_text(build_incorporating_submission())
+        accession_index = AccessionIndex()
+        accession_index.lookup = lambda accession, doc_type: pytest.fail("filesystem searched")
+        resolver = ReferenceResolver(tmp_path, accession_index)
+
+        result = MDNAExtractor(tmp_path / "out").extract_from_file(path, resolver)
+
+        assert result is not None
+        assert "Net sales grew in every region" in result.mdna_text
+        assert "INDEPENDENT REGISTERED" not in result.mdna_text
+        assert result.extraction_metadata["incorporation_by_reference"]["resolved"] is True
+
+    def test_mapped_submission_index(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(extractor_module, "MMAP_MIN_FILE_MB", 0)
+        path = tmp_path / "0001234567_20240315_10-K.txt"
+        path.write_text(build_incorporating_submission())
+
+        result = MDNAExtractor(tmp_path / "out").extract_from_file(path, ReferenceResolver(tmp_path))
+
+        assert result is not None
+        assert "decoded_bytes" in result.extraction_metadata
+        assert "Net sales grew in every region" in result.mdna_text
@@ -0,0 +1,132 @@
+"""Tests for FileHandler decoding."""
+
+import io
+import pytest
+from src.core.file_handler import FileHandler
+from src.core.sgml_reader import read_submission, original_offset
+import src.core.file_handler as file_handler_module
+
+
+class TestFileHandlerDecoding:
+    """Bytes are read once, UTF-8 is tried first and detection runs only on failure."""
+
+    @pytest.fixture
+    def handler(self):
+        return FileHandler()
+
+    def test_utf8_read_once(self, handler, tmp_path, monkeypatch):
+        path = tmp_path / "filing.txt"
+        path.write_bytes("Management’s Discussion\r\nNet sales €5\r\n".encode("utf-8"))
+
+        def fail_detect(_):
+            raise AssertionError("detection must not run for valid UTF-8")
+
+        monkeypatch.setattr(file_handler_module.chardet, "detect", fail_detect)
+
+        assert handler.read_file(path) == "Management’s Discussion\nNet sales €5\n"
+        assert handler.last_decode.encoding == "utf-8"
+        assert not handler.last_decode.lossy
+        assert handler.last_decode.decode_seconds >= 0
+
+    def test_utf8_with_stray_byte_stays_utf8(self, handler):
+        raw = "Management’s Discussion — results ".encode("utf-8") * 20 + b"\xff" + b" more text"
+
+        content = handler.decode_bytes(raw)
+
+        assert content.startswith("Management’s Discussion — results")
+        assert "�" in content
+        assert handler.last_decode.encoding == "utf-8"
+        assert handler.last_decode.lossy
+
+    def test_cp1252_detected(self, handler):
+        raw = ("The Company’s results improved. " * 50).encode("cp1252")
+
+        content = handler.decode_bytes(raw)
+
+        assert "Company’s results" in content
+        assert handler.last_decode.encoding == "cp1252"
+        assert not handler.last_decode.lossy
+
+    def test_detected_encoding_cached_per_source(self, handler, monkeypatch):
+        raw = ("The Company’s results improved. " * 50).encode("cp1252")
+        handler.decode_bytes(raw, source="archive.zip")
+        first_encoding = handler.last_decode.encoding
+
+        calls = []
+        original_detect = file_handler_module.chardet.detect
+        monkeypatch.setattr(
+            file_handler_module.chardet, "detect",
+            lambda sample: calls.append(len(sample)) or original_detect(sample)
+        )
+
+        handler.decode_bytes(raw, source="archive.zip")
+        assert calls == []
+        assert handler.last_decode.encoding == first_encoding
+
+        handler.decode_bytes(raw, source="other.zip")
+        assert len(calls) == 1
+
+    def test_detection_sample_is_bounded(self, handler, monkeypatch):
+        monkeypatch.setattr(file_handler_module, "ENCODING_SAMPLE_BYTES", 1024)
+        samples = []
+        original_detect = file_handler_module.chardet.detect
+        monkeypatch.setattr(
+            file_handler_module.chardet, "detect",
+            lambda sample: samples.append(sample) or original_detect(sample)
+        )
+
+        raw = b"a" * 100_000 + b"caf\xe9 " + b"b" * 100_000
+        content = handler.decode_bytes(raw)
+
+        assert "café" in content
+        assert len(samples) == 1
+        assert len(samples[0]) <= 1024
+        assert b"\xe9" in samples[0]
+
+
+SUBMISSION = (
+    b"<SEC-DOCUMENT>\n"
+    b"<DOCUMENT>\n<TYPE>10-K\n<TEXT>\nITEM 7. MANAGEMENT'S DISCUSSION\n</TEXT>\n</DOCUMENT>\n"
+    b"<DOCUMENT>\n<TYPE>GRAPHIC\n<FILENAME>logo.jpg\n<TEXT>\n"
+    b"begin 644 logo.jpg\n" + b"M" + b"\xff" * 60 + b"\n" + (b"M" + b"A" * 60 + b"\n") * 500 + b"`\nend\n"
+    b"</TEXT>\n</DOCUMENT>\n"
+    b"<DOCUMENT>\n<TYPE>EX-99\n<TEXT>\nPress release.\n"
+    b"begin 644 chart.pdf\n" + (b"M" + b"B" * 60 + b"\n") * 300 + b"`\nend\n"
+    b"Closing text.\n</TEXT>\n</DOCUMENT>\n"
+)
+
+
+class TestSubmissionReader:
+    """Binary payloads are skipped while reading, leaving offset-mapped placeholders."""
+
+    def test_binary_payloads_elided(self):
+        compacted, blocks = read_submission(io.BytesIO(SUBMISSION))
+
+        assert [block.kind for block in blocks] == ["GRAPHIC", "uuencode"]
+        assert len(compacted) < len(SUBMISSION) // 5
+        assert b"MAAAA" not in compacted and b"MBBBB" not in compacted
+        assert b"<FILENAME>logo.jpg" in compacted
+        assert b"Press release.\n[" in compacted
+        assert b"Closing text." in compacted
+
+    def test_offsets_map_back(self):
+        compacted, blocks = read_submission(io.BytesIO(SUBMISSION))
+
+        for marker in (b"ITEM 7.", b"<FILENAME>", b"<TYPE>EX-99", b"Closing text."):
+            assert original_offset(blocks, compacted.find(marker)) == SUBMISSION.find(marker)
+
+        block = blocks[0]
+        assert SUBMISSION[block.original_offset:].startswith(b"begin 644 logo.jpg")
+        assert original_offset(blocks, block.offset + 1) == block.original_offset
+
+    def test_read_file_records_elision(self, tmp_path):
+        path = tmp_path / "submission.txt"
+        path.write_bytes(SUBMISSION)
+        handler = FileHandler()
+
+        content = handler.read_file(path)
+
+        assert "ITEM 7. MANAGEMENT'S DISCUSSION" in content
+        assert "\ufffd" not in content
+        assert handler.last_decode.encoding == "utf-8"
+        assert sum(block.original_length for block in handler.last_decode.elided) > len(SUBMISSION) // 2
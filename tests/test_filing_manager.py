@@ -91,3 +91,14 @@ class TestFilingManager:
         sel = fm._select_filings_to_process()
         assert set(sel['process']) == {path_k, path_q}
         assert sel['skip'] == []
+
+    def test_parse_header_metadata(self, fm):
+        header = (
+            "<SEC-HEADER>0000950170-24-012345.hdr.sgml : 20240215\n"
+            "CONFORMED SUBMISSION TYPE:\t10-K/A\n"
+            "FILED AS OF DATE:\t\t20240215\n"
+            "COMPANY DATA:\n"
+            "\t\tCENTRAL INDEX KEY:\t\t\t123456\n"
+        )
+        assert fm._parse_header_metadata(header) == ("0000123456", 2024, "10-K/A")
+        assert fm._parse_header_metadata("no header here") == (None, None, None)
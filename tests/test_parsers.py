@@ -1,7 +1,29 @@
 """Tests for parser modules, including 10-Q fallback end logic."""
 
+import json
+import random
+import re
+import time
+from pathlib import Path
 import pytest
 from src.parsers.section_parser import SectionParser, SectionBoundary
+from src.parsers.table_parser import Table, TableParser
+from src.parsers.table_features import (
+    compare_tables, cut_cells, cut_rows, gutter_columns, line_features, split_run_lines
+)
+from src.parsers.pattern_scanner import PatternScanner, HEADING_FAMILIES
+from src.parsers.document_map import DocumentMap
+from src.parsers.cross_reference_parser import CrossReferenceParser
+from src.parsers.toc_detector import find_toc_spans
+from src.parsers.submission_index import SubmissionIndex
+from src.core.extractor import MDNAExtractor
+from src.core.mapped_filing import StreamedFiling
+from src.parsers.byte_heading_locator import scan_byte_headings, locate_mdna_bytes, reference_byte_ranges
+from src.utils.line_index import LineIndex
+from src.utils import line_classifier
+from src.utils.text_normalizer import TextNormalizer
+from src.utils import pattern_profiler
+from config.patterns import COMPILED_PATTERNS, compile_patterns
 
 
 class TestSectionParser:
@@ -67,4 +89,717 @@ ITEM 7A. QUANTITATIVE AND QUALITATIVE DISCLOSURES
         end_pos = parser._find_10q_fallback_end(content, section.end_pos)
         assert end_pos is None
 
+    @pytest.mark.parametrize("gap", [200, 5000])
+    def test_10q_mdna_starts_at_item_2_below_part_i(self, parser, gap):
+        """The MD&A starts at the Item 2 heading however far below PART I it is."""
+        item_2 = "ITEM 2. MANAGEMENT'S DISCUSSION AND ANALYSIS OF FINANCIAL CONDITION\n"
+        text = (
+            "Cover page text.\n" * 700
+            + "PART I - FINANCIAL INFORMATION\n"
+            + "Financial statements text.\n" * (gap // 27)
+            + item_2
+            + ("Revenue for the quarter increased as demand grew across every region we serve. " * 10 + "\n\n") * 5
+            + "ITEM 3. QUANTITATIVE AND QUALITATIVE DISCLOSURES ABOUT MARKET RISK\n"
+        )
+        result = parser.find_mdna_section(text, "10-Q")
+        assert result is not None
+        assert text[result[0]:].lstrip().startswith(item_2)
+        assert "Financial statements text" not in text[result[0]:result[1]]
+
+    @pytest.mark.parametrize("heading", ["FINANCIAL STATEMENTS", "FINANCIALSTATEMENTS", "CONDENSEDCONSOLIDATED"])
+    def test_find_extended_10q_end_at_statements_heading(self, parser, heading):
+        """A statements heading, with or without its inner space, ends the extended 10-Q search."""
+        content = (
+            "ITEM 2. MD&A Content\n"
+            + "Quarterly discussion of results.\n" * 30
+            + heading + "\n"
+            + "Balance sheet text.\n" * 40
+            + "SIGNATURES\n"
+        )
+        end_pos = parser._find_extended_10q_end(content, 0)
+        assert end_pos == content.find(heading)
+
+
+class TestLineIndex:
+    """LineIndex must agree with the prefix-count line numbering it replaces."""
+
+    def test_line_number_matches_prefix_count(self):
+        text = "first\n\nthird line\nfourth\n"
+        index = LineIndex(text)
+        for pos in range(len(text) + 1):
+            assert index.line_number(pos) == text[:pos].count('\n') + 1
+
+    def test_line_offsets_round_trip(self):
+        text = "alpha\nbeta\n\ngamma"
+        index = LineIndex(text)
+        lines = text.split('\n')
+        assert len(index) == len(lines)
+        for i, line in enumerate(lines):
+            assert text[index.line_offset(i):index.line_end(i)] == line
+
+    def test_section_matches_use_document_line_numbers(self):
+        parser = SectionParser()
+        text = "intro\n\nITEM 7. MANAGEMENT'S DISCUSSION AND ANALYSIS\nbody\n"
+        matches = parser._find_all_section_matches(text, "item_7_start")
+        assert matches
+        for match in matches:
+            assert match.line_number == text[:match.start_pos].count('\n') + 1
+
+    def test_table_positions_resolved(self):
+        text = (
+            "Results summary\n"
+            "Revenue      2023      2022\n"
+            "-------------------------\n"
+            "Product       100        90\n"
+            "Services       50        40\n"
+        )
+        tables = TableParser().identify_tables(text)
+        assert tables
+        for table in tables:
+            assert text[table.start_pos:table.end_pos] == '\n'.join(
+                text.split('\n')[table.start_line:table.end_line + 1]
+            )
+
 # Additional parser tests omitted for brevity
+
+
+class TestLineClassifier:
+    """One classification per line serves both the normalizer and the table parser."""
+
+    @pytest.mark.parametrize("line, expected", [
+        ("Revenue      2023      2022", line_classifier.COLUMNAR | line_classifier.NUMERIC | line_classifier.HEADER),
+        ("  - - - - -  ", line_classifier.DELIMITER),
+        ("=========", line_classifier.DELIMITER | line_classifier.RULE),
+        ("| Product | 100 |", line_classifier.PIPE | line_classifier.NUMERIC),
+        ("Year Ended December 31, 2023", line_classifier.NUMERIC | line_classifier.HEADER),
+        ("Sales rose to $1,234 compared with 987 last year", line_classifier.NUMERIC | line_classifier.SPACED_NUMBERS),
+        ("Sales rose modestly.", 0),
+    ])
+    def test_flags(self, line, expected):
+        assert line_classifier.classify_line(line) == expected
+
+    def test_table_parser_reuses_normalizer_flags(self, monkeypatch):
+        text = (
+            "Results summary\n\n"
+            "Revenue      2023      2022\n"
+            "-------------------------\n"
+            "Product       100        90\n"
+            "Services       50        40\n\n"
+            "| Segment | Sales |\n| East | 10 |\n"
+        )
+        normalized, line_flags = TextNormalizer().normalize_with_line_flags(text)
+        expected = TableParser().identify_tables(normalized)
+
+        from src.parsers import table_parser
+        monkeypatch.setattr(table_parser, "classify_lines", lambda lines: pytest.fail("lines classified again"))
+        tables = TableParser().identify_tables(normalized, line_flags=line_flags)
+
+        assert [(t.start_line, t.end_line, t.content) for t in tables] == \
+            [(t.start_line, t.end_line, t.content) for t in expected]
+        assert len(tables) == 2
+
+
+class TestVectorTableDetector:
+    """The feature-matrix detector finds the same tables as the line-by-line one, with gutters from every row."""
+
+    SECTION = (
+        "Revenue grew in every segment during the year.\n\n"
+        "Results summary\n"
+        "Revenue      2023      2022\n"
+        "-------------------------\n"
+        "Product       100        90\n"
+        "Services       50        40\n\n\n"
+        "Liquidity remained strong.\n\n"
+        "| Segment | Sales |\n| East | 10 |\n| West | 12 |\n"
+    )
+
+    def test_unknown_detector_rejected(self):
+        with pytest.raises(ValueError):
+            TableParser("fastest")
+
+    def test_same_tables_as_rules_detector(self):
+        rules = TableParser("rules").identify_tables(self.SECTION)
+        vector = TableParser("vector").identify_tables(self.SECTION)
+
+        assert [(t.start_line, t.end_line, t.table_type, t.title) for t in vector] == \
+            [(t.start_line, t.end_line, t.table_type, t.title) for t in rules]
+        assert vector[0].content == [["Revenue", "2023", "2022"], ["Product", "100", "90"], ["Services", "50", "40"]]
+        assert vector[1].content == [["Segment", "Sales"], ["East", "10"], ["West", "12"]]
+        for table in vector:
+            assert self.SECTION[table.start_pos:table.end_pos] == table.original_text
+
+    def test_gutters_from_all_rows(self):
+        text = (
+            "                  2023       2022\n"
+            "Net sales      $ 1,234    $ 1,100\n"
+            "Cost of sales      800        760\n"
+        )
+        table = TableParser("vector").identify_tables(text)[0]
+
+        assert table.content == [["", "2023", "2022"], ["Net sales", "$ 1,234", "$ 1,100"],
+                                 ["Cost of sales", "800", "760"]]
+
+    def test_agreement_report(self):
+        agreement = TableParser().compare_detectors(self.SECTION)
+
+        assert agreement.exact_matches == agreement.reference_tables == agreement.candidate_tables == 2
+        assert agreement.line_agreement == 1.0
+
+    def test_compare_tables_counts(self):
+        agreement = compare_tables([(0, 4), (10, 12), (20, 21)], [(0, 4), (11, 14), (30, 31)])
+
+        assert (agreement.exact_matches, agreement.overlapping) == (1, 1)
+        assert (agreement.reference_only, agreement.candidate_only) == (1, 1)
+        assert agreement.shared_lines == 7
+        assert agreement.line_agreement == pytest.approx(7 / 14)
+
+
+class TestGutterColumns:
+    """Aligned-table columns come from the gutters of every row, not the header alone."""
+
+    ROWS = [
+        "Net sales        $ 12,345     $ 11,020",
+        "Cost of sales       8,120        7,600",
+        "Gross margin        4,225        3,420",
+    ]
+
+    def test_gutters_shared_by_all_rows(self):
+        assert gutter_columns(self.ROWS) == [(0, 13), (17, 25), (30, 38)]
+
+    def test_gap_narrower_than_gutter_stays_in_cell(self):
+        assert gutter_columns(["a b   c", "d e   f"], min_gutter=2) == [(0, 3), (6, 7)]
+        assert gutter_columns(["a b   c", "d e   f"], min_gutter=1) == [(0, 1), (2, 3), (6, 7)]
+
+    def test_spanning_heading_kept_whole(self):
+        columns = gutter_columns(self.ROWS)
+
+        assert cut_cells("               Year Ended December 31,", columns) == ["", "Year Ended December 31,", ""]
+        assert cut_cells("Net sales        $ 12,345     $ 11,020", columns) == ["Net sales", "$ 12,345", "$ 11,020"]
+        assert cut_cells("Other", columns) == ["Other", "", ""]
+
+    def test_batch_cutting_matches_cut_cells(self):
+        lines = ["               Year Ended December 31,", *self.ROWS, "", "Total net sales and other   9,999"]
+        columns = gutter_columns(self.ROWS)
+        features = line_features("\n".join(lines), line_classifier.classify_lines(lines))
+
+        split = split_run_lines(features, [(0, len(lines) - 1)], [columns])
+
+        assert split.tolist() == [True, False, False, False, False, True]
+        assert cut_rows(lines, columns, split) == [cut_cells(line, columns) for line in lines]
+
+    @pytest.mark.parametrize("gap", ["", "\n"])
+    def test_prose_mentioning_net_sales_ends_table(self, gap):
+        text = (
+            "                     2023          2022\n"
+            + "\n".join(self.ROWS) + "\n"
+            + "Total\n"
+            + gap
+            + "Net sales increased compared to the prior year, driven by higher volumes in 2023.\n"
+        )
+        tables = TableParser().identify_tables(text)
+
+        assert len(tables) == 1
+        assert tables[0].end_line == 4
+        assert tables[0].content[-1] == ["Total", "", ""]
+        assert "increased" not in tables[0].original_text
+
+    def test_aligned_table_cells_from_gutters(self):
+        text = "\n".join(["Revenue              2023         2022"] + self.ROWS)
+        table = TableParser("rules").identify_tables(text)[0]
+
+        assert table.table_type == "aligned"
+        assert table.content == [
+            ["Revenue", "2023", "2022"],
+            ["Net sales", "$ 12,345", "$ 11,020"],
+            ["Cost of sales", "8,120", "7,600"],
+            ["Gross margin", "4,225", "3,420"],
+        ]
+
+    def test_prose_after_aligned_table_not_absorbed(self):
+        text = "\n".join(["Revenue              2023         2022"] + self.ROWS +
+                         ["", "Margins improved on lower input costs and a favorable mix of products."])
+        table = TableParser("rules").identify_tables(text)[0]
+
+        assert table.end_line == 3
+        assert len(table.content) == 4
+
+
+def make_table(start_line, end_line, confidence):
+    return Table(content=[], start_pos=0, end_pos=0, start_line=start_line, end_line=end_line,
+                 title=None, confidence=confidence, table_type="aligned", original_text="")
+
+
+class TestTableDeduplication:
+    """Overlapping tables are resolved by confidence in one sweep."""
+
+    def spans(self, tables):
+        return [(t.start_line, t.end_line, t.confidence) for t in tables]
+
+    def test_contained_table_resolved_by_confidence(self):
+        parser = TableParser()
+        outer, inner = make_table(0, 20, 0.8), make_table(5, 10, 0.9)
+
+        assert self.spans(parser._deduplicate_tables([outer, inner])) == [(5, 10, 0.9)]
+        assert self.spans(parser._deduplicate_tables([make_table(0, 20, 0.95), inner])) == [(0, 20, 0.95)]
+
+    def test_partial_overlap_and_ties(self):
+        parser = TableParser()
+        tables = [make_table(0, 5, 0.8), make_table(4, 9, 0.9), make_table(10, 12, 0.8), make_table(12, 14, 0.8)]
+
+        assert self.spans(parser._deduplicate_tables(tables)) == [(4, 9, 0.9), (10, 12, 0.8)]
+
+    def test_stress_matches_pairwise_reference(self):
+        rng = random.Random(7)
+        tables = []
+        for _ in range(5000):
+            start = rng.randrange(100000)
+            tables.append(make_table(start, start + rng.randrange(40), rng.choice((0.8, 0.9, 0.95))))
+
+        # Same rule, checked against every kept table
+        expected = []
+        for table in sorted(tables, key=lambda t: (-t.confidence, t.start_line)):
+            if all(table.end_line < kept.start_line or kept.end_line < table.start_line for kept in expected):
+                expected.append(table)
+        expected.sort(key=lambda t: t.start_line)
+
+        deduped = TableParser()._deduplicate_tables(tables)
+
+        assert [id(t) for t in deduped] == [id(t) for t in expected]
+        assert all(a.end_line < b.start_line for a, b in zip(deduped, deduped[1:]))
+
+    def test_adversarial_order_is_not_quadratic(self):
+        # Confidence rising with start_line puts every kept table before all
+        # kept so far; a sorted-list insert there costs O(n), and this took ~6s
+        count = 100000
+        kept = [make_table(10 * i, 10 * i + 5, 0.5 + i / (4 * count)) for i in range(count)]
+        overlapping = [make_table(10 * i + 3, 10 * i + 12, 0.1) for i in range(count)]
+
+        started = time.perf_counter()
+        deduped = TableParser()._deduplicate_tables(overlapping + kept)
+        elapsed = time.perf_counter() - started
+
+        assert [id(t) for t in deduped] == [id(t) for t in kept]
+        assert elapsed < 3.0
+
+
+class TestPatternScanner:
+    """The single-pass scanner must reproduce per-pattern finditer exactly."""
+
+    @staticmethod
+    def _legacy_spans(text, family):
+        spans = [
+            (i, m.start(), m.end())
+            for i, pattern in enumerate(COMPILED_PATTERNS[family])
+            for m in pattern.finditer(text)
+        ]
+        return sorted(spans, key=lambda span: (span[1], span[0]))
+
+    def test_matches_per_pattern_finditer(self):
+        text = (
+            "PART I\n\n  Item 2. Properties\n\nITEM 3. LEGAL PROCEEDINGS\n"
+            "Item 4. Mine Safety Disclosures\n\n\t PART II\n"
+            "ITEM 7. MANAGEMENT'S DISCUSSION AND ANALYSIS OF FINANCIAL CONDITION\n"
+            "Management's Discussion and Analysis\n"
+            "text ITEM 7. inline mention that is not a heading\n"
+            "  \n  Item 7A. Quantitative and Qualitative Disclosures About Market Risk\n"
+            "ITEM 8. FINANCIAL STATEMENTS AND SUPPLEMENTARY DATA\n"
+            "Item VII - Management's Discussion\nItem Two: MD&A\n"
+        )
+        results = PatternScanner().scan(text)
+
+        for family in HEADING_FAMILIES:
+            scanned = [(i, m.start(), m.end()) for i, m in results[family]]
+            assert scanned == self._legacy_spans(text, family), family
+
+    def test_section_start_unchanged(self):
+        text = "Cover page\n\nITEM 7. MANAGEMENT'S DISCUSSION AND ANALYSIS\nBody text.\n"
+        parser = SectionParser()
+        section = parser._find_section_start(text, 'item_7_start')
+
+        assert section is not None
+        assert text[section.start_pos:section.end_pos].strip().startswith("ITEM 7")
+        assert section.confidence == 1.0
+
+
+class TestDocumentMap:
+    """Heading lookups must report the positions the regex searches did."""
+
+    TEXT = (
+        "PART I\n"
+        "ITEM 2. MANAGEMENT'S DISCUSSION AND ANALYSIS\n"
+        "Quarterly discussion text.\n"
+        "\n   \n  ITEM 3. QUANTITATIVE AND QUALITATIVE DISCLOSURES\n"
+        "Market risk text.\n"
+        "PART II - OTHER INFORMATION\n"
+        "Item 1. Legal Proceedings\n"
+        "SIGNATURES\n"
+    )
+
+    def test_records_headings(self):
+        document_map = DocumentMap(self.TEXT)
+        found = [(h.keyword, h.label) for h in document_map.headings]
+
+        assert found == [
+            ("PART", "I"), ("ITEM", "2"), ("ITEM", "3"),
+            ("PART", "II"), ("ITEM", "1"), ("SIGNATURES", None),
+        ]
+        assert document_map.headings[2].line_number == 6
+
+    def test_lookup_matches_regex_offsets(self):
+        document_map = DocumentMap(self.TEXT)
+        tails = {"ITEM": re.compile(r'\s*3', re.IGNORECASE)}
+
+        for pos in range(0, self.TEXT.find("ITEM 3") + 1):
+            newline = re.compile(r'(?:^|\n)\s*ITEM\s*3', re.IGNORECASE | re.MULTILINE).search(self.TEXT[pos:])
+            line = re.compile(r'^\s*ITEM\s*3', re.IGNORECASE | re.MULTILINE).search(self.TEXT[pos:])
+
+            assert document_map.find_heading(tails, pos)[0] == pos + newline.start()
+            assert document_map.find_heading(tails, pos, line_start_only=True)[0] == pos + line.start()
+
+    def test_section_start_from_position(self):
+        parser = SectionParser()
+        pos = self.TEXT.find("Quarterly")
+        section = parser._find_section_start(self.TEXT, "part_ii_start", pos)
+        sliced = parser._find_section_start(self.TEXT[pos:], "part_ii_start")
+
+        assert section.start_pos == pos + sliced.start_pos
+        assert section.end_pos == pos + sliced.end_pos
+
+    def test_item_reference_resolved_from_map(self):
+        parser = CrossReferenceParser()
+        resolution = parser._resolve_item_reference("3", self.TEXT, DocumentMap(self.TEXT))
+
+        assert resolution.startswith("ITEM 3. QUANTITATIVE")
+        assert "Market risk text." in resolution
+        assert "OTHER INFORMATION" not in resolution
+
+
+class TestTocDetector:
+    """TOC regions are dense runs of short heading-plus-page-number lines."""
+
+    BODY = (
+        "Revenue increased compared to the prior year primarily due to higher volumes "
+        "and favorable pricing across all segments of the business.\n\n"
+    ) * 40
+
+    TOC = (
+        "TABLE OF CONTENTS\n\n"
+        "                                                     Page\n"
+        "PART I\n"
+        "Item 1.    Business                                     3\n"
+        "Item 1A.   Risk Factors                                12\n"
+        "PART II\n"
+        "Item 7.    Management's Discussion and Analysis ....... 25\n"
+        "Item 7A.   Quantitative and Qualitative Disclosures ... 40\n"
+        "Item 8.    Financial Statements and Supplementary Data  42\n\n"
+    )
+
+    def _document(self):
+        return (
+            self.TOC
+            + "PART I\nITEM 1. BUSINESS\n\n" + self.BODY
+            + "SELECTED DATA\n"
+            + "Net sales                   $ 1,234      $ 987\n"
+            + "Operating income                 12%        11%\n\n"
+            + "ITEM 7. MANAGEMENT'S DISCUSSION AND ANALYSIS OF FINANCIAL CONDITION\n\n"
+            + self.BODY
+            + "ITEM 8. FINANCIAL STATEMENTS AND SUPPLEMENTARY DATA\n\n" + self.BODY
+        )
+
+    def test_spans_cover_toc_only(self):
+        text = self._document()
+        spans = find_toc_spans(text, LineIndex(text))
+
+        assert spans == [(0, text.index("Supplementary Data  42") + len("Supplementary Data  42"))]
+
+    def test_body_heading_selected_over_toc_entry(self):
+        text = self._document()
+        result = SectionParser().find_mdna_section(text)
+
+        assert result is not None
+        assert result[0] > text.index("SELECTED DATA")
+        assert text[result[0]:].lstrip().startswith("ITEM 7. MANAGEMENT'S")
+        assert text[result[1]:].lstrip().startswith("ITEM 8. FINANCIAL STATEMENTS")
+
+    def test_in_toc_lookup(self):
+        text = self._document()
+        document_map = DocumentMap(text)
+
+        assert document_map.in_toc(text.index("Item 7.    Management"))
+        assert not document_map.in_toc(text.index("ITEM 7. MANAGEMENT"))
+        assert not document_map.in_toc(len(text) - 1)
+
+
+class TestPatternProfiler:
+    """Per-pattern counters recorded by the opt-in profiler."""
+
+    TEXT = (
+        "ITEM 7. MANAGEMENT'S DISCUSSION AND ANALYSIS OF FINANCIAL CONDITION\n\n"
+        "MD&A content.\n\n"
+        "ITEM 7A. QUANTITATIVE AND QUALITATIVE DISCLOSURES ABOUT MARKET RISK\n"
+    )
+
+    @pytest.fixture
+    def profiled_parser(self, monkeypatch):
+        # Instrument a private pattern set so the shared COMPILED_PATTERNS stay untouched
+        monkeypatch.setattr(pattern_profiler, "_stats", {})
+        monkeypatch.setattr(pattern_profiler, "_enabled", True)
+        patterns = pattern_profiler.instrument(compile_patterns())
+
+        parser = SectionParser()
+        parser.patterns = patterns
+        parser.scanner = PatternScanner(patterns)
+        return parser
+
+    def _record(self, key, index):
+        return next(r for r in pattern_profiler.snapshot() if r["key"] == key and r["index"] == index)
+
+    def test_results_unchanged(self, profiled_parser):
+        assert profiled_parser.find_mdna_section(self.TEXT) == SectionParser().find_mdna_section(self.TEXT)
+
+    def test_counts_calls_matches_and_selection(self, profiled_parser):
+        result = profiled_parser.find_mdna_section(self.TEXT)
+        assert result is not None
+
+        start = self._record("item_7_start", 0)
+        assert start["calls"] > 0
+        assert start["matches"] == 1
+        assert start["selected"] == 1
+        assert self._record("item_7a_start", 0)["selected"] == 1
+        assert self._record("item_8_start", 0)["matches"] == 0
+        assert sum(r["selected"] for r in pattern_profiler.snapshot()) == 2
+
+    def test_drain_and_merge(self, profiled_parser):
+        profiled_parser.find_mdna_section(self.TEXT)
+        drained = pattern_profiler.drain()
+
+        assert all(r["calls"] == 0 for r in pattern_profiler.snapshot())
+        pattern_profiler.merge(drained)
+        pattern_profiler.merge(drained)
+        assert self._record("item_7_start", 0)["selected"] == 2
+
+    def test_write_report(self, profiled_parser, tmp_path):
+        profiled_parser.find_mdna_section(self.TEXT)
+        report_path = pattern_profiler.write_report(tmp_path / "profile.json")
+
+        report = json.loads(report_path.read_text(encoding="utf-8"))
+        assert report["pattern_count"] == len(report["patterns"])
+        assert report["never_called"] > 0  # e.g. table patterns are not used here
+        entry = next(p for p in report["patterns"] if p["key"] == "item_7_start" and p["index"] == 0)
+        assert entry["selected"] == 1
+        assert entry["total_time_ms"] >= 0
+
+    def test_extractor_patterns_instrumented_at_call_site(self, monkeypatch):
+        monkeypatch.setattr(pattern_profiler, "_stats", {})
+        monkeypatch.setattr(pattern_profiler, "_enabled", True)
+
+        assert not any(isinstance(p, pattern_profiler.ProfiledPattern) for p in compile_patterns()["form_type"])
+        extractor = MDNAExtractor(Path("unused"))
+        assert all(isinstance(p, pattern_profiler.ProfiledPattern) for p in extractor.patterns["form_type"])
+
+
+class TestByteHeadingLocator:
+    """Headings are located on raw bytes without decoding the filing."""
+
+    DATA = (
+        b"TABLE OF CONTENTS\n"
+        b"Item 1A.   Risk Factors   12\n"
+        b"Item 7.    Management's Discussion and Analysis   25\n"
+        b"Item 8.    Financial Statements   42\n\n"
+        b"ITEM 1A. RISK FACTORS\n" + b"Risk text.\n" * 20
+        + b"ITEM 7. MANAGEMENT'S DISCUSSION AND ANALYSIS\n" + b"Revenue increased.\n" * 50
+        + b"ITEM 8. FINANCIAL STATEMENTS\n"
+        + b"NOTE 3 - DEBT\nDebt text.\nNOTE 4 - LEASES\nLease text.\n"
+    )
+
+    def test_scan_labels(self):
+        headings = scan_byte_headings(self.DATA)
+        labels = [(h.keyword, h.label) for h in headings]
+
+        assert ("ITEM", "1A") in labels
+        assert ("NOTE", "3") in labels
+        assert [h.is_mdna for h in headings if h.label == "7"] == [True, True]
+
+    def test_mdna_skips_toc_entry(self):
+        headings = scan_byte_headings(self.DATA)
+        start, end = locate_mdna_bytes(headings, "10-K", len(self.DATA), 64 * 1024)
+
+        assert self.DATA[start:].startswith(b"ITEM 7. MANAGEMENT")
+        assert self.DATA[end:].startswith(b"ITEM 8.")
+
+    def test_item_heading_preferred_over_annual_report_exhibit(self):
+        data = (
+            b"ITEM 7. MANAGEMENT'S DISCUSSION AND ANALYSIS\n" + b"Revenue increased.\n" * 20
+            + b"ITEM 8. FINANCIAL STATEMENTS\n" + b"Statement text.\n" * 20
+            + b"<DOCUMENT>\n<TYPE>EX-13\n"
+            + b"MANAGEMENT'S DISCUSSION AND ANALYSIS OF FINANCIAL CONDITION\n" + b"Annual report text.\n" * 5000
+        )
+        headings = scan_byte_headings(data)
+        start, end = locate_mdna_bytes(headings, "10-K", len(data), 64 * 1024)
+
+        assert start == 0
+        assert data[end:].startswith(b"ITEM 8.")
+
+    def test_bare_heading_without_end_is_capped(self):
+        data = b"Cover page.\n" + b"MANAGEMENT'S DISCUSSION AND ANALYSIS\n" + b"Annual report text.\n" * 5000
+        headings = scan_byte_headings(data)
+        start, end = locate_mdna_bytes(headings, "10-K", len(data), 64 * 1024)
+
+        assert data[start:].startswith(b"MANAGEMENT'S")
+        assert end == start + 64 * 1024
+
+    def test_reference_ranges_include_closing_heading(self):
+        headings = scan_byte_headings(self.DATA)
+        ranges = reference_byte_ranges(headings, {("note", "3")}, len(self.DATA), 64 * 1024)
+
+        assert len(ranges) == 1
+        start, end = ranges[0]
+        assert self.DATA[start:end] == b"NOTE 3 - DEBT\nDebt text.\nNOTE 4 - LEASES"
+
+
+class TestSubmissionIndex:
+    """Every <DOCUMENT> block is indexed with its type and text offsets."""
+
+    SUBMISSION = (
+        "<SEC-DOCUMENT>\n<SEC-HEADER>\nCONFORMED SUBMISSION TYPE: 10-K\n</SEC-HEADER>\n"
+        "<DOCUMENT>\n<TYPE>10-K\n<SEQUENCE>1\n<FILENAME>form10k.htm\n<TEXT>\nAnnual report body.\n</TEXT>\n</DOCUMENT>\n"
+        "<DOCUMENT>\n<TYPE>EX-13.1\n<SEQUENCE>2\n<FILENAME>ex13.htm\n<DESCRIPTION>ANNUAL REPORT\n"
+        "<TEXT>\nFinancial Review text.\n</TEXT>\n</DOCUMENT>\n"
+        "<DOCUMENT>\n<TYPE>GRAPHIC\n<FILENAME>logo.jpg\n<TEXT>\n[elided]\n</TEXT>\n</DOCUMENT>\n"
+        "</SEC-DOCUMENT>\n"
+    )
+
+    def test_documents_indexed(self):
+        index = SubmissionIndex.from_text(self.SUBMISSION)
+
+        assert [d.doc_type for d in index.documents] == ["10-K", "EX-13.1", "GRAPHIC"]
+        exhibit = index.find(("EX-13",))
+        assert exhibit.filename == "ex13.htm"
+        assert exhibit.description == "ANNUAL REPORT"
+        assert index.text(exhibit) == "Financial Review text.\n"
+        assert index.find(("DEF 14A",)) is None
+
+    def test_byte_index_matches_text_index(self):
+        data = self.SUBMISSION.encode("utf-8")
+        streamed = StreamedFiling(data, "utf-8", window_bytes=64, overlap_bytes=32)
+        text_index = SubmissionIndex.from_text(self.SUBMISSION)
+
+        assert streamed.submission_index().documents == text_index.documents
+
+
+class TestCrossReferenceCache:
+    """Resolutions are cached per document and bounded in size."""
+
+    @staticmethod
+    def _document(note_text: str, notes: int = 1) -> str:
+        body = "".join(f"NOTE {n} - TOPIC {n}\n\nDetails of topic {n}.\n\n" for n in range(1, notes + 1))
+        return body + f"NOTE 7 - DEBT\n\n{note_text}\n\nSIGNATURES\n"
+
+    def test_not_shared_between_documents(self):
+        parser = CrossReferenceParser()
+        first = parser.resolve_references(parser.find_cross_references("See Note 7."), self._document("Alpha debt."))
+        second = parser.resolve_references(parser.find_cross_references("See Note 7."), self._document("Beta debt."))
+
+        assert "Alpha debt." in first[0].resolution_text
+        assert "Beta debt." in second[0].resolution_text
+
+    def test_repeated_references_resolved_once(self, monkeypatch):
+        parser = CrossReferenceParser()
+        calls = []
+        original = parser._resolve_note_reference
+        monkeypatch.setattr(parser, "_resolve_note_reference", lambda *args: calls.append(args[0]) or original(*args))
+        document = self._document("Alpha debt.")
+
+        parser.resolve_references(parser.find_cross_references("See Note 7."), document)
+        refs = parser.resolve_references(parser.find_cross_references("As noted, see Note 7 again."), document)
+
+        assert calls == ["7"]
+        assert refs[0].resolved
+
+    def test_size_bounded(self):
+        parser = CrossReferenceParser(cache_kb=1)
+        document = self._document("Alpha debt.", notes=40)
+        text = " ".join(f"See Note {n}." for n in range(1, 41))
+
+        refs = parser.resolve_references(parser.find_cross_references(text), document)
+
+        assert all(ref.resolved for ref in refs)
+        assert parser.resolved_cache.current_bytes <= 1024
+        assert parser.resolved_cache.stats["evictions"] > 0
+
+
+class TestReferenceMaps:
+    """Note, exhibit and section lookups match the per-reference regex searches they replace."""
+
+    DOCUMENT = (
+        "ITEM 8. FINANCIAL STATEMENTS\n\n"
+        "Risk Factors\n\nCompetition is intense.\n\nSupply is limited.\n\n"
+        "NOTE 1 - SUMMARY OF POLICIES\n\nPolicies text.\n\n"
+        "Note 2: Revenue\n\nRevenue text.\n\n"
+        "(3) Leases\n\nLease text.\n\n"
+        "NOTE 12 - DEBT\nThe credit facility matures in 2028.\n\n"
+        "ITEM 9. CHANGES IN ACCOUNTANTS\n\nNone.\n\n"
+        "EXHIBIT INDEX\n"
+        "3.1 Articles of Incorporation\n"
+        "Exhibit 10.1 - Credit Agreement\n"
+        "13  Annual Report to Shareholders\n"
+        "SIGNATURES\n"
+        "99 Not in the index\n"
+    )
+
+    @staticmethod
+    def _legacy_note(note_num, document):
+        for pattern_str in (rf"(?:^|\n)\s*NOTE\s*{note_num}\s*[-–—:.\s]+([^\n]+)",
+                            rf"(?:^|\n)\s*\({note_num}\)\s*([^\n]+)"):
+            match = re.search(pattern_str, document, re.IGNORECASE | re.MULTILINE)
+            if match:
+                end_match = re.compile(r'(?:^|\n)\s*(?:NOTE\s*\d+|ITEM\s*\d+|SIGNATURES)',
+                                       re.IGNORECASE | re.MULTILINE).search(document, match.end())
+                end_pos = end_match.start() if end_match else min(match.start() + 5000, len(document))
+                return match.start(), end_pos
+        return None
+
+    @staticmethod
+    def _legacy_section(title, document):
+        match = re.search(rf"(?:^|\n)\s*{re.escape(title)}\s*(?:\n|$)", document, re.IGNORECASE | re.MULTILINE)
+        return match.end() if match else None
+
+    @pytest.mark.parametrize("number", ["1", "2", "3", "12", "4"])
+    def test_note_spans_match_legacy(self, number):
+        document_map = DocumentMap(self.DOCUMENT)
+        found = document_map.find_note(number)
+        legacy = self._legacy_note(number, self.DOCUMENT)
+
+        if legacy is None:
+            assert found is None
+        else:
+            assert (found[0], document_map.note_end(found[1])) == legacy
+
+    @pytest.mark.parametrize("title", ["Risk Factors", "risk factors", "Lease text.", "Missing Title"])
+    def test_section_starts_match_legacy(self, title):
+        assert DocumentMap(self.DOCUMENT).find_title_line(title) == self._legacy_section(title, self.DOCUMENT)
+
+    def test_exhibit_index_parsed(self):
+        document_map = DocumentMap(self.DOCUMENT)
+
+        assert document_map.exhibit_description("3.1") == "Articles of Incorporation"
+        assert document_map.exhibit_description("10.1") == "Credit Agreement"
+        assert document_map.exhibit_description("13") == "Annual Report to Shareholders"
+        assert document_map.exhibit_description("99") is None
+
+    def test_document_scanned_once_per_map(self, monkeypatch):
+        from src.parsers import document_map as document_map_module
+        scans = []
+        original = document_map_module.NOTE_HEADING_PATTERN
+        monkeypatch.setattr(document_map_module, "NOTE_HEADING_PATTERN", type("Counting", (), {
+            "finditer": staticmethod(lambda *args: scans.append(1) or original.finditer(*args))
+        }))
+
+        parser = CrossReferenceParser()
+        refs = parser.find_cross_references("See Note 1. See Note 2. See Note 12. See Exhibit 13. See Exhibit 3.1.")
+        parser.resolve_references(refs, self.DOCUMENT)
+
+        assert len(scans) == 1
+        resolutions = {ref.target_id: ref.resolution_text for ref in refs}
+        assert resolutions["12"].startswith("NOTE 12 - DEBT The credit facility")
+        assert resolutions["13"] == "[Exhibit 13: Annual Report to Shareholders]"
@@ -0,0 +1,168 @@
+"""Tests for ReferenceResolver and the accession-number index."""
+
+import os
+import zipfile
+from datetime import datetime
+from pathlib import Path
+import pytest
+from src.core.accession_index import AccessionIndex, DocumentLocation
+from src.core.reference_resolver import ReferenceResolver
+from src.models.filing import Filing
+from src.parsers.section_parser import IncorporationByReference
+from src.utils.lru_cache import ByteBudgetLRU, merge_stats
+
+ACCESSION = "0000950170-24-012345"
+EXHIBIT_TEXT = (
+    "ANNUAL REPORT TO SHAREHOLDERS\n\nFinancial Review\n\n"
+    + "Net sales grew in every region this year.\n\n" * 30
+    + "REPORT OF INDEPENDENT REGISTERED PUBLIC ACCOUNTING FIRM\n\nOpinion.\n"
+)
+
+
+def make_reference(document_type: str = "Exhibit 13") -> IncorporationByReference:
+    return IncorporationByReference(
+        full_text="incorporated herein by reference",
+        document_type=document_type,
+        caption="Financial Review",
+        page_reference=None,
+        position=0
+    )
+
+
+class TestAccessionIndex:
+    """Referenced documents are indexed by accession number in one pass, ZIP members included."""
+
+    @pytest.fixture
+    def input_dir(self, tmp_path):
+        (tmp_path / f"{ACCESSION}_def14a.txt").write_text("Proxy")
+        (tmp_path / "000095017024012345_proxy.txt").write_text("Older proxy copy")
+        (tmp_path / "unrelated.txt").write_text("No accession")
+        with zipfile.ZipFile(tmp_path / "batch.zip", "w") as zf:
+            zf.writestr(f"filings/{ACCESSION.replace('-', '')}_ex13.txt", EXHIBIT_TEXT)
+            zf.writestr("filings/0000950170-24-099999_ex-99.txt", "Press release")
+        return tmp_path
+
+    def test_build(self, input_dir):
+        index = AccessionIndex.build(input_dir)
+
+        assert len(index) == 2
+        assert index.document_count == 3
+        # 'def14a' is preferred over 'proxy' whatever the directory order
+        assert index.lookup(ACCESSION, "DEF 14A") == DocumentLocation(input_dir / f"{ACCESSION}_def14a.txt")
+        exhibit = index.lookup(ACCESSION, "Exhibit 13")
+        assert exhibit.path == input_dir / "batch.zip"
+        assert exhibit.read_text() == EXHIBIT_TEXT
+        assert index.lookup("0000950170-24-099999", "Exhibit 99").member.endswith("_ex-99.txt")
+        assert index.lookup(ACCESSION, "Exhibit 99") is None
+
+    def test_resolves_zip_resident_exhibit(self, input_dir, monkeypatch):
+        monkeypatch.setattr(Path, "glob", lambda *args: pytest.fail("input tree globbed"))
+        resolver = ReferenceResolver(input_dir, AccessionIndex.build(input_dir))
+        filing = Filing(
+            cik="0001234567",
+            company_name="EXAMPLE CORP",
+            form_type="10-K",
+            filing_date=datetime(2024, 3, 15),
+            file_path=input_dir / f"{ACCESSION}.txt"
+        )
+
+        resolved = resolver.resolve_reference(make_reference(), filing)
+
+        assert resolved is not None
+        assert "Net sales grew in every region" in resolved
+        assert "INDEPENDENT REGISTERED" not in resolved
+
+    def test_index_built_once(self, input_dir, monkeypatch):
+        builds = []
+        original_build = AccessionIndex.build.__func__
+        monkeypatch.setattr(
+            AccessionIndex, "build",
+            classmethod(lambda cls, directory: builds.append(directory) or original_build(cls, directory))
+        )
+        resolver = ReferenceResolver(input_dir)
+
+        resolver.accession_index.lookup(ACCESSION, "DEF 14A")
+        resolver.accession_index.lookup(ACCESSION, "Exhibit 13")
+
+        assert builds == [input_dir]
+
+
+class TestByteBudgetLRU:
+    """Entries are evicted least-recently-used first once their sizes exceed the budget."""
+
+    def test_evicts_least_recently_used(self):
+        cache = ByteBudgetLRU(max_bytes=100)
+        cache.put("a", "A", 40)
+        cache.put("b", "B", 40)
+        assert cache.get("a") == "A"
+
+        cache.put("c", "C", 40)
+
+        assert "b" not in cache
+        assert cache.get("a") == "A" and cache.get("c") == "C"
+        assert cache.current_bytes == 80
+        assert cache.stats == {"hits": 3, "misses": 0, "evictions": 1}
+
+    def test_oversized_value_not_cached(self):
+        cache = ByteBudgetLRU(max_bytes=100)
+        cache.put("a", "A", 40)
+
+        assert not cache.put("big", "B", 101)
+        assert cache.get("big") is None
+        assert cache.get("a") == "A"
+
+    def test_drain_and_merge(self):
+        cache = ByteBudgetLRU(max_bytes=100)
+        cache.get("missing")
+        total = merge_stats({}, cache.drain_stats())
+        cache.get("missing")
+        merge_stats(total, cache.drain_stats())
+
+        assert total == {"hits": 0, "misses": 2, "evictions": 0}
+        assert cache.stats["misses"] == 0
+
+
+class TestReferencedDocumentCache:
+    """A referenced document is read once across filings until it changes on disk."""
+
+    @pytest.fixture
+    def exhibit(self, tmp_path):
+        path = tmp_path / f"{ACCESSION}_ex13.txt"
+        path.write_text(EXHIBIT_TEXT)
+        return path
+
+    def _filing(self, tmp_path, form_type="10-K"):
+        return Filing(
+            cik="0001234567",
+            company_name="EXAMPLE CORP",
+            form_type=form_type,
+            filing_date=datetime(2024, 3, 15),
+            file_path=tmp_path / f"{ACCESSION}.txt"
+        )
+
+    def test_second_reference_hits_cache(self, tmp_path, exhibit, monkeypatch):
+        resolver = ReferenceResolver(tmp_path)
+        reads = []
+        original_read = DocumentLocation.read_text
+        monkeypatch.setattr(DocumentLocation, "read_text", lambda self: reads.append(self) or original_read(self))
+
+        first = resolver.resolve_reference(make_reference(), self._filing(tmp_path))
+        second = resolver.resolve_reference(make_reference(), self._filing(tmp_path, "10-K/A"))
+
+        assert first == second and "Net sales grew" in first
+        assert len(reads) == 1
+        assert resolver.document_cache.stats["hits"] == 1
+        assert resolver.document_cache.stats["misses"] == 1
+
+    def test_modified_document_read_again(self, tmp_path, exhibit):
+        resolver = ReferenceResolver(tmp_path)
+        resolver.resolve_reference(make_reference(), self._filing(tmp_path))
+
+        exhibit.write_text(EXHIBIT_TEXT.replace("Net sales grew", "Net sales fell"))
+        stat = exhibit.stat()
+        os.utime(exhibit, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+        resolved = resolver.resolve_reference(make_reference(), self._filing(tmp_path))
+
+        assert "Net sales fell" in resolved
+        assert resolver.document_cache.stats["misses"] == 2
@@ -0,0 +1,80 @@
+"""Adversarial inputs for the free-text patterns: matching must stay linear and bounded."""
+
+import logging
+import time
+import regex
+import pytest
+from config.patterns import COMPILED_PATTERNS
+from src.parsers.section_parser import SectionParser
+from src.parsers.cross_reference_parser import CrossReferenceParser
+from src.utils.safe_regex import safe_search, safe_finditer
+
+# Inputs that made the former patterns backtrack super-linearly, by size in characters
+ADVERSARIAL_CORPUS = {
+    "blank_lines": lambda n: "x\n" + "\n" * n + "y",
+    "space_run": lambda n: "x" + " " * n + "y",
+    "crlf_indent_run": lambda n: "x" + "\r\n  " * (n // 4) + "y",
+    "part_headings_without_item_2": lambda n: "PART I\nsome text here\n" * (n // 22),
+    "unclosed_quote": lambda n: "see 'abc" + " word" * (n // 5),
+    "proxy_without_page": lambda n: "see Proxy Statement " * (n // 20),
+}
+
+SIZE = 200_000
+
+ITEM_2_HEADING = "\nITEM 2. MANAGEMENT'S DISCUSSION AND ANALYSIS OF FINANCIAL CONDITION\n"
+
+
+def _run_pipeline(text: str):
+    section_parser = SectionParser()
+    section_parser.find_mdna_section(text, "10-Q")
+    CrossReferenceParser().find_cross_references(text)
+    section_parser.check_incorporation_by_reference(text, 0, len(text))
+
+
+class TestAdversarialCorpus:
+    """Adversarial inputs are scanned within the search budget instead of being skipped."""
+
+    @pytest.mark.parametrize("name", sorted(ADVERSARIAL_CORPUS))
+    def test_no_search_times_out(self, name, caplog):
+        # A super-linear pattern needs far more than its budget at this size; a skipped search logs it
+        with caplog.at_level(logging.WARNING):
+            _run_pipeline(ADVERSARIAL_CORPUS[name](SIZE))
+        assert "budget" not in caplog.text
+
+    @pytest.mark.parametrize("name", sorted(ADVERSARIAL_CORPUS))
+    def test_heading_after_adversarial_text_found(self, name):
+        text = ADVERSARIAL_CORPUS[name](SIZE) + ITEM_2_HEADING
+        match = safe_search(COMPILED_PATTERNS["part_i_item_2"][0], text)
+
+        # The match starts in the whitespace run before the heading, as (?:^|\n)\s* would
+        heading_pos = len(text) - len(ITEM_2_HEADING) + 1
+        assert match is not None
+        assert match.start() < heading_pos and text[match.start():heading_pos].isspace()
+
+
+class TestSafeRegex:
+    """Patterns that exhaust their budget are skipped instead of hanging the run."""
+
+    CATASTROPHIC = regex.compile(r"(?:a|a)+(?!a)x?z|(?:a|a)+!")
+    TEXT = "a" * 30
+
+    def test_search_times_out(self, caplog):
+        with caplog.at_level(logging.WARNING):
+            started = time.perf_counter()
+            assert safe_search(self.CATASTROPHIC, self.TEXT, timeout=0.05) is None
+        assert time.perf_counter() - started < 1.0
+        assert "budget" in caplog.text
+
+    def test_finditer_times_out(self):
+        started = time.perf_counter()
+        assert safe_finditer(self.CATASTROPHIC, self.TEXT, timeout=0.05) == []
+        assert time.perf_counter() - started < 1.0
+
+    def test_matches_within_budget(self):
+        pattern = regex.compile(r"Note\s+(\d+)")
+        text = "See Note 3 and Note 12."
+
+        assert safe_search(pattern, text).group(1) == "3"
+        assert [m.group(1) for m in safe_finditer(pattern, text)] == ["3", "12"]
+        assert safe_search(pattern, text, 0, 10).group(1) == "3"
+        assert safe_search(pattern, text, 11).group(1) == "12"
@@ -0,0 +1,153 @@
+"""Tests for typed table export."""
+
+import pandas as pd
+import pytest
+from src.core.extractor import MDNAExtractor
+from src.core.table_exporter import TableExporter, parse_numbers, table_cells, table_frame
+from src.parsers.table_parser import TableParser
+from src.utils.logger import setup_logging
+
+TABLE_TEXT = (
+    "                  Year Ended December 31,\n"
+    "                  2023       2022     Change\n"
+    "Net sales      $ 1,234    $ 1,100      12.2%\n"
+    "Cost of sales     (800)        --      (3.1)%\n"
+)
+
+DELIMITED_TABLE_TEXT = (
+    "Segment            Net sales      Operating income\n"
+    "--------------------------------------------------\n"
+    "North America      $ 6,210              $ 1,020\n"
+    "International        6,135                  870\n"
+)
+
+FILING = """
+FORM 10-K
+
+CIK: 0001234567
+FILED AS OF DATE: 03/15/2024
+
+ITEM 7. MANAGEMENT'S DISCUSSION AND ANALYSIS OF FINANCIAL CONDITION AND RESULTS OF OPERATIONS
+
+Results of operations
+
+""" + TABLE_TEXT + """
+Sales grew on higher volumes.
+
+ITEM 7A. QUANTITATIVE AND QUALITATIVE DISCLOSURES ABOUT MARKET RISK
+"""
+
+
+class TestParseNumbers:
+    """Cell text to numbers, one column at a time."""
+
+    def test_financial_formats(self):
+        parsed = parse_numbers(pd.Series(["$ 12,345", "(1,234)", "12.0%", "(5.5)%", "$ (7)", "0.25"]))
+
+        assert parsed["value"].tolist() == [12345.0, -1234.0, 12.0, -5.5, -7.0, 0.25]
+        assert parsed["percent"].tolist() == [False, False, True, True, False, False]
+
+    def test_dashes_are_zero_and_text_is_null(self, monkeypatch):
+        parsed = parse_numbers(pd.Series(["--", "\u2014", "-", "Net sales", "", "1.2.3"]))
+
+        assert parsed["value"].iloc[:3].tolist() == [0.0, 0.0, 0.0]
+        assert parsed["value"].iloc[3:].isna().all()
+        assert not parsed["percent"].any()
+
+        monkeypatch.setattr("src.core.table_exporter.TABLE_DASH_AS_ZERO", False)
+        assert parse_numbers(pd.Series(["--"]))["value"].isna().all()
+
+    def test_only_spacing_around_symbols_is_dropped(self):
+        parsed = parse_numbers(pd.Series(["$ ( 1,234 )", " 12 ", "2023 2022", "1 234", "inf", "1e5", "12%3"]))
+
+        assert parsed["value"].iloc[:2].tolist() == [-1234.0, 12.0]
+        assert parsed["value"].iloc[2:].isna().all()
+
+
+class TestTableCells:
+    """Long cell frame and per-table typed frame."""
+
+    @pytest.fixture
+    def tables(self):
+        return TableParser().identify_tables(TABLE_TEXT)
+
+    def test_header_rows_and_column_headers(self, tables):
+        cells = table_cells(tables)
+
+        assert cells.loc[cells["header"], "row"].unique().tolist() == [0]
+        sales = cells[(cells["row_label"] == "Cost of sales") & (cells["column_header"] == "2022")]
+        assert sales["value"].tolist() == [0.0]
+        assert cells["value"].dtype == "float64"
+
+    def test_typed_table_frame(self, tables):
+        frame = table_frame(tables[0])
+
+        assert list(frame.columns) == ["column_0", "2023", "2022", "Change"]
+        assert frame["2023"].tolist() == [1234.0, -800.0]
+        assert frame["Change"].dtype == "float64"
+        assert frame["column_0"].tolist() == ["Net sales", "Cost of sales"]
+
+    def test_delimited_table_cells(self):
+        tables = TableParser().identify_tables(DELIMITED_TABLE_TEXT)
+        assert [table.table_type for table in tables] == ["delimited"]
+
+        cells = table_cells(tables)
+        north_america = cells[cells["row_label"] == "North America"]
+
+        assert north_america["column_header"].tolist() == ["Segment", "Net sales", "Operating income"]
+        assert north_america["value"].iloc[1:].tolist() == [6210.0, 1020.0]
+
+    def test_no_tables(self):
+        assert table_cells([]).empty
+
+
+class TestTableExporter:
+    """Per-filing dataset files written beside the MD&A text output."""
+
+    @pytest.fixture(autouse=True)
+    def init_logging(self):
+        setup_logging(verbose=False)
+
+    def test_unknown_format_rejected(self, tmp_path):
+        with pytest.raises(ValueError):
+            TableExporter(tmp_path, "csv")
+
+    @pytest.mark.parametrize("export_format", ["parquet", "feather"])
+    def test_extraction_writes_dataset(self, tmp_path, export_format):
+        pytest.importorskip("pyarrow")
+        filing = tmp_path / "0001234567_20240315_10-K.txt"
+        filing.write_text(FILING)
+
+        result = MDNAExtractor(tmp_path / "out", export_format).extract_from_file(filing)
+        assert result is not None and result.tables
+
+        files = list((tmp_path / "out" / "tables").glob(f"*.{export_format}"))
+        assert len(files) == 1
+        cells = pd.read_parquet(files[0]) if export_format == "parquet" else pd.read_feather(files[0])
+
+        assert set(cells["cik"]) == {"0001234567"}
+        assert set(cells["filing_date"].dt.strftime("%Y-%m-%d")) == {"2024-03-15"}
+        assert set(cells["table_index"]) == {0}
+        net_sales = cells[(cells["row_label"] == "Net sales") & (cells["column_header"] == "2023")]
+        assert net_sales["value"].tolist() == [1234.0]
+
+    def test_export_error_does_not_fail_extraction(self, tmp_path, monkeypatch, caplog):
+        def fail(self, result, filename_stem):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(TableExporter, "export", fail)
+        filing = tmp_path / "0001234567_20240315_10-K.txt"
+        filing.write_text(FILING)
+
+        result = MDNAExtractor(tmp_path / "out", "parquet").extract_from_file(filing)
+
+        assert result is not None
+        assert len(list((tmp_path / "out").glob("*.txt"))) == 1
+        assert "Table export failed" in caplog.text
+
+    def test_no_export_by_default(self, tmp_path):
+        filing = tmp_path / "0001234567_20240315_10-K.txt"
+        filing.write_text(FILING)
+
+        assert MDNAExtractor(tmp_path / "out").extract_from_file(filing) is not None
+        assert not (tmp_path / "out" / "tables").exists()
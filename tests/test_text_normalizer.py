@@ -0,0 +1,133 @@
+"""Tests for TextNormalizer: the fused pipeline must match the original multi-pass one."""
+
+import random
+import re
+import unicodedata
+import pytest
+from config.settings import CONTROL_CHAR_REPLACEMENT
+from src.utils.line_classifier import classify_lines
+from src.utils.text_normalizer import TextNormalizer
+
+class LegacyNormalizer:
+    """The multi-pass normalize_text pipeline as it was before fusing, kept as the reference."""
+
+    def normalize_text(self, text, preserve_structure=True):
+        if not text:
+            return ""
+        text = re.sub(r'<PAGE>\s*\d+', '', text, flags=re.IGNORECASE)
+        text = re.sub(r'^\s*Table\s+of\s+Contents\s*$', '', text, flags=re.MULTILINE | re.IGNORECASE)
+        text = re.sub(r'^\s*\d{1,3}\s*$', '', text, flags=re.MULTILINE)
+        text = re.sub(r'</?[A-Z]+>', '', text)
+        text = re.sub(r'[\x00-\x08\x0B-\x0C\x0E-\x1F\x7F-\x9F]', CONTROL_CHAR_REPLACEMENT, text)
+        text = unicodedata.normalize('NFKD', text)
+        for unicode_char, ascii_char in {
+            '\u2019': "'", '\u2018': "'", '\u201C': '"', '\u201D': '"', '\u2013': '-', '\u2014': '--',
+            '\u2026': '...', '\u00A0': ' ', '\u2022': '*', '\u00B7': '*', '\u2212': '-',
+        }.items():
+            text = text.replace(unicode_char, ascii_char)
+        for pattern, replacement in {
+            'â€™': "'", 'â€œ': '"', 'â€': '"', 'â€"': '-', 'Ã¢': '', 'Â': '',
+            'â\x80\x99': "'", 'â\x80\x9c': '"', 'â\x80\x9d': '"', 'â\x80\x93': '-', 'â\x80\x94': '--',
+        }.items():
+            text = text.replace(pattern, replacement)
+        if preserve_structure:
+            text = self._preserve_document_structure(text)
+        else:
+            text = re.sub(r'[ \t]+', ' ', text).replace('\r\n', '\n').replace('\r', '\n')
+            lines = []
+            for line in text.split('\n'):
+                if line.strip():
+                    lines.append(line)
+                elif lines and lines[-1].strip():
+                    lines.append('')
+            text = '\n'.join(lines)
+        return text.strip()
+
+    def _preserve_document_structure(self, text):
+        processed_lines = []
+        for line in text.split('\n'):
+            if self._is_structured_line(line):
+                processed_lines.append(line.rstrip())
+            else:
+                indent = len(line) - len(line.lstrip())
+                cleaned = ' '.join(line.split())
+                if cleaned:
+                    processed_lines.append(' ' * min(indent, 4) + cleaned)
+                elif processed_lines and processed_lines[-1].strip():
+                    processed_lines.append('')
+        result = []
+        empty_count = 0
+        for line in processed_lines:
+            if not line.strip():
+                empty_count += 1
+                if empty_count <= 2:
+                    result.append(line)
+            else:
+                empty_count = 0
+                result.append(line)
+        return '\n'.join(result)
+
+    def _is_structured_line(self, line):
+        if re.match(r'^\s*[-=_]{3,}\s*$', line):
+            return True
+        if re.search(r'\s{3,}', line):
+            segments = re.split(r'\s{3,}', line.strip())
+            if len(segments) >= 2 and any(s.strip() for s in segments):
+                return True
+        if '|' in line and line.count('|') >= 2:
+            return True
+        matches = list(re.finditer(r'(?:\$\s*)?\(?[\d,]+(?:\.\d+)?\)?(?:\s*[%KMB])?', line))
+        if len(matches) >= 2:
+            positions = [m.start() for m in matches]
+            for i in range(1, len(positions)):
+                if positions[i] - positions[i-1] > 10:
+                    return True
+        return False
+
+
+SAMPLES = [
+    "",
+    "Plain ASCII paragraph.\n\n\n\nNext   paragraph   with    gaps.",
+    "<PAGE> 12\nTable of Contents\n  7  \n<B>Results</B> of operations\n",
+    "Revenue        $ 1,234.5        $ (987)       12%\n--------------------\n| a | b | c |\n",
+    "The company\u2019s \u201Cnet\u201D sales rose \u2013 sharply \u2014 by 5\u2026 units \u2022 \u00B7 \u22121",
+    "Caf\u00E9 r\u00E9sum\u00E9 \uFF11\uFF12 \uFB01scal \u2122 \u00BD \uFE58 \u0387 \u00A0 pay",
+    "Mojibake: don\u00E2\u20AC\u2122t \u00C3\u00A2 \u00C2 a\u0301\x01\u0316 \x80\x99 \x0b\x0c\x1f\x7f",
+    "\r\nWindows\r\n\r\n  lines   with   columns\r\n   \r\n",
+    "\t\tindented\ttext\n        deeply indented text\n\n\n\n\nend",
+    "   \n \n\x0c\n   \nonly whitespace lines\n   \n",
+]
+
+
+def random_text(seed: int, length: int = 4000) -> str:
+    """Random text drawn from the characters the pipeline treats specially."""
+    rng = random.Random(seed)
+    pieces = [
+        "a", "Z", "7", "42", "1,234", "$", "(", ")", "%", " ", "   ", "\t", "\n", "\n\n", "\r\n", "|", "---",
+        "<PAGE> 3", "<TABLE>", "</S>", "Table of Contents", "NOTE", "\u2019", "\u201C", "\u2014", "\u2026",
+        "\u00A0", "\u2022", "\u00B7", "\u2212", "\u00E9", "\u00E2\u20AC\u2122", "\u00C2", "\uFB01", "\uFF15",
+        "\u0387", "\uFE58", "\x00", "\x0b", "\x1b", "\x85", "\x9f", "\u0301", "\u0316", "\u2003", "\u3000",
+    ]
+    return "".join(rng.choice(pieces) for _ in range(length // 3))
+
+
+class TestTextNormalizerEquivalence:
+    """normalize_text output is identical to the original multi-pass pipeline."""
+
+    @pytest.mark.parametrize("preserve_structure", [True, False])
+    @pytest.mark.parametrize("text", SAMPLES)
+    def test_samples(self, text, preserve_structure):
+        assert TextNormalizer().normalize_text(text, preserve_structure) == \
+            LegacyNormalizer().normalize_text(text, preserve_structure)
+
+    @pytest.mark.parametrize("preserve_structure", [True, False])
+    @pytest.mark.parametrize("seed", range(40))
+    def test_random_text(self, seed, preserve_structure):
+        text = random_text(seed)
+        assert TextNormalizer().normalize_text(text, preserve_structure) == \
+            LegacyNormalizer().normalize_text(text, preserve_structure)
+
+    @pytest.mark.parametrize("seed", range(20))
+    def test_line_flags_describe_normalized_lines(self, seed):
+        text, line_flags = TextNormalizer().normalize_with_line_flags(random_text(seed) + SAMPLES[3])
+        assert line_flags == classify_lines(text.split('\n'))
@@ -129,3 +129,99 @@ ITEM 3. QUANTITATIVE AND QUALITATIVE DISCLOSURES
         assert stats["zip_results"]["total_files"] == 2
         assert stats["zip_results"]["processed"] == 1
         assert stats["zip_results"]["failed"] == 0
+
+    def test_zip_members_read_in_memory(self, input_dir, processor, sample_10q, monkeypatch):
+        # Members below the spill threshold must never be extracted to scratch disk
+        zip_path = input_dir / "archive.zip"
+        with zipfile.ZipFile(zip_path, 'w') as zf:
+            zf.writestr("0001112223_20240630_10-Q.txt", sample_10q)
+
+        def fail_extract(*args, **kwargs):
+            raise AssertionError("ZIP member was extracted to disk")
+
+        monkeypatch.setattr(zipfile.ZipFile, "extract", fail_extract)
+
+        stats = processor.process_mixed_directory(input_dir)
+
+        assert stats["combined"]["processed"] == 1
+        assert stats["zip_results"]["processed"] == 1
+
+    def test_large_zip_member_spills_to_disk(self, input_dir, output_dir, sample_10q):
+        zip_path = input_dir / "archive.zip"
+        with zipfile.ZipFile(zip_path, 'w') as zf:
+            zf.writestr("0001112223_20240630_10-Q.txt", sample_10q)
+
+        # A zero threshold forces every member through the scratch-disk path
+        processor = ZipProcessor(output_dir, spill_threshold_mb=0)
+        stats = processor.process_zip_file(zip_path)
+
+        assert stats["processed"] == 1
+        assert stats["failed"] == 0
+
+    def test_skipped_members_never_decompressed(self, input_dir, processor, sample_10k, sample_10q, monkeypatch):
+        zip_path = input_dir / "archive.zip"
+        with zipfile.ZipFile(zip_path, 'w') as zf:
+            zf.writestr("0001112223_20240101_10-K.txt", sample_10k)
+            zf.writestr("0001112223_20240630_10-Q.txt", sample_10q)
+
+        opened = []
+        original_open = zipfile.ZipFile.open
+
+        def recording_open(self, name, *args, **kwargs):
+            opened.append(getattr(name, "filename", name))
+            return original_open(self, name, *args, **kwargs)
+
+        monkeypatch.setattr(zipfile.ZipFile, "open", recording_open)
+
+        stats = processor.process_mixed_directory(input_dir)
+
+        assert stats["combined"]["skipped_10q"] == 1
+        assert stats["plan"]["zip_members"] == 2
+        assert stats["plan"]["zip_members_selected"] == 1
+        assert stats["plan"]["header_probes"] == 0
+        assert "0001112223_20240630_10-Q.txt" not in opened
+
+    def test_ambiguous_member_identified_from_header(self, input_dir, processor, sample_10q):
+        header = (
+            "<SEC-HEADER>\n"
+            "CONFORMED SUBMISSION TYPE:\t10-Q\n"
+            "FILED AS OF DATE:\t\t20240807\n"
+            "CENTRAL INDEX KEY:\t\t\t0001112223\n"
+            "</SEC-HEADER>\n"
+        )
+        zip_path = input_dir / "archive.zip"
+        with zipfile.ZipFile(zip_path, 'w') as zf:
+            zf.writestr("submission.txt", header + sample_10q)
+
+        stats = processor.process_mixed_directory(input_dir)
+
+        assert stats["plan"]["header_probes"] == 1
+        assert stats["combined"]["processed"] == 1
+
+    def test_worker_pool_matches_serial(self, input_dir, tmp_path, sample_10k, sample_10q):
+        # Three filers (distinct output names), extracted serially and across two worker processes
+        (input_dir / "0001112223_20220101_10-K.txt").write_text(sample_10k)
+        (input_dir / "0001112224_20230101_10-K.txt").write_text(sample_10k.replace("0001112223", "0001112224"))
+        (input_dir / "0001112225_20240630_10-Q.txt").write_text(sample_10q.replace("0001112223", "0001112225"))
+
+        def outputs(directory):
+            # Everything but the extraction timestamp in the header
+            return {
+                path.name: [line for line in path.read_text().splitlines() if not line.startswith("Extraction Date:")]
+                for path in directory.glob("*.txt")
+            }
+
+        runs = {}
+        for workers in (1, 2):
+            out = tmp_path / f"output_{workers}"
+            stats = ZipProcessor(out).process_mixed_directory(input_dir, workers=workers)
+            runs[workers] = ({key: stats[key] for key in ("combined", "zip_results", "text_results", "plan")},
+                             outputs(out))
+
+        serial_stats, serial_outputs = runs[1]
+        assert serial_stats["combined"]["processed"] == 3
+        assert serial_stats["combined"]["failed"] == 0
+        assert runs[2][0] == serial_stats
+        # Workers write their own outputs
+        assert len(serial_outputs) == 3
+        assert runs[2][1] == serial_outputs